@@ -1,6 +1,16 @@
+from django import forms
 from django.contrib import admin
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.http import urlencode
 
-from .models import OperationStatus, OperationType, Category, Subcategory, Operation
+from .models import (
+    OperationStatus, OperationType, Category, Subcategory, Operation, ClosedPeriod, BalanceSnapshot,
+    RecurringOperation,
+)
+from .pagination import EstimatedCountPaginator
+from .periods import as_date, check_open
+from .search import search_operations
 
 
 @admin.register(OperationStatus)
@@ -10,6 +20,9 @@ class OperationStatusAdmin(admin.ModelAdmin):
 
 @admin.register(OperationType)
 class OperationTypeAdmin(admin.ModelAdmin):
+    list_display = ['name', 'direction']
+    # Направление задается один раз на тип — правка прямо в списке
+    list_editable = ['direction']
     search_fields = ['name']
 
 
@@ -17,6 +30,7 @@ class OperationTypeAdmin(admin.ModelAdmin):
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'type']
     list_filter = ['type']
+    list_select_related = ['type']
     search_fields = ['name']
 
 
@@ -24,6 +38,8 @@ class CategoryAdmin(admin.ModelAdmin):
 class SubcategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'category', 'get_type']
     list_filter = ['category__type', 'category']
+    # __str__ категории включает тип
+    list_select_related = ['category__type']
     search_fields = ['name']
 
     def get_type(self, obj): return obj.category.type
@@ -31,8 +47,119 @@ class SubcategoryAdmin(admin.ModelAdmin):
     get_type.short_description = 'Тип'
 
 
+class OperationAdminForm(forms.ModelForm):
+    class Meta:
+        model = Operation
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # Ошибка вида {'date': ...} — форма сама привяжет ее к полю
+        check_open(cleaned_data.get('date'), self.instance.date if self.instance.pk else None)
+        return cleaned_data
+
+
 @admin.register(Operation)
 class OperationAdmin(admin.ModelAdmin):
-    list_display = ['date', 'status', 'type', 'category', 'subcategory', 'amount']
-    list_filter = ['date', 'status', 'type', 'category', 'subcategory']
+    """
+    Записи ДДС в админке — рассчитано на миллионы строк:
+      - строки списка со всеми словарями — одним запросом (list_select_related по цепочке __str__:
+        подкатегория -> категория -> тип);
+      - фильтры — только по небольшим словарям (статус, тип); период — date_hierarchy, категория
+        и подкатегория — ссылками в колонках (фильтр по id), а не списком всех значений;
+      - в форме словари выбираются автодополнением, а не выпадающим списком на всю таблицу;
+      - количество — оценкой (EstimatedCountPaginator), без второго COUNT(*) по всей таблице.
+    """
+    form = OperationAdminForm
+    list_display = ['date', 'status', 'type', 'category_link', 'subcategory_link', 'amount']
+    list_filter = ['status', 'type']
+    list_select_related = ['status', 'type', 'category__type', 'subcategory__category__type']
+    date_hierarchy = 'date'
+    autocomplete_fields = ['status', 'type', 'category', 'subcategory']
     search_fields = ['comment']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    # Фильтры по id из ссылок колонок (в list_filter их нет — там пришлось бы выводить все значения)
+    link_lookups = {'category': 'category__id__exact', 'subcategory': 'subcategory__id__exact'}
+
+    def lookup_allowed(self, lookup, value, request=None):
+        return lookup in self.link_lookups.values() or super().lookup_allowed(lookup, value, request)
+
+    def _filter_link(self, obj, field):
+        value = getattr(obj, field)
+        url = reverse('admin:dds_operation_changelist') + '?' + urlencode({self.link_lookups[field]: value.pk})
+        return format_html('<a href="{}">{}</a>', url, value)
+
+    def category_link(self, obj): return self._filter_link(obj, 'category')
+
+    category_link.short_description = 'Категория'
+    category_link.admin_order_field = 'category__name'
+
+    def subcategory_link(self, obj): return self._filter_link(obj, 'subcategory')
+
+    subcategory_link.short_description = 'Подкатегория'
+    subcategory_link.admin_order_field = 'subcategory__name'
+
+    def get_search_results(self, request, queryset, search_term):
+        # Тот же индексируемый поиск, что и в API, вместо ILIKE '%…%' по search_fields
+        return search_operations(queryset, search_term), False
+
+    def get_object(self, request, object_id, from_field=None):
+        obj = super().get_object(request, object_id, from_field)
+        if obj is not None and request.method == 'POST':
+            # Сохранение и удаление — под блокировкой строки, как в API (OperationViewSet.get_queryset):
+            # старые сумма и корзина агрегата должны быть прочитаны под ней
+            obj = self.get_queryset(request).select_for_update(of=('self',)).filter(pk=obj.pk).first()
+        return obj
+
+    def _in_closed_period(self, obj):
+        closed = ClosedPeriod.objects.closed_through()
+        return closed is not None and as_date(obj.date) <= closed
+
+    # Записи закрытых месяцев в админке доступны только на просмотр
+    def has_change_permission(self, request, obj=None):
+        if obj is not None and self._in_closed_period(obj):
+            return False
+        return super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        if obj is not None and self._in_closed_period(obj):
+            return False
+        return super().has_delete_permission(request, obj)
+
+
+@admin.register(RecurringOperation)
+class RecurringOperationAdmin(admin.ModelAdmin):
+    """Шаблоны регулярных записей; записи по ним создает materialize_recurring (dds.recurring)."""
+    list_display = ['name', 'schedule', 'amount', 'status', 'type', 'category', 'subcategory',
+                    'start_date', 'end_date', 'is_active']
+    list_filter = ['is_active', 'schedule', 'status', 'type']
+    list_select_related = ['status', 'type', 'category__type', 'subcategory__category__type']
+    autocomplete_fields = ['status', 'type', 'category', 'subcategory']
+    search_fields = ['name']
+
+
+class BalanceSnapshotInline(admin.TabularInline):
+    model = BalanceSnapshot
+    extra = 0
+    can_delete = False
+    readonly_fields = ['status', 'balance']
+
+
+@admin.register(ClosedPeriod)
+class ClosedPeriodAdmin(admin.ModelAdmin):
+    """Просмотр закрытых периодов; закрытие/открытие — через API (dds.periods), чтобы сохранить порядок."""
+    list_display = ['month', 'closed_at']
+    inlines = [BalanceSnapshotInline]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    # Открыть можно только последний закрытый месяц (dds.periods.reopen_period) — удаление из админки
+    # в обход порядка разорвало бы цепочку снимков остатков
+    def has_delete_permission(self, request, obj=None):
+        return False
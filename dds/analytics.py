@@ -0,0 +1,212 @@
+"""
+Аналитика ДДС на NumPy: сводная таблица «месяц × разрез» и прогноз денежного потока по разрезам
+(GET /api/reports/pivot/, GET /api/reports/forecast/).
+
+Данные — один запрос values_list к дневному агрегату (OperationDailyRollup: строк столько, сколько
+корзин «день × справочники», а не записей), сразу в колоночные массивы int64: месяц, id разреза, тип,
+сумма в копейках, количество. Группировка — np.bincount по плоскому индексу (месяц, колонка),
+прогноз — операции над матрицей «месяц × колонка» целиком; циклов Python по строкам нет.
+Суммы считаются в целых копейках, поэтому совпадают с отчетом ДДС (dds.reports) до копейки.
+"""
+import csv
+import io
+from dataclasses import dataclass
+from decimal import Decimal
+
+import numpy as np
+from django.core.exceptions import ValidationError
+from django.db.models import BigIntegerField, ExpressionWrapper, F, IntegerField
+from django.db.models.functions import Cast, ExtractMonth, ExtractYear, Round
+
+from .models import OperationType
+from .reports import CENTS, GROUPS
+from .taxonomy import get_taxonomy
+
+MEASURES = ('net', 'income', 'expense', 'count')
+FORECAST_MEASURES = ('net', 'income', 'expense')
+FORECAST_METHODS = ('moving_average', 'seasonal')
+
+# Длина сезона сезонного прогноза, месяцев
+SEASON = 12
+
+# Разрез -> раздел снимка справочников (имена колонок)
+KINDS = {'status': 'statuses', 'type': 'types', 'category': 'categories', 'subcategory': 'subcategories'}
+
+
+@dataclass
+class Columns:
+    """Колоночное представление выборки агрегата: массивы одной длины (по строке на корзину)."""
+    months: np.ndarray      # datetime64[M]
+    groups: np.ndarray      # int64, id значения разреза
+    income: np.ndarray      # bool, приход ли (направление типа)
+    cents: np.ndarray       # int64, сумма в копейках
+    counts: np.ndarray      # int64, число записей
+
+    def __len__(self):
+        return len(self.groups)
+
+    def values(self, measure):
+        """Значения показателя по строкам (int64): копейки со знаком для net, количество для count."""
+        if measure == 'count':
+            return self.counts
+        if measure == 'income':
+            return np.where(self.income, self.cents, 0)
+        if measure == 'expense':
+            return np.where(self.income, 0, self.cents)
+        return np.where(self.income, self.cents, -self.cents)
+
+
+def load_columns(queryset, group_by):
+    """Колонки (Columns) выборки дневного агрегата queryset для разреза group_by."""
+    id_field = GROUPS[group_by][0]
+    rows = (
+        queryset.order_by()
+        # Все колонки — целые числа, посчитанные в БД: ни date, ни Decimal на каждой строке,
+        # и выборка целиком ложится в один массив int64. Месяц — номер от 1970-01 (как у datetime64[M]).
+        .annotate(
+            month=ExpressionWrapper((ExtractYear('date') - 1970) * 12 + ExtractMonth('date') - 1,
+                                    output_field=IntegerField()),
+            cents=Cast(Round(F('total') * 100), BigIntegerField()),
+        )
+        .values_list('month', id_field, 'type_id', 'cents', 'count')
+    )
+    table = np.array(list(rows), dtype=np.int64).reshape(-1, 5)
+    type_ids = np.unique(table[:, 2])
+    directions = get_taxonomy().resolve('types', set(type_ids.tolist()))
+    income_types = [pk for pk, obj in directions.items() if obj.direction == OperationType.INCOME]
+    return Columns(
+        months=table[:, 0].astype('datetime64[M]'),
+        groups=table[:, 1],
+        income=np.isin(table[:, 2], income_types),
+        cents=table[:, 3],
+        counts=table[:, 4],
+    )
+
+
+def _month(value):
+    return None if value is None else np.datetime64(value, 'M')
+
+
+def pivot_matrix(columns, measure, start=None, end=None):
+    """
+    (месяцы, id колонок, матрица int64 «месяц × колонка»). Месяцы — сплошной ряд от start (или первого месяца
+    с данными) до end (или последнего), пустые месяцы — нули.
+    """
+    keys, column_index = np.unique(columns.groups, return_inverse=True)
+    if not len(columns):
+        if start is None or end is None:
+            return np.array([], dtype='datetime64[M]'), keys, np.zeros((0, 0), dtype=np.int64)
+        first, last = start, end
+    else:
+        first = columns.months.min() if start is None else min(start, columns.months.min())
+        last = columns.months.max() if end is None else max(end, columns.months.max())
+    months = np.arange(first, last + 1)
+    row_index = (columns.months - first).astype(np.int64)
+    size = len(months) * len(keys)
+    # bincount суммирует во float64: копейки целые и точны до 2**53
+    sums = np.bincount(row_index * len(keys) + column_index, weights=columns.values(measure), minlength=size)
+    return months, keys, np.rint(sums).astype(np.int64).reshape(len(months), len(keys))
+
+
+def forecast_matrix(history, method, horizon):
+    """
+    Прогноз на horizon месяцев по матрице истории «месяц × колонка» (float64, копейки):
+      - moving_average — среднее последних len(history) месяцев; каждый следующий месяц считается
+        с учетом уже спрогнозированных (скользящее окно сдвигается);
+      - seasonal — среднее того же месяца прошлых сезонов (t−12, t−24, … в пределах истории и прогноза).
+    Цикл — только по месяцам прогноза; все колонки считаются разом.
+    """
+    window = len(history)
+    extended = np.empty((window + horizon, history.shape[1]))
+    extended[:window] = history
+    for step in range(window, window + horizon):
+        if method == 'seasonal':
+            extended[step] = extended[step - SEASON::-SEASON].mean(axis=0)
+        else:
+            extended[step] = extended[step - window:step].mean(axis=0)
+    return extended[window:]
+
+
+def _money(cents):
+    return str((Decimal(int(cents)) / 100).quantize(CENTS))
+
+
+def _formatter(measure):
+    return int if measure == 'count' else _money
+
+
+def _columns_info(group_by, keys):
+    names = get_taxonomy().resolve(KINDS[group_by], set(keys.tolist()))
+    return [{'id': pk, 'name': names[pk].name if pk in names else None} for pk in keys.tolist()]
+
+
+def _rows(months, matrix, fmt):
+    return [
+        {'period': f'{month}-01', 'values': [fmt(v) for v in row], 'total': fmt(sum(row))}
+        for month, row in zip(months, matrix.tolist())
+    ]
+
+
+def pivot_report(queryset, group_by='category', measure='net', date_from=None, date_to=None):
+    """
+    Сводная таблица: строки — месяцы, колонки — значения разреза group_by, ячейки — measure
+    (net = приход − расход, income, expense — суммы; count — число записей), итоги по строкам и колонкам.
+    """
+    columns = load_columns(queryset, group_by)
+    months, keys, matrix = pivot_matrix(columns, measure, _month(date_from), _month(date_to))
+    fmt = _formatter(measure)
+    return {
+        'group_by': group_by,
+        'measure': measure,
+        'columns': _columns_info(group_by, keys),
+        'results': _rows(months, matrix, fmt),
+        'totals': [fmt(v) for v in matrix.sum(axis=0).tolist()],
+        'total': fmt(matrix.sum()),
+    }
+
+
+def forecast_report(queryset, group_by='category', measure='net', method='moving_average', months=6,
+                    horizon=3, date_from=None, date_to=None):
+    """
+    Прогноз measure по каждому значению разреза на horizon месяцев вперед по последним months месяцам
+    истории (до date_to или последнего месяца с данными). Незавершенный текущий месяц занижает прогноз —
+    его стоит отсечь date_to.
+    """
+    columns = load_columns(queryset, group_by)
+    all_months, keys, matrix = pivot_matrix(columns, measure, _month(date_from), _month(date_to))
+    history_months, history = all_months[-months:], matrix[-months:]
+    if method == 'seasonal' and len(history_months) < SEASON:
+        raise ValidationError({'months': f'Для сезонного прогноза нужно не меньше {SEASON} месяцев истории.'})
+    if len(history_months):
+        forecast = np.rint(forecast_matrix(history.astype(np.float64), method, horizon)).astype(np.int64)
+        forecast_months = np.arange(history_months[-1] + 1, history_months[-1] + 1 + horizon)
+    else:
+        forecast, forecast_months = np.zeros((0, len(keys)), dtype=np.int64), all_months
+    return {
+        'group_by': group_by,
+        'measure': measure,
+        'method': method,
+        'months': months,
+        'horizon': horizon,
+        'columns': _columns_info(group_by, keys),
+        'history': _rows(history_months, history, _money),
+        'forecast': _rows(forecast_months, forecast, _money),
+    }
+
+
+def to_csv(report):
+    """CSV отчета: колонка period (и kind у прогноза — history/forecast), значения по колонкам, total."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    names = [column['name'] for column in report['columns']]
+    if 'forecast' in report:
+        writer.writerow(['period', 'kind', *names, 'total'])
+        for kind in ('history', 'forecast'):
+            for row in report[kind]:
+                writer.writerow([row['period'], kind, *row['values'], row['total']])
+    else:
+        writer.writerow(['period', *names, 'total'])
+        for row in report['results']:
+            writer.writerow([row['period'], *row['values'], row['total']])
+        writer.writerow(['total', *report['totals'], report['total']])
+    return buffer.getvalue()
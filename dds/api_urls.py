@@ -1,12 +1,21 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path, include
-from .api_views import OperationStatusViewSet, OperationTypeViewSet, CategoryViewSet, SubcategoryViewSet, OperationViewSet
+from .api_views import (
+    OperationStatusViewSet, OperationTypeViewSet, CategoryViewSet, SubcategoryViewSet, OperationViewSet,
+    ReportViewSet, ClosedPeriodViewSet, TaxonomyViewSet, JobViewSet,
+    RecurringOperationViewSet,
+)
 
 router = DefaultRouter()
 router.register('statuses', OperationStatusViewSet)
 router.register('types', OperationTypeViewSet)
 router.register('categories', CategoryViewSet)
 router.register('subcategories', SubcategoryViewSet)
+router.register('taxonomy', TaxonomyViewSet, basename='taxonomy')
 router.register('operations', OperationViewSet)
+router.register('reports', ReportViewSet, basename='report')
+router.register('periods', ClosedPeriodViewSet)
+router.register('jobs', JobViewSet)
+router.register('recurring', RecurringOperationViewSet)
 
 urlpatterns = [ path('', include(router.urls)), ]
@@ -1,44 +1,111 @@
-from rest_framework import viewsets, filters
+import os
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from rest_framework import mixins, viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.fields import DateTimeField
+from rest_framework.parsers import JSONParser
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 
 from .models import (
-    OperationStatus, OperationType, Category, Subcategory, Operation
+    OperationStatus, OperationType, Category, Subcategory, Operation, OperationDailyRollup, ClosedPeriod, Job,
+    RecurringOperation,
 )
 from .serializers import (
     OperationStatusSerializer, OperationTypeSerializer,
-    CategorySerializer, SubcategorySerializer, OperationSerializer
+    CategorySerializer, SubcategorySerializer, OperationSerializer, OperationCompactSerializer,
+    OPERATION_RELATIONS,
+    ClosedPeriodSerializer, BalanceQuerySerializer, TaxonomyQuerySerializer, OperationChangesQuerySerializer,
+    OperationBulkSelectionSerializer, OperationBulkUpdateSerializer, JobSerializer,
+    PivotQuerySerializer, ForecastQuerySerializer, RecurringOperationSerializer, MaterializeSerializer,
 )
-from .filters import OperationFilter
+from .filters import OperationFilter, RollupFilter
+from .exporters import EXPORT_FORMATS, STREAMERS
+from .analytics import forecast_report, pivot_report, to_csv
+from .changes import decode_cursor, encode_cursor, read_changes
+from .bulk_edit import bulk_delete_operations, bulk_update_operations, select_operations
+from .importers import OperationImporter
+from .jobs import submit, validate_cashflow, validate_export, validate_import
+from .pagination import OperationPagination
+from .periods import check_open, reopen_period, running_balance
+from .parsers import CSVParser, NDJSONParser
+from .recurring import materialize
+from .reports import cashflow_report, money, parse_cashflow_params, report_totals, taxonomy_stats
+from .search import OperationSearchFilter
+from . import fast_render
+from .db_pool import PreparedStatementsMixin
+from .db_routers import primary
+from .conditional import ConditionalGetMixin
+from .metrics import timed
+from .renderers import FastJSONRenderer, JSONRenderer
+from .taxonomy import get_taxonomy
+
+# Параметр запроса «выполнить фоновой задачей» у выгрузки, импорта и отчета ДДС
+BACKGROUND_PARAM = 'background'
+
+
+def wants_background(request):
+    """?background=1 — выполнить действие фоновой задачей (dds.jobs) вместо ответа в запросе."""
+    return request.query_params.get(BACKGROUND_PARAM) in ('1', 'true')
+
+
+def job_params(request):
+    params = request.query_params.dict()
+    params.pop(BACKGROUND_PARAM, None)
+    return params
+
+
+def enqueue(request, kind, params, validate, source=None):
+    """Проверить параметры и поставить задачу; ответ 202 с задачей и Location для опроса."""
+    try:
+        validate(params)
+    except DjangoValidationError as exc:
+        raise ValidationError(exc.message_dict if hasattr(exc, 'error_dict') else exc.messages)
+    job = submit(kind, params, source)
+    data = JobSerializer(job, context={'request': request}).data
+    location = reverse('job-detail', args=[job.pk], request=request)
+    return Response(data, status=status.HTTP_202_ACCEPTED, headers={'Location': location})
 
 
-class OperationStatusViewSet(viewsets.ModelViewSet):
+class OperationStatusViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     CRUD по справочнику статусов.
     Поддерживает поиск по name (?search=...)
+    Условные GET (ETag/Last-Modified) — по версии таблицы, см. dds.conditional.
     """
+    version_models = [OperationStatus]
     queryset = OperationStatus.objects.all()
     serializer_class = OperationStatusSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ['name']
 
 
-class OperationTypeViewSet(viewsets.ModelViewSet):
+class OperationTypeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     CRUD по типам операций.
     Поддерживает поиск по name (?search=...).
+    Условные GET — по версии таблицы.
     """
+    version_models = [OperationType]
     queryset = OperationType.objects.all()
     serializer_class = OperationTypeSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ['name']
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     CRUD по категориям.
     Фильтрация по типу: ?type={type_id}
     Поиск по name: ?search=...
+    Условные GET — по версиям категорий и типов (тип вложен в ответ).
     """
+    version_models = [Category, OperationType]
     # select_related('type') — чтобы не делать отдельный запрос за типом категории
     queryset = Category.objects.select_related('type').all()
     serializer_class = CategorySerializer
@@ -47,12 +114,14 @@ class CategoryViewSet(viewsets.ModelViewSet):
     search_fields = ['name']
 
 
-class SubcategoryViewSet(viewsets.ModelViewSet):
+class SubcategoryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     CRUD по подкатегориям.
     Фильтрация по категории: ?category={category_id}
     Поиск по name: ?search=...
+    Условные GET — по версиям подкатегорий, категорий и типов.
     """
+    version_models = [Subcategory, Category, OperationType]
     queryset = Subcategory.objects.select_related('category', 'category__type').all()
     serializer_class = SubcategorySerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
@@ -60,20 +129,443 @@ class SubcategoryViewSet(viewsets.ModelViewSet):
     search_fields = ['name']
 
 
-class OperationViewSet(viewsets.ModelViewSet):
+class TaxonomyViewSet(ConditionalGetMixin, viewsets.GenericViewSet):
+    """
+    GET /api/taxonomy/ — все справочники одним ответом, без пагинации и без повторов:
+    статусы и дерево типы -> категории -> подкатегории (для каскадных выпадающих списков).
+    Строится из снимка dds.taxonomy — без запросов к БД, пока справочники не менялись.
+    ?stats=1 — у каждого узла count и total записей (один GROUP BY по дневному агрегату;
+    фильтры date_from/date_to — как у отчетов).
+    """
+    queryset = OperationDailyRollup.objects.all()
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = RollupFilter
+    pagination_class = None
+    version_models = [OperationStatus, OperationType, Category, Subcategory]
+
+    def get_query_params(self):
+        params = TaxonomyQuerySerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        return params.validated_data
+
+    def get_version_models(self):
+        models = super().get_version_models()
+        if self.get_query_params()['stats']:
+            models = [*models, OperationDailyRollup]
+        return models
+
+    def list(self, request):
+        tree = get_taxonomy().tree()
+        if not self.get_query_params()['stats']:
+            return Response(tree)
+
+        stats = taxonomy_stats(self.filter_queryset(self.get_queryset()))
+
+        def with_stats(kind, node, **children):
+            found = stats.get((kind, node['id']), {'count': 0, 'total': None})
+            return {**node, **children, 'count': found['count'], 'total': money(found['total'])}
+
+        return Response({
+            'statuses': [with_stats('statuses', s) for s in tree['statuses']],
+            'types': [
+                with_stats('types', t, categories=[
+                    with_stats('categories', c, subcategories=[
+                        with_stats('subcategories', sub) for sub in c['subcategories']
+                    ])
+                    for c in t['categories']
+                ])
+                for t in tree['types']
+            ],
+        })
+
+
+class OperationViewSet(PreparedStatementsMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     CRUD по записям ДДС.
     - Фильтры (OperationFilter): ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD&
                                 status={id}&type={id}&category={id}&subcategory={id}
-    - Поиск по комментарию: ?search=текст
-    - Пагинация — стандарт DRF (PAGE_SIZE в settings).
+    - Поиск по комментарию: ?search=текст (слова с префиксами, см. dds.search),
+      ?ordering=relevance — по релевантности
+    - Пагинация — стандарт DRF (PAGE_SIZE в settings); keyset по (date, id) — ?pagination=cursor,
+      примерное количество — ?count=capped|estimated (см. dds.pagination).
+    - Пакетный импорт: POST /api/operations/bulk/ (JSON-массив, CSV или NDJSON);
+      пакетное изменение и удаление по id или фильтру: PATCH / DELETE /api/operations/bulk/.
+    - Потоковая выгрузка: GET /api/operations/export/?fmt=csv|ndjson (с теми же фильтрами).
+    - Лента изменений для синхронизации: GET /api/operations/changes/?cursor=... (dds.changes).
+    - Представление: по умолчанию словари вложены целиком; ?expand= — только плоские *_id,
+      ?expand=status,category — плоские *_id плюс перечисленные вложенные словари.
+    - Список в полном представлении отдается быстрым путем (dds.fast_render, DDS_FAST_READ) —
+      тот же JSON без ModelSerializer.
+    - Условные GET списка и карточки: ETag/Last-Modified по версии таблицы записей (меняется при любой
+      записи, см. bump_operations_version) и версиям словарей — без запросов к БД, в т.ч. в keyset-режиме.
+    - Список и карточка — с подготовленными выражениями на сервере, если включены
+      (DDS_DB_PREPARE_THRESHOLD, dds.db_pool.prepared).
     """
     queryset = (
         Operation.objects
-        .select_related('status', 'type', 'category', 'subcategory')  # чтобы не дергать БД на каждом объекте
+        # Вложенные словари сериализуются из снимка dds.taxonomy; полная цепочка связей здесь —
+        # чтобы и при промахе снимка (category.type, subcategory.category.type) не было запросов на строку
+        .select_related('status', 'type', 'category__type', 'subcategory__category__type')
         .all()
     )
     serializer_class = OperationSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, OperationSearchFilter]
     filterset_class = OperationFilter
-    search_fields = ['comment']
\ No newline at end of file
+    pagination_class = OperationPagination
+    search_fields = ['comment']
+    expand_query_param = 'expand'
+    version_models = [Operation, OperationStatus, OperationType, Category, Subcategory]
+
+    def get_expand(self):
+        """
+        Набор связей для ?expand=...: None — параметра нет (полное вложенное представление),
+        пустое множество — только плоские *_id.
+        """
+        if self.action not in ('list', 'retrieve'):
+            return None
+        value = self.request.query_params.get(self.expand_query_param)
+        if value is None:
+            return None
+        expand = {name for name in value.split(',') if name}
+        unknown = expand - set(OPERATION_RELATIONS)
+        if unknown:
+            raise ValidationError({
+                self.expand_query_param: 'Допустимые значения: ' + ', '.join(OPERATION_RELATIONS) + '.'
+            })
+        return expand
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.get_expand() is not None:
+            # Компактное представление берет справочники из снимка — JOIN-ы не нужны
+            queryset = queryset.select_related(None)
+        if self.action in ('update', 'partial_update', 'destroy'):
+            # Запись меняется под блокировкой строки (транзакция запроса, ATOMIC_REQUESTS): старые сумма
+            # и корзина агрегата (dds.signals.remember_rollup_bucket) прочитаны под ней, и параллельная
+            # правка той же записи не вычтет старую сумму дважды. Строки справочников из JOIN-ов не блокируются
+            queryset = queryset.select_for_update(of=('self',))
+        return queryset
+
+    def get_serializer_class(self):
+        if self.get_expand() is not None:
+            return OperationCompactSerializer
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.get_expand()
+        return context
+
+    def list(self, request, *args, **kwargs):
+        if not self.fast_read_allowed():
+            return super().list(request, *args, **kwargs)
+        # Быстрый путь (dds.fast_render): кортежи values_list без JOIN-ов и инстансов моделей,
+        # справочники — готовые представления из снимка, JSON — orjson; ответ побайтно тот же
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values_list(*fast_render.ROW_FIELDS, named=True)
+        page = self.paginate_queryset(rows)
+        with timed('serialize'):
+            data = fast_render.operation_rows(rows if page is None else page, get_taxonomy())
+        request.accepted_renderer = FastJSONRenderer()
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    def fast_read_allowed(self):
+        """Быстрый путь списка: полное представление, JSON без отступов, настройки DRF по умолчанию."""
+        renderer = self.request.accepted_renderer
+        return (
+            fast_render.supported()
+            and self.get_expand() is None
+            and type(renderer) is JSONRenderer
+            and renderer.get_indent(self.request.accepted_media_type, {}) is None
+        )
+
+    def perform_destroy(self, instance):
+        try:
+            check_open(instance.date)
+        except DjangoValidationError as exc:
+            raise ValidationError(exc.message_dict)
+        instance.delete()
+
+    @action(detail=False, methods=['post'], url_path='bulk',
+            parser_classes=[JSONParser, CSVParser, NDJSONParser])
+    def bulk(self, request):
+        """
+        Пакетный импорт записей (PATCH/DELETE того же адреса — пакетное изменение и удаление, см. ниже).
+        Тело: JSON-массив объектов, CSV с заголовком (text/csv) или NDJSON (application/x-ndjson)
+        с полями date, status_id, type_id, category_id, subcategory_id, amount, comment.
+        ?mode=atomic (по умолчанию) — все или ничего; ?mode=partial — вставить валидные строки.
+        Ответ — отчет с количеством вставленных строк и ошибками по номерам строк.
+        ?background=1 — тело сохраняется как есть и импортируется фоновой задачей (ответ 202,
+        отчет — в summary задачи и файлом).
+        """
+        if wants_background(request):
+            params = job_params(request)
+            params['content_type'] = request.content_type.split(';')[0].strip()
+            return enqueue(request, Job.IMPORT, params, validate_import, source=request.body)
+        mode = request.query_params.get('mode', 'atomic')
+        if mode not in ('atomic', 'partial'):
+            raise ValidationError({'mode': 'Допустимые значения: atomic, partial.'})
+        rows = request.data
+        if not isinstance(rows, list):
+            raise ValidationError({'non_field_errors': 'Ожидается массив записей.'})
+
+        report = OperationImporter(partial=(mode == 'partial')).run(rows)
+        if report.errors and not report.created:
+            return Response(report.as_dict(), status=status.HTTP_400_BAD_REQUEST)
+        return Response(report.as_dict(), status=status.HTTP_201_CREATED)
+
+    @bulk.mapping.patch
+    def bulk_update(self, request):
+        """
+        Пакетное изменение: {"ids": [...]} или {"filter": {...параметры списка...}},
+        плюс {"changes": {"status_id": ..., "subcategory_id": ..., ...}} — одни значения для всех строк.
+        Одна проверка правил, один UPDATE (updated_at — сейчас), агрегат — по корзинам. Ответ: {"updated": N}.
+        """
+        params = OperationBulkUpdateSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        try:
+            queryset = select_operations(params.validated_data.get('ids'), params.validated_data.get('filter'))
+            updated = bulk_update_operations(queryset, params.validated_data['changes'])
+        except DjangoValidationError as exc:
+            raise ValidationError(exc.message_dict)
+        return Response({'updated': updated})
+
+    @bulk.mapping.delete
+    def bulk_destroy(self, request):
+        """Пакетное удаление по {"ids": [...]} или {"filter": {...}} одним DELETE. Ответ: {"deleted": N}."""
+        params = OperationBulkSelectionSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        try:
+            queryset = select_operations(params.validated_data.get('ids'), params.validated_data.get('filter'))
+            deleted = bulk_delete_operations(queryset)
+        except DjangoValidationError as exc:
+            raise ValidationError(exc.message_dict)
+        return Response({'deleted': deleted})
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Лента изменений для синхронизации (dds.changes): записи, созданные/измененные после курсора,
+        и id удаленных — по порядку (момент, id), без фильтров списка.
+        ?cursor= — из предыдущего ответа, ?since= — момент ISO 8601, без обоих — с самого начала;
+        ?page_size= — до 5000 событий. Ответ: {"changed": [...], "deleted": [{"id", "deleted_at"}],
+        "cursor": "...", "has_more": bool}; has_more=false — клиент догнал ленту, дальше — опрос с cursor.
+        """
+        params = OperationChangesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        if 'cursor' in params.validated_data:
+            key = decode_cursor(params.validated_data['cursor'])
+        elif 'since' in params.validated_data:
+            key = (params.validated_data['since'], None)
+        else:
+            key = None
+
+        fast = self.fast_read_allowed()
+        fields = fast_render.ROW_FIELDS if fast else ('id', 'updated_at')
+        changed, deleted, next_key, has_more = read_changes(key, params.validated_data['page_size'], fields)
+        with timed('serialize'):
+            if fast:
+                data = fast_render.operation_rows(changed, get_taxonomy())
+                request.accepted_renderer = FastJSONRenderer()
+            else:
+                with primary():
+                    objects = self.get_queryset().in_bulk([row.id for row in changed])
+                instances = [objects[row.id] for row in changed if row.id in objects]
+                data = self.get_serializer(instances, many=True).data
+        moment = DateTimeField()
+        return Response({
+            'changed': data,
+            'deleted': [{'id': pk, 'deleted_at': moment.to_representation(value)} for pk, value in deleted],
+            'cursor': encode_cursor(next_key),
+            'has_more': has_more,
+        })
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Потоковая выгрузка записей в CSV (?fmt=csv, по умолчанию) или NDJSON (?fmt=ndjson).
+        Принимает те же фильтры и ?search=, что и список, но без пагинации:
+        строки читаются серверным курсором и отдаются клиенту по мере чтения.
+        ?background=1 — фоновая задача (ответ 202, файл — GET /api/jobs/{id}/download/).
+        """
+        if wants_background(request):
+            return enqueue(request, Job.EXPORT, job_params(request), validate_export)
+        fmt = request.query_params.get('fmt', 'csv')
+        if fmt not in STREAMERS:
+            raise ValidationError({'fmt': 'Допустимые значения: ' + ', '.join(STREAMERS) + '.'})
+        # Строки читаются уже после выхода из middleware — фиксируем БД запроса (реплику, dds.db_routers)
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.using(queryset.db)
+        response = StreamingHttpResponse(STREAMERS[fmt](queryset), content_type=EXPORT_FORMATS[fmt])
+        response['Content-Disposition'] = f'attachment; filename="operations.{fmt}"'
+        return response
+
+
+class ReportViewSet(ConditionalGetMixin, viewsets.GenericViewSet):
+    """
+    Отчеты по записям ДДС. Агрегация выполняется в БД одним запросом GROUP BY
+    по дневному агрегату (OperationDailyRollup) — стоимость зависит от числа корзин, а не записей.
+    - GET /api/reports/cashflow/?period=day|week|month|quarter&group_by=status,type,category,subcategory
+      Фильтры — те же, что у записей (OperationFilter): date_from, date_to, status, type, category, subcategory.
+    - GET /api/reports/balance/?period=day|month&date_from=&date_to=&status={id}&by_status=1
+      Остаток на конец каждого периода: снимок закрытого месяца + накопленный поток открытого хвоста.
+    - GET /api/reports/pivot/?group_by=category&measure=net|income|expense|count&fmt=json|csv
+      Сводная таблица «месяц × разрез» (dds.analytics, NumPy).
+    - GET /api/reports/forecast/?group_by=category&method=moving_average|seasonal&months=6&horizon=3&fmt=json|csv
+      Прогноз по каждому значению разреза на horizon месяцев по последним months месяцам.
+    Условные GET — по версиям агрегата (меняется при любом изменении записей), закрытых периодов и словарей.
+    """
+    queryset = OperationDailyRollup.objects.all()
+    conditional_actions = ('cashflow', 'balance', 'pivot', 'forecast')
+    version_models = [OperationDailyRollup, ClosedPeriod, OperationStatus, OperationType, Category, Subcategory]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = RollupFilter
+    pagination_class = None
+
+    @action(detail=False, methods=['get'])
+    def cashflow(self, request):
+        if wants_background(request):
+            return enqueue(request, Job.CASHFLOW, job_params(request), validate_cashflow)
+        try:
+            period, group_by = parse_cashflow_params(request.query_params)
+        except DjangoValidationError as exc:
+            raise ValidationError(exc.message_dict)
+
+        results = cashflow_report(self.filter_queryset(self.get_queryset()), period, group_by)
+        return Response({
+            'period': period,
+            'group_by': group_by,
+            'totals': report_totals(results),
+            'results': results,
+        })
+
+    @action(detail=False, methods=['get'])
+    def balance(self, request):
+        params = BalanceQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        opening, results = running_balance(**params.validated_data)
+        return Response({
+            'period': params.validated_data['period'],
+            'opening_balance': opening,
+            'results': results,
+        })
+
+    @action(detail=False, methods=['get'])
+    def pivot(self, request):
+        params = PivotQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        options = dict(params.validated_data)
+        fmt = options.pop('fmt')
+        report = pivot_report(self.filter_queryset(self.get_queryset()), **options)
+        return self.analytics_response(report, fmt, 'pivot')
+
+    @action(detail=False, methods=['get'])
+    def forecast(self, request):
+        params = ForecastQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        options = dict(params.validated_data)
+        fmt = options.pop('fmt')
+        try:
+            report = forecast_report(self.filter_queryset(self.get_queryset()), **options)
+        except DjangoValidationError as exc:
+            raise ValidationError(exc.message_dict)
+        return self.analytics_response(report, fmt, 'forecast')
+
+    def analytics_response(self, report, fmt, name):
+        if fmt != 'csv':
+            return Response(report)
+        response = HttpResponse(to_csv(report), content_type=EXPORT_FORMATS['csv'])
+        response['Content-Disposition'] = f'attachment; filename="{name}.csv"'
+        return response
+
+
+class ClosedPeriodViewSet(ConditionalGetMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                          mixins.CreateModelMixin, mixins.DestroyModelMixin,
+                          viewsets.GenericViewSet):
+    """
+    Закрытые периоды (месяцы).
+    - POST {"month": "YYYY-MM-01"} — закрыть следующий по порядку месяц и сохранить остатки;
+    - DELETE /api/periods/{id}/ — открыть обратно последний закрытый месяц.
+    Записи закрытых месяцев нельзя создавать, изменять и удалять.
+    """
+    queryset = ClosedPeriod.objects.prefetch_related('snapshots')
+    # Снимки остатков создаются и удаляются вместе с периодом — достаточно его версии
+    version_models = [ClosedPeriod]
+    serializer_class = ClosedPeriodSerializer
+
+    def perform_destroy(self, instance):
+        try:
+            reopen_period(instance)
+        except DjangoValidationError as exc:
+            raise ValidationError(exc.message_dict)
+
+
+class RecurringOperationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    """
+    Шаблоны регулярных записей (dds.recurring): аренда, зарплаты, счета.
+    - CRUD; шаблон, по которому уже созданы записи, не удаляется — выключите его (is_active, end_date);
+    - POST /api/recurring/materialize/ {"date_from", "date_to", "ids", "dry_run"} — создать записи
+      всех действующих шаблонов (или ids) за период одним пакетом; повторный вызов дублей не создает.
+    Фильтры списка: ?is_active=, ?schedule=, ?status=, ?type=, ?category=; поиск по name.
+    """
+    queryset = RecurringOperation.objects.all()
+    version_models = [RecurringOperation, OperationStatus, OperationType, Category, Subcategory]
+    serializer_class = RecurringOperationSerializer
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filterset_fields = ['is_active', 'schedule', 'status', 'type', 'category']
+    search_fields = ['name']
+
+    def perform_destroy(self, instance):
+        if instance.operations.exists():
+            raise ValidationError({'non_field_errors': 'По шаблону уже созданы записи — выключите его вместо удаления.'})
+        instance.delete()
+
+    @action(detail=False, methods=['post'])
+    def materialize(self, request):
+        """Отчет: templates, created, existing (даты уже материализованы), closed (в закрытых месяцах), errors."""
+        params = MaterializeSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        queryset = None
+        if 'ids' in params.validated_data:
+            queryset = RecurringOperation.objects.filter(pk__in=params.validated_data['ids'])
+        try:
+            report = materialize(params.validated_data.get('date_from'), params.validated_data.get('date_to'),
+                                 queryset, dry_run=params.validated_data['dry_run'])
+        except DjangoValidationError as exc:
+            raise ValidationError(exc.message_dict)
+        created = report.created and not report.dry_run
+        return Response(report.as_dict(), status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+class JobViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin,
+                 viewsets.GenericViewSet):
+    """
+    Фоновые задачи (dds.jobs). Ставятся параметром ?background=1 у выгрузки, импорта и отчета ДДС.
+    - GET /api/jobs/{id}/ — состояние и прогресс (progress из total), summary и error по завершении;
+    - GET /api/jobs/{id}/download/ — файл результата (выгрузка, отчет импорта, отчет ДДС);
+    - DELETE /api/jobs/{id}/ — удалить задачу с файлами (кроме выполняющейся).
+    Фильтры списка: ?kind=, ?status=.
+    """
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['kind', 'status']
+
+    def perform_destroy(self, instance):
+        if instance.status == Job.RUNNING:
+            raise ValidationError({'status': 'Задача выполняется — удалить ее можно после завершения.'})
+        files = [f for f in (instance.source, instance.result) if f]
+        instance.delete()
+        # Файлы — только если удаление строки закоммичено
+        transaction.on_commit(lambda: [f.storage.delete(f.name) for f in files])
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != Job.DONE or not job.result:
+            raise NotFound('Результат еще не готов.')
+        content_type = (job.summary or {}).get('content_type')
+        return FileResponse(job.result.open('rb'), as_attachment=True,
+                            filename=os.path.basename(job.result.name), content_type=content_type)
@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class DdsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dds'
+
+    def ready(self):
+        # Подключаем обработчики сигналов (дневной агрегат ДДС и т.п.)
+        from . import signals  # noqa: F401
+        from .constraints import ensure_sqlite_triggers
+        from .db_pool import pool_collector
+        from .metrics import REGISTRY, install_query_recorder
+
+        # Учет SQL по запросам (dds.middleware.PerformanceMiddleware) на всех соединениях
+        connection_created.connect(install_query_recorder, dispatch_uid='dds_query_recorder')
+        # Триггеры целостности записей в SQLite (в Postgres — составные FK, см. dds.constraints)
+        post_migrate.connect(ensure_sqlite_triggers, sender=self, dispatch_uid='dds_sqlite_triggers')
+        # Счетчики пулов соединений (DDS_DB_POOL) на /metrics
+        REGISTRY.register_collector(pool_collector)
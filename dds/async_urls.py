@@ -0,0 +1,15 @@
+from django.urls import path
+
+from . import async_views
+
+# Асинхронный путь чтения (ASGI) — /api/async/..., те же ответы, что у /api/... (см. dds.async_views)
+urlpatterns = [
+    path('operations/', async_views.operation_list, name='async-operation-list'),
+    path('operations/<int:pk>/', async_views.operation_detail, name='async-operation-detail'),
+    path('statuses/', async_views.status_list, name='async-operationstatus-list'),
+    path('types/', async_views.type_list, name='async-operationtype-list'),
+    path('categories/', async_views.category_list, name='async-category-list'),
+    path('subcategories/', async_views.subcategory_list, name='async-subcategory-list'),
+    path('reports/cashflow/', async_views.cashflow, name='async-report-cashflow'),
+    path('reports/balance/', async_views.balance, name='async-report-balance'),
+]
@@ -0,0 +1,187 @@
+"""
+Асинхронный путь чтения API (ASGI): список и карточка записей, справочники и отчеты — /api/async/...
+Ответы совпадают с синхронными эндпоинтами /api/... (тот же формат страниц, сериализаторы и фильтры),
+но запросы к БД выполняются через async ORM (acount, aget, aiterator) и не занимают воркер на время ожидания.
+
+Ограничения:
+  - только чтение (GET); изменение данных — через синхронный API;
+  - без условных GET (ETag) и BrowsableAPI — ответ всегда JSON;
+  - у записей — только постраничная пагинация (?page=N) и полное представление (без ?expand=).
+
+Django пока выполняет сами запросы async ORM в отдельном потоке (sync_to_async), поэтому выигрыш —
+в числе одновременных соединений на воркер под ASGI (uvicorn), а не во времени отдельного запроса.
+ATOMIC_REQUESTS для async-представлений недоступен — они помечены non_atomic_requests (только чтение).
+"""
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .filters import OperationFilter, RollupFilter
+from .models import OperationStatus, OperationType, Category, Subcategory, Operation, OperationDailyRollup
+from .periods import running_balance
+from .renderers import JSONRenderer
+from .reports import cashflow_rows, format_cashflow, parse_cashflow_params, report_totals
+from .search import OperationSearchFilter, RELEVANCE, search_operations
+from .serializers import (
+    OperationStatusSerializer, OperationTypeSerializer, CategorySerializer, SubcategorySerializer,
+    OperationSerializer, BalanceQuerySerializer,
+)
+from .taxonomy import get_taxonomy
+
+
+def read_only(view):
+    """Async-представление только для GET, вне транзакции запроса (см. docstring модуля)."""
+    return transaction.non_atomic_requests(require_GET(view))
+
+
+def json_response(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status)
+
+
+async def serialize(serializer_class, data, request, many=False):
+    """
+    Сериализация без обращений к БД: снимок справочников (dds.taxonomy) читается заранее в потоке
+    и кладется в корневой сериализатор — поля берут его оттуда (см. dds.fields.root_taxonomy).
+    """
+    serializer = serializer_class(data, many=many, context={'request': request})
+    serializer._taxonomy = await sync_to_async(get_taxonomy)()
+    return serializer.data
+
+
+async def paginate(request, queryset, serializer_class):
+    """Страница ?page=N в формате PageNumberPagination DRF (count, next, previous, results) или 404."""
+    page_size = api_settings.PAGE_SIZE
+    try:
+        page = int(request.GET.get('page', 1))
+        if page < 1:
+            raise ValueError(page)
+    except ValueError:
+        return json_response({'detail': 'Неверная страница.'}, status=404)
+
+    count = await queryset.acount()
+    offset = (page - 1) * page_size
+    if offset and offset >= count:
+        return json_response({'detail': 'Неверная страница.'}, status=404)
+    rows = [obj async for obj in queryset[offset:offset + page_size].aiterator()]
+
+    url = request.build_absolute_uri()
+    previous = None
+    if page > 1:
+        previous = remove_query_param(url, 'page') if page == 2 else replace_query_param(url, 'page', page - 1)
+    return json_response({
+        'count': count,
+        'next': replace_query_param(url, 'page', page + 1) if offset + page_size < count else None,
+        'previous': previous,
+        'results': await serialize(serializer_class, rows, request, many=True),
+    })
+
+
+async def filter_or_errors(filterset):
+    """Валидация FilterSet (ModelChoiceFilter проверяет id запросом к БД) -> (queryset, None) или (None, ответ 400)."""
+    if not await sync_to_async(filterset.is_valid)():
+        return None, json_response(filterset.errors, status=400)
+    return filterset.qs, None
+
+
+def search_by_name(request, queryset):
+    """?search= по name — как filters.SearchFilter у справочников (все слова, icontains)."""
+    for term in request.GET.get('search', '').replace(',', ' ').split():
+        queryset = queryset.filter(Q(name__icontains=term))
+    return queryset
+
+
+def filter_by_id(request, queryset, param):
+    """?type= / ?category= — фильтр по id родителя; нечисловое значение — пустой результат, как у filterset_fields."""
+    value = request.GET.get(param)
+    if not value:
+        return queryset
+    if not value.isdigit():
+        return queryset.none()
+    return queryset.filter(**{f'{param}_id': int(value)})
+
+
+@read_only
+async def operation_list(request):
+    """GET /api/async/operations/ — фильтры OperationFilter, ?search=, ?ordering=relevance, ?page=N."""
+    queryset = Operation.objects.select_related('status', 'type', 'category__type', 'subcategory__category__type')
+    queryset, errors = await filter_or_errors(OperationFilter(request.GET, queryset=queryset))
+    if errors is not None:
+        return errors
+    text = request.GET.get('search', '').replace(',', ' ')
+    if text.strip():
+        by_relevance = request.GET.get(OperationSearchFilter.ordering_param) == RELEVANCE
+        queryset = search_operations(queryset, text, rank=by_relevance)
+        if by_relevance and 'rank' in queryset.query.annotations:
+            queryset = queryset.order_by('-rank', '-date', '-id')
+    return await paginate(request, queryset, OperationSerializer)
+
+
+@read_only
+async def operation_detail(request, pk):
+    queryset = Operation.objects.select_related('status', 'type', 'category__type', 'subcategory__category__type')
+    try:
+        operation = await queryset.aget(pk=pk)
+    except Operation.DoesNotExist:
+        return json_response({'detail': 'Не найдено.'}, status=404)
+    return json_response(await serialize(OperationSerializer, operation, request))
+
+
+@read_only
+async def status_list(request):
+    return await paginate(request, search_by_name(request, OperationStatus.objects.all()), OperationStatusSerializer)
+
+
+@read_only
+async def type_list(request):
+    return await paginate(request, search_by_name(request, OperationType.objects.all()), OperationTypeSerializer)
+
+
+@read_only
+async def category_list(request):
+    queryset = filter_by_id(request, Category.objects.select_related('type'), 'type')
+    return await paginate(request, search_by_name(request, queryset), CategorySerializer)
+
+
+@read_only
+async def subcategory_list(request):
+    queryset = filter_by_id(request, Subcategory.objects.select_related('category', 'category__type'), 'category')
+    return await paginate(request, search_by_name(request, queryset), SubcategorySerializer)
+
+
+@read_only
+async def cashflow(request):
+    """GET /api/async/reports/cashflow/ — как /api/reports/cashflow/ (GROUP BY по дневному агрегату)."""
+    try:
+        period, group_by = parse_cashflow_params(request.GET)
+    except DjangoValidationError as exc:
+        return json_response(exc.message_dict, status=400)
+    queryset, errors = await filter_or_errors(RollupFilter(request.GET, queryset=OperationDailyRollup.objects.all()))
+    if errors is not None:
+        return errors
+    rows = [row async for row in cashflow_rows(queryset, period, group_by).aiterator()]
+    results = format_cashflow(rows, group_by)
+    return json_response({
+        'period': period,
+        'group_by': group_by,
+        'totals': report_totals(results),
+        'results': results,
+    })
+
+
+@read_only
+async def balance(request):
+    """GET /api/async/reports/balance/ — как /api/reports/balance/ (снимок + накопленный поток — несколько запросов в потоке)."""
+    params = BalanceQuerySerializer(data=request.GET)
+    if not await sync_to_async(params.is_valid)():
+        return json_response(params.errors, status=400)
+    opening, results = await sync_to_async(running_balance)(**params.validated_data)
+    return json_response({
+        'period': params.validated_data['period'],
+        'opening_balance': opening,
+        'results': results,
+    })
@@ -0,0 +1,456 @@
+import json
+import math
+import platform
+import re
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from urllib.parse import urlencode, urljoin
+from urllib.request import urlopen
+
+import django
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .filters import OperationFilter
+from .models import Operation
+
+# Сочетания фильтров списка записей: (название, поля образца, с периодом ли)
+FILTER_CASES = [
+    ('без фильтров', (), False),
+    ('период', (), True),
+    ('статус', ('status',), False),
+    ('статус + период', ('status',), True),
+    ('тип + период', ('type',), True),
+    ('категория + период', ('category',), True),
+    ('подкатегория + период', ('subcategory',), True),
+    ('тип + категория + период', ('type', 'category'), True),
+]
+
+# Полный просмотр таблицы записей в плане запроса (по СУБД)
+FULL_SCAN_PATTERNS = {
+    'postgresql': re.compile(rf'Seq Scan on {Operation._meta.db_table}\b'),
+    'sqlite': re.compile(rf'\bSCAN (TABLE )?{Operation._meta.db_table}\b(?! USING)'),
+}
+SORT_PATTERNS = {
+    'postgresql': re.compile(r'^\s*(->\s*)?(Incremental )?Sort\b', re.MULTILINE),
+    'sqlite': re.compile(r'USE TEMP B-TREE FOR ORDER BY'),
+}
+
+
+def filter_params(period_days=30):
+    """
+    Параметры OperationFilter для каждого сочетания из FILTER_CASES.
+    Значения берутся из самой свежей записи — фильтр всегда что-то находит.
+    """
+    sample = Operation.objects.order_by('-date', '-id').values(
+        'date', 'status', 'type', 'category', 'subcategory'
+    ).first()
+    if sample is None:
+        return []
+    cases = []
+    for name, fields, with_period in FILTER_CASES:
+        params = {field: sample[field] for field in fields}
+        if with_period:
+            params['date_from'] = (sample['date'] - timedelta(days=period_days)).isoformat()
+            params['date_to'] = sample['date'].isoformat()
+        cases.append((name, params))
+    return cases
+
+
+def filtered_queryset(params):
+    return OperationFilter(params, queryset=Operation.objects.all()).qs
+
+
+def plan_flags(plan):
+    """(полный просмотр таблицы, сортировка выборки) по тексту плана; None — СУБД не распознана."""
+    full_scan = FULL_SCAN_PATTERNS.get(connection.vendor)
+    sort = SORT_PATTERNS.get(connection.vendor)
+    return (
+        bool(full_scan.search(plan)) if full_scan else None,
+        bool(sort.search(plan)) if sort else None,
+    )
+
+
+def _timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def bench_filters(page_size=50, repeat=5, period_days=30):
+    """
+    Для каждого сочетания фильтров: план первой страницы списка и латентность
+    страницы и COUNT (как в пагинации), мс — медиана и максимум из repeat прогонов.
+    """
+    results = []
+    for name, params in filter_params(period_days):
+        queryset = filtered_queryset(params)
+        page = queryset[:page_size]
+        plan = page.explain()
+        full_scan, sort = plan_flags(plan)
+        page_ms = _timed(lambda: list(page.all()), repeat)  # all() — без кеша результатов
+        count_ms = _timed(queryset.count, repeat)
+        results.append({
+            'case': name,
+            'params': params,
+            'plan': plan,
+            'full_scan': full_scan,
+            'sort': sort,
+            'page_ms': statistics.median(page_ms),
+            'page_max_ms': max(page_ms),
+            'count_ms': statistics.median(count_ms),
+        })
+    return results
+
+
+def percentile(values, p):
+    """Перцентиль p (0–100) по методу ближайшего ранга."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def api_scenarios(target_id):
+    """
+    Сценарии бенчмарка API: [(название, метод, url, тело)].
+    Параметры фильтров берутся из данных (см. filter_params); target_id — запись для PATCH.
+    """
+    cases = dict(filter_params())
+    sample = Operation.objects.filter(pk=target_id).values(
+        'status_id', 'type_id', 'category_id', 'subcategory_id'
+    ).get()
+    payload = {
+        'date': timezone.localdate().isoformat(), 'amount': '100.00', 'comment': 'Бенчмарк',
+        **{field: sample[field] for field in ('status_id', 'type_id', 'category_id', 'subcategory_id')},
+    }
+    scenarios = [
+        ('operations: список', 'get', '/api/operations/', None),
+        ('operations: компактный список', 'get', '/api/operations/?expand=', None),
+        ('operations: keyset', 'get', '/api/operations/?pagination=cursor', None),
+        ('operations: поиск', 'get', '/api/operations/?' + urlencode({'search': 'Оплата'}), None),
+        ('operations: карточка', 'get', f'/api/operations/{target_id}/', None),
+        ('operations: создание', 'post', '/api/operations/', payload),
+        ('operations: изменение', 'patch', f'/api/operations/{target_id}/', {'comment': 'Бенчмарк, правка'}),
+        ('statuses', 'get', '/api/statuses/', None),
+        ('types', 'get', '/api/types/', None),
+        ('categories', 'get', '/api/categories/', None),
+        ('subcategories', 'get', '/api/subcategories/', None),
+        ('taxonomy', 'get', '/api/taxonomy/', None),
+    ]
+    # Фильтры — сразу после списков
+    scenarios[3:3] = [
+        (f'operations: {name}', 'get', '/api/operations/?' + urlencode(cases[name]), None)
+        for name in ('период', 'тип + период', 'категория + период')
+        if name in cases
+    ]
+    return scenarios
+
+
+def _request(client, method, url, data):
+    if data is None:
+        return getattr(client, method)(url)
+    return getattr(client, method)(url, json.dumps(data), content_type='application/json')
+
+
+def bench_scenario(client, method, url, data, iterations=50, warmup=5):
+    """
+    Латентность (мс: p50/p90/p95/p99/max) — iterations прогонов после warmup;
+    число SQL-запросов и пик выделенной памяти (tracemalloc, КБ) — отдельным прогоном,
+    чтобы трассировка не искажала время.
+    """
+    for _ in range(warmup):
+        _request(client, method, url, data)
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        response = _request(client, method, url, data)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as ctx:
+            _request(client, method, url, data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    queries = [q['sql'] for q in ctx.captured_queries]
+    return {
+        'status': response.status_code,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p90_ms': round(percentile(timings, 90), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'max_ms': round(max(timings), 3),
+        # Служебные SAVEPOINT/RELEASE (ATOMIC_REQUESTS) не считаем
+        'queries': sum(1 for sql in queries if not sql.startswith(('SAVEPOINT', 'RELEASE', 'ROLLBACK'))),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def bench_host():
+    """Host для тестового клиента, проходящий ALLOWED_HOSTS."""
+    for host in settings.ALLOWED_HOSTS:
+        if host and host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+def bench_api(iterations=50, warmup=5, only=None, keep=False):
+    """
+    Прогон сценариев api_scenarios() через тестовый клиент Django (полный стек: middleware, DRF, БД).
+    Все изменения данных по умолчанию откатываются. Возвращает словарь для JSON-отчета.
+    """
+    client = Client(HTTP_HOST=bench_host())
+    results = {}
+    with transaction.atomic():
+        sample = Operation.objects.order_by('-date', '-id').first()
+        if sample is None:
+            raise ValueError('Нет записей для бенчмарка.')
+        # Отдельная запись в открытом периоде — цель PATCH (откатывается вместе со всем прогоном)
+        target = Operation.objects.create(
+            date=timezone.localdate(), status_id=sample.status_id, type_id=sample.type_id,
+            category_id=sample.category_id, subcategory_id=sample.subcategory_id, amount=Decimal('1.00'),
+        )
+        for name, method, url, data in api_scenarios(target.pk):
+            if only and not any(part in name for part in only):
+                continue
+            results[name] = {'method': method.upper(), 'url': url,
+                             **bench_scenario(client, method, url, data, iterations, warmup)}
+        if not keep:
+            transaction.set_rollback(True)
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'vendor': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'operations': Operation.objects.count(),
+            'iterations': iterations,
+        },
+        'scenarios': results,
+    }
+
+
+def compare_results(current, baseline, tolerance=0.2, min_delta_ms=1.0):
+    """
+    Регрессии относительно сохраненного отчета: p95 и пик памяти выросли больше чем на tolerance
+    (для времени — и больше чем на min_delta_ms), число запросов выросло, сценарий перестал отвечать 2xx.
+    Возвращает список строк-описаний; пустой — регрессий нет.
+    """
+    problems = []
+    for name, now in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if before is None:
+            continue
+        if now['status'] >= 400 > before['status']:
+            problems.append(f'{name}: статус {before["status"]} -> {now["status"]}')
+        if now['p95_ms'] > before['p95_ms'] * (1 + tolerance) and now['p95_ms'] - before['p95_ms'] > min_delta_ms:
+            problems.append(f'{name}: p95 {before["p95_ms"]} -> {now["p95_ms"]} мс')
+        if now['queries'] > before['queries']:
+            problems.append(f'{name}: запросов {before["queries"]} -> {now["queries"]}')
+        if now['peak_kb'] > before['peak_kb'] * (1 + tolerance):
+            problems.append(f'{name}: память {before["peak_kb"]} -> {now["peak_kb"]} КБ')
+    return problems
+
+
+# Пути нагрузочного теста относительно базового URL API (/api/ — WSGI, /api/async/ — async-эндпоинты под ASGI)
+LOAD_PATHS = [
+    'operations/',
+    'operations/?page=3',
+    'statuses/',
+    'categories/',
+    'reports/cashflow/?period=month&group_by=category',
+]
+
+
+def _fetch(url, timeout):
+    """(секунды, ok) одного GET; ошибки соединения и статусы >= 400 — не ok."""
+    started = time.perf_counter()
+    try:
+        with urlopen(url, timeout=timeout) as response:
+            response.read()
+            ok = response.status < 400
+    except OSError:  # URLError/HTTPError, таймауты, сброс соединения
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def load_test(base_url, paths=None, concurrency=20, requests=200, timeout=30):
+    """
+    Нагрузочный тест живого сервера: по каждому пути requests GET-запросов, из них concurrency
+    одновременно (пул потоков). Запускается против WSGI- и ASGI-сервера с одними и теми же данными,
+    чтобы сравнить пропускную способность при одинаковом числе одновременных клиентов.
+    Возвращает {путь: {rps, p50_ms, p95_ms, p99_ms, errors}}.
+    """
+    results = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for path in paths or LOAD_PATHS:
+            url = urljoin(base_url, path)
+            started = time.perf_counter()
+            samples = list(pool.map(lambda _: _fetch(url, timeout), range(requests)))
+            elapsed = time.perf_counter() - started
+            latencies = [seconds * 1000 for seconds, ok in samples if ok]
+            results[path] = {
+                'rps': round(len(latencies) / elapsed, 1),
+                'p50_ms': _round(percentile(latencies, 50)),
+                'p95_ms': _round(percentile(latencies, 95)),
+                'p99_ms': _round(percentile(latencies, 99)),
+                'errors': len(samples) - len(latencies),
+            }
+    return results
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+def capture_hot_queries():
+    """
+    SQL и параметры горячих запросов API записей — как их выполняет приложение: список (первая страница
+    с фильтром по периоду, с COUNT и валидаторами условного GET) и карточка. [(сценарий, sql, params)].
+    """
+    sample = Operation.objects.order_by('-date', '-id').values('id', 'date').first()
+    if sample is None:
+        raise ValueError('Нет записей для бенчмарка.')
+    period = {'date_from': (sample['date'] - timedelta(days=30)).isoformat(), 'date_to': sample['date'].isoformat()}
+    urls = [
+        ('список', '/api/operations/?' + urlencode(period)),
+        ('карточка', f'/api/operations/{sample["id"]}/'),
+    ]
+    client = Client(HTTP_HOST=bench_host())
+    captured = []
+
+    def capture(execute, sql, params, many, context):
+        if not sql.startswith(('SAVEPOINT', 'RELEASE', 'ROLLBACK')):
+            captured.append((scenario, sql, tuple(params or ())))
+        return execute(sql, params, many, context)
+
+    for scenario, url in urls:
+        client.get(url)  # прогрев: снимок справочников и т.п. — не горячие запросы
+        with connection.execute_wrapper(capture):
+            client.get(url)
+    return captured
+
+
+def _connect_kwargs(**extra):
+    """Параметры psycopg.connect() соединения default (без курсора Django)."""
+    params = connection.get_connection_params()
+    params.pop('cursor_factory', None)
+    params.pop('prepare_threshold', None)
+    return {**params, 'autocommit': True, **extra}
+
+
+def _prepare_sql(sql):
+    """SQL Django (%s) -> текст для PREPARE ($1, $2, ...)."""
+    parts = sql.split('%s')
+    return ''.join(part + (f'${i}' if i < len(parts) else '') for i, part in enumerate(parts, 1)).replace('%%', '%')
+
+
+def planning_times(queries, repeat=5):
+    """
+    Время планирования горячих запросов, мс (медиана EXPLAIN ANALYZE): обычный запрос — план строится
+    при каждом выполнении; подготовленный (PREPARE, 6 выполнений — после них PostgreSQL может перейти
+    на общий план) — то, что остается на каждое выполнение.
+    """
+    import psycopg
+
+    def planning(cursor, sql, params):
+        cursor.execute(f'EXPLAIN (ANALYZE, FORMAT JSON) {sql}', params)
+        return cursor.fetchone()[0][0]['Planning Time']
+
+    results = []
+    with psycopg.connect(**_connect_kwargs(cursor_factory=psycopg.ClientCursor)) as conn, conn.cursor() as cursor:
+        for scenario, sql, params in queries:
+            plain = [planning(cursor, sql, params) for _ in range(repeat)]
+            cursor.execute(f'PREPARE dds_bench AS {_prepare_sql(sql)}')
+            try:
+                execute = 'EXECUTE dds_bench' + (f'({", ".join(["%s"] * len(params))})' if params else '')
+                for _ in range(6):
+                    cursor.execute(execute, params)
+                prepared = [planning(cursor, execute, params) for _ in range(repeat)]
+            finally:
+                cursor.execute('DEALLOCATE dds_bench')
+            results.append({
+                'scenario': scenario,
+                'sql': sql,
+                'plan_ms': round(statistics.median(plain), 3),
+                'prepared_plan_ms': round(statistics.median(prepared), 3),
+            })
+    return results
+
+
+def bench_connections(concurrency=10, requests=500, prepare_threshold=0):
+    """
+    Соединения и подготовленные выражения под параллельной нагрузкой (только PostgreSQL, нужен psycopg_pool).
+    «Запрос» — горячие SQL списка и карточки (capture_hot_queries) на одном соединении; concurrency потоков.
+    Режимы: новое соединение на запрос (как без пула и CONN_MAX_AGE), пул, пул + подготовленные выражения.
+    По каждому: rps, перцентили всего запроса, получения соединения и SQL (мс), статистика пула.
+    """
+    import psycopg
+    from psycopg_pool import ConnectionPool
+
+    queries = capture_hot_queries()
+
+    def run_queries(conn):
+        with conn.cursor() as cursor:
+            for _, sql, params in queries:
+                cursor.execute(sql, params)
+                if cursor.description is not None:
+                    cursor.fetchall()
+
+    def measure(acquire):
+        def one(_):
+            started = time.perf_counter()
+            with acquire() as conn:
+                acquired = time.perf_counter()
+                run_queries(conn)
+            finished = time.perf_counter()
+            return (finished - started) * 1000, (acquired - started) * 1000, (finished - acquired) * 1000
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(one, range(concurrency)))  # прогрев: соединения пула, подготовка выражений
+            started = time.perf_counter()
+            samples = list(executor.map(one, range(requests)))
+            elapsed = time.perf_counter() - started
+        row = {'rps': round(requests / elapsed, 1)}
+        for index, name in enumerate(('total', 'connect', 'sql')):
+            values = [sample[index] for sample in samples]
+            row[f'{name}_p50_ms'] = _round(percentile(values, 50))
+            row[f'{name}_p95_ms'] = _round(percentile(values, 95))
+        return row
+
+    modes = {}
+    modes['без пула'] = measure(lambda: psycopg.connect(**_connect_kwargs(cursor_factory=psycopg.ClientCursor)))
+    for name, extra in (
+        ('пул', {'cursor_factory': psycopg.ClientCursor}),
+        ('пул + prepared', {'cursor_factory': psycopg.Cursor, 'prepare_threshold': prepare_threshold}),
+    ):
+        with ConnectionPool(kwargs=_connect_kwargs(**extra), min_size=concurrency, max_size=concurrency,
+                            check=ConnectionPool.check_connection, open=True) as pool:
+            pool.wait()
+            modes[name] = {**measure(pool.connection), 'pool': pool.get_stats()}
+
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'server_version': connection.pg_version,
+            'operations': Operation.objects.count(),
+            'concurrency': concurrency,
+            'requests': requests,
+            'statements': len(queries),
+        },
+        'modes': modes,
+        'planning': planning_times(queries),
+    }
@@ -0,0 +1,148 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .changes import record_deletions
+from .constraints import OPERATION_ERRORS, constraint_errors
+from .filters import OperationFilter
+from .models import Operation
+from .periods import check_open
+from .rollups import KEY_FIELDS, RollupDelta, bucket_key
+from .search import search_operations
+from .taxonomy import bump_operations_version, pinned
+
+# Изменяемые ссылки: (ключ в теле запроса, раздел снимка dds.taxonomy)
+REFERENCE_FIELDS = [
+    ('status_id', 'statuses'),
+    ('type_id', 'types'),
+    ('category_id', 'categories'),
+    ('subcategory_id', 'subcategories'),
+]
+
+# Верхняя граница числа записей за один запрос: id выбранных строк блокируются и передаются списком
+MAX_ROWS = 20000
+
+
+def select_operations(ids=None, filters=None):
+    """
+    Выборка для пакетного изменения: по списку id или по фильтрам списка записей
+    (OperationFilter и search). Пустой фильтр не допускается — он означал бы «все записи».
+    """
+    if ids is not None:
+        return Operation.objects.filter(pk__in=ids)
+    known = set(OperationFilter.base_filters) | {'search'}
+    if not any(filters.get(name) not in ('', None) for name in known):
+        raise ValidationError({'filter': 'Укажите хотя бы один фильтр: ' + ', '.join(sorted(known)) + '.'})
+    filterset = OperationFilter(filters, queryset=Operation.objects.all())
+    if not filterset.is_valid():
+        raise ValidationError({'filter': [f'{name}: {", ".join(errors)}' for name, errors in filterset.errors.items()]})
+    return search_operations(filterset.qs, str(filters.get('search') or ''))
+
+
+def resolve_changes(changes, taxonomy):
+    """
+    Новые значения полей (OperationBulkChangesSerializer) -> аргументы UPDATE (attname-ы).
+    Ссылки проверяются по снимку справочников; недостающие звенья цепочки выводятся из нижних
+    (подкатегория -> категория -> тип), после чего комбинация один раз проверяется правилами
+    Operation.clean() — сразу для всех строк.
+    """
+    values = {key: changes[key] for key in ('date', 'amount', 'comment') if key in changes}
+    errors = {}
+    objects = {}
+    for key, kind in REFERENCE_FIELDS:
+        if key in changes:
+            obj = taxonomy.resolve(kind, {changes[key]}).get(changes[key])
+            if obj is None:
+                errors[key] = [f'Недопустимый первичный ключ "{changes[key]}" - объект не существует.']
+            objects[key] = obj
+    if errors:
+        raise ValidationError(errors)
+
+    if 'type_id' in objects and 'category_id' not in objects:
+        raise ValidationError({'category_id': 'При смене типа укажите категорию и подкатегорию.'})
+    if 'category_id' in objects and 'subcategory_id' not in objects:
+        raise ValidationError({'subcategory_id': 'При смене категории укажите подкатегорию.'})
+    if 'subcategory_id' in objects and 'category_id' not in objects:
+        category_id = objects['subcategory_id'].category_id
+        objects['category_id'] = taxonomy.resolve('categories', {category_id})[category_id]
+    if 'category_id' in objects and 'type_id' not in objects:
+        type_id = objects['category_id'].type_id
+        objects['type_id'] = taxonomy.resolve('types', {type_id})[type_id]
+    values.update({key: obj.pk for key, obj in objects.items()})
+
+    # Типы и формат значений уже проверил OperationBulkChangesSerializer; здесь — бизнес-правила
+    tmp = Operation(**values)
+    if 'amount' in values:
+        tmp.clean()
+    else:
+        tmp.clean_relations()
+    return values
+
+
+def _lock(queryset):
+    """Заблокировать выбранные строки (SELECT ... FOR UPDATE) и вернуть их id — дальше работаем по ним."""
+    ids = list(queryset.select_for_update().order_by('pk').values_list('pk', flat=True)[:MAX_ROWS + 1])
+    if len(ids) > MAX_ROWS:
+        raise ValidationError({'filter': f'Выбрано больше {MAX_ROWS} записей — сузьте выборку.'})
+    return ids
+
+
+def _buckets(rows):
+    """Корзины дневного агрегата, затронутые выборкой: [(ключ, сумма, количество)] — один GROUP BY."""
+    grouped = rows.order_by().values(*KEY_FIELDS).annotate(total=Sum('amount'), count=Count('id'))
+    return [(bucket_key(row), row['total'], row['count']) for row in grouped]
+
+
+def bulk_update_operations(queryset, changes):
+    """
+    Изменить выбранные записи одним UPDATE: одинаковые новые значения полей (changes — ключи
+    date, status_id, type_id, category_id, subcategory_id, amount, comment), updated_at = сейчас.
+    Дневной агрегат переносится по корзинам (одно изменение на корзину, а не на запись),
+    закрытые периоды проверяются и для старых дат, и для новой. Возвращает число измененных записей.
+    """
+    with transaction.atomic(), pinned() as taxonomy:
+        values = resolve_changes(changes, taxonomy)
+        rows = Operation.objects.filter(pk__in=_lock(queryset))
+        buckets = _buckets(rows)
+        if not buckets:
+            return 0
+        check_open(values.get('date'), min(key[0] for key, _, _ in buckets), closed=taxonomy.closed_through)
+
+        with constraint_errors(OPERATION_ERRORS):
+            updated = rows.update(updated_at=timezone.now(), **values)
+
+        delta = RollupDelta()
+        for key, total, count in buckets:
+            delta.subtract(key, total, count)
+            new_key = tuple(values.get(field, old) for field, old in zip(KEY_FIELDS, key))
+            delta.add(new_key, values['amount'] * count if 'amount' in values else total, count)
+        delta.apply()
+        bump_operations_version()
+    return updated
+
+
+def bulk_delete_operations(queryset):
+    """
+    Удалить выбранные записи одним DELETE (без загрузки объектов и сигналов на каждую строку);
+    дневной агрегат уменьшается по корзинам, id пишутся в журнал удалений (dds.changes).
+    Возвращает число удаленных записей.
+    """
+    with transaction.atomic(), pinned() as taxonomy:
+        ids = _lock(queryset)
+        rows = Operation.objects.filter(pk__in=ids)
+        buckets = _buckets(rows)
+        if not buckets:
+            return 0
+        check_open(min(key[0] for key, _, _ in buckets), closed=taxonomy.closed_through)
+
+        # QuerySet.delete() при подписанных на post_delete обработчиках грузит и удаляет записи по одной
+        deleted = rows._raw_delete(rows.db)
+        record_deletions(ids)
+
+        delta = RollupDelta()
+        for key, total, count in buckets:
+            delta.subtract(key, total, count)
+        delta.apply()
+        bump_operations_version()
+    return deleted
@@ -0,0 +1,151 @@
+"""
+Лента изменений записей ДДС для инкрементальной синхронизации (GET /api/operations/changes/).
+
+Клиент хранит курсор и запрашивает только то, что изменилось после него: созданные/измененные записи
+(по updated_at) и удаления (журнал OperationTombstone) в общем порядке по ключу (момент, id).
+Обе выборки — диапазонные чтения по индексам (updated_at, id) и (deleted_at, operation_id).
+
+  - Горизонт ленты: updated_at выставляется до коммита, и запись из еще не закоммиченной транзакции
+    иначе могла бы оказаться позади уже выданного курсора. На PostgreSQL горизонт не заходит за начало
+    самой старой открытой пишущей транзакции базы (pg_stat_activity) — длинный импорт или пакетная правка
+    задерживают ленту, а не выпадают из нее; DDS_CHANGES_SETTLE_SECONDS — запас на расхождение часов
+    приложения и БД. На других СУБД горизонт — текущий момент минус DDS_CHANGES_SETTLE_SECONDS,
+    и пишущие транзакции должны укладываться в это окно.
+  - Курсор старше DDS_TOMBSTONE_RETENTION_DAYS — 410: удаления за этот срок могли быть очищены,
+    клиенту нужна полная пересинхронизация (запрос без курсора).
+  - Лента читается с основной БД (dds.db_routers.primary): отставание реплики сдвинуло бы горизонт.
+"""
+import base64
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+
+from .db_routers import primary
+from .models import Operation, OperationTombstone
+
+
+class CursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'Курсор устарел — выполните полную синхронизацию (запрос без cursor).'
+    default_code = 'cursor_expired'
+
+
+def encode_cursor(key):
+    """Курсор: base64('момент ISO 8601|id'); пустой id — «все строго после момента»."""
+    moment, pk = key
+    raw = f'{moment.isoformat()}|{"" if pk is None else pk}'
+    return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+
+def decode_cursor(value):
+    try:
+        moment, pk = base64.urlsafe_b64decode(value.encode('ascii')).decode('ascii').split('|')
+        moment = datetime.fromisoformat(moment)
+        if timezone.is_naive(moment):
+            raise ValueError(moment)
+        return moment, int(pk) if pk else None
+    except (TypeError, ValueError, UnicodeError):
+        raise NotFound('Неверный курсор.')
+
+
+def _after(queryset, moment_field, id_field, key):
+    """Строки с ключом (moment_field, id_field) строго после key."""
+    if key is None:
+        return queryset
+    moment, pk = key
+    if pk is None:
+        return queryset.filter(**{f'{moment_field}__gt': moment})
+    # «>= момент» — диапазон по ведущей колонке индекса (порядок отдается индексом без сортировки),
+    # OR уточняет ключ внутри него; чистый OR двух условий планировщик читает двумя поисками и сортирует
+    return queryset.filter(Q(**{f'{moment_field}__gt': moment}) | Q(**{f'{id_field}__gt': pk}),
+                           **{f'{moment_field}__gte': moment})
+
+
+def changed_after(key, horizon):
+    """Записи, измененные после key и не позже horizon, по ключу (updated_at, id) — индекс dds_op_updated_id_idx."""
+    queryset = _after(Operation.objects.filter(updated_at__lte=horizon), 'updated_at', 'id', key)
+    return queryset.order_by('updated_at', 'id')
+
+
+def deleted_after(key, horizon):
+    """Удаления после key и не позже horizon, по ключу (deleted_at, operation_id)."""
+    queryset = _after(OperationTombstone.objects.filter(deleted_at__lte=horizon), 'deleted_at', 'operation_id', key)
+    return queryset.order_by('deleted_at', 'operation_id')
+
+
+def oldest_write_started(using='default'):
+    """
+    Начало самой старой открытой транзакции базы, уже получившей номер (то есть начавшей писать), кроме своей;
+    None — таких нет или СУБД не PostgreSQL. Роль приложения видит в pg_stat_activity свои же сеансы.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        # Снимок pg_stat_activity иначе держится до конца текущей транзакции (ATOMIC_REQUESTS)
+        cursor.execute('SELECT pg_stat_clear_snapshot()')
+        cursor.execute(
+            'SELECT min(xact_start) FROM pg_stat_activity '
+            'WHERE datname = current_database() AND backend_xid IS NOT NULL AND pid <> pg_backend_pid()'
+        )
+        return cursor.fetchone()[0]
+
+
+def changes_horizon(now):
+    """Момент, до которого все изменения гарантированно закоммичены (см. описание модуля)."""
+    oldest = oldest_write_started()
+    if oldest is not None:
+        now = min(now, oldest)
+    return now - timedelta(seconds=settings.DDS_CHANGES_SETTLE_SECONDS)
+
+
+def read_changes(key, limit, fields):
+    """
+    Порция ленты после ключа key ((момент, id) или None — с самого начала), не больше limit событий.
+    Возвращает (измененные записи — кортежи values_list(*fields, named=True) с updated_at и id,
+    удаления — [(id, deleted_at)], ключ следующей порции, есть ли еще события до горизонта).
+    """
+    now = timezone.now()
+    if key is not None and key[0] < now - timedelta(days=settings.DDS_TOMBSTONE_RETENTION_DAYS):
+        raise CursorExpired()
+
+    with primary():
+        horizon = changes_horizon(now)
+        changed = list(changed_after(key, horizon).values_list(*fields, named=True)[:limit + 1])
+        deleted = list(deleted_after(key, horizon).values_list('deleted_at', 'operation_id')[:limit + 1])
+
+    # Слияние двух упорядоченных выборок по общему ключу; лишнее — в следующую порцию
+    events = sorted(
+        [((row.updated_at, row.id), row) for row in changed]
+        + [((moment, pk), None) for moment, pk in deleted],
+        key=lambda event: event[0],
+    )
+    has_more = len(events) > limit
+    events = events[:limit]
+    # Все до горизонта выдано — следующий курсор с горизонта: он не устаревает, пока клиент опрашивает ленту
+    next_key = events[-1][0] if has_more else (horizon, None)
+    return (
+        [row for _, row in events if row is not None],
+        [(pk, moment) for (moment, pk), row in events if row is None],
+        next_key,
+        has_more,
+    )
+
+
+def record_deletions(ids, using=None):
+    """Записи в журнал удалений для пакетных путей, которые обходят post_delete."""
+    OperationTombstone.objects.using(using).bulk_create(
+        [OperationTombstone(operation_id=pk) for pk in ids], batch_size=1000
+    )
+
+
+def prune_tombstones(days=None):
+    """Удалить записи журнала старше срока хранения; возвращает их число."""
+    days = settings.DDS_TOMBSTONE_RETENTION_DAYS if days is None else days
+    deleted, _ = OperationTombstone.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
@@ -0,0 +1,83 @@
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .db_routers import current_replica
+from .taxonomy import table_versions, version_time
+
+
+class NotModified(Exception):
+    """Ответ 304, найденный до выполнения действия (см. ConditionalGetMixin.initial)."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    Условные GET для viewset-ов.
+    ETag и Last-Modified считаются до выполнения действия — по версиям таблиц из общего кеша
+    (dds.taxonomy.table_versions: без запросов в БД) или по get_validators() конкретного viewset-а.
+    Версия таблицы меняется при любой записи в нее, включая удаление, — Last-Modified по ней не отстает
+    от данных (в отличие от MAX(updated_at) выборки, который удаление строки не сдвигает).
+    Совпал If-None-Match / If-Modified-Since — ответ 304 без сериализации и без запроса данных.
+    Ответы 200/304 получают ETag, Last-Modified и Cache-Control (max-age — settings.DDS_API_CACHE_MAX_AGE).
+    При чтении с реплики (dds.db_routers) в окне DDS_PRIMARY_PIN_SECONDS после изменения валидаторы не выдаются.
+    """
+    conditional_actions = ('list', 'retrieve')
+    # Таблицы, от которых зависит ответ (в т.ч. вложенные словари)
+    version_models = ()
+
+    def get_version_models(self):
+        return self.version_models
+
+    def get_validators(self):
+        """(значения, от которых зависит ответ; момент последнего изменения или None)."""
+        versions = table_versions(self.get_version_models())
+        times = [version_time(token) for token in versions.values()]
+        last_modified = max(times) if times and None not in times else None
+        return sorted(versions.items()), last_modified
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.conditional_headers = None
+        if request.method not in ('GET', 'HEAD') or self.action not in self.conditional_actions:
+            return
+        state, last_modified = self.get_validators()
+        if current_replica() is not None and (
+                last_modified is None
+                or timezone.now() - last_modified < timedelta(seconds=settings.DDS_PRIMARY_PIN_SECONDS)):
+            # Данные читаются с реплики, а версии — свежие: реплика может еще не догнать изменение,
+            # и старый ответ закешировался бы под новым ETag — отдаем без валидаторов
+            return
+        # Представление зависит еще от адреса с параметрами (фильтры, страница) и формата ответа
+        digest = hashlib.blake2b(
+            repr([request.get_full_path(), request.accepted_renderer.format, state]).encode(), digest_size=16
+        )
+        etag = quote_etag(digest.hexdigest())
+        timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+        self.conditional_headers = {'ETag': etag}
+        if timestamp is not None:
+            self.conditional_headers['Last-Modified'] = http_date(timestamp)
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        headers = getattr(self, 'conditional_headers', None)
+        if headers and response.status_code in (200, 304):
+            for name, value in headers.items():
+                response[name] = value
+            patch_cache_control(response, max_age=settings.DDS_API_CACHE_MAX_AGE, must_revalidate=True)
+        return response
@@ -0,0 +1,108 @@
+from contextlib import contextmanager
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connections, transaction
+from django.db.migrations.recorder import MigrationRecorder
+
+from .models import Operation
+
+# Ограничения записи ДДС в БД (правила Operation.clean(), см. Operation.Meta и миграцию 0004)
+AMOUNT_CHECK = 'dds_op_amount_positive'
+CATEGORY_TYPE_FK = 'dds_op_category_type_fk'
+SUBCATEGORY_CATEGORY_FK = 'dds_op_subcategory_category_fk'
+
+# SQLite не умеет ALTER TABLE ADD CONSTRAINT — те же правила триггерами; текст RAISE — имя ограничения.
+# Пересоздание таблицы в миграциях SQLite удаляет ее триггеры, поэтому они восстанавливаются
+# после каждого migrate (ensure_sqlite_triggers, сигнал post_migrate). Миграции создают их по своей копии
+# (dds/migrations/_integrity_0004.py): изменение триггеров здесь — вместе с новой миграцией.
+SQLITE_TRIGGERS = {
+    'dds_op_category_type_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS dds_op_category_type_insert BEFORE INSERT ON dds_operation
+        WHEN NOT EXISTS (SELECT 1 FROM dds_category WHERE id = NEW.category_id AND type_id = NEW.type_id)
+        BEGIN SELECT RAISE(ABORT, '{CATEGORY_TYPE_FK}'); END
+    """,
+    'dds_op_category_type_update': f"""
+        CREATE TRIGGER IF NOT EXISTS dds_op_category_type_update BEFORE UPDATE OF category_id, type_id ON dds_operation
+        WHEN NOT EXISTS (SELECT 1 FROM dds_category WHERE id = NEW.category_id AND type_id = NEW.type_id)
+        BEGIN SELECT RAISE(ABORT, '{CATEGORY_TYPE_FK}'); END
+    """,
+    'dds_op_subcategory_category_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS dds_op_subcategory_category_insert BEFORE INSERT ON dds_operation
+        WHEN NOT EXISTS (SELECT 1 FROM dds_subcategory WHERE id = NEW.subcategory_id AND category_id = NEW.category_id)
+        BEGIN SELECT RAISE(ABORT, '{SUBCATEGORY_CATEGORY_FK}'); END
+    """,
+    'dds_op_subcategory_category_update': f"""
+        CREATE TRIGGER IF NOT EXISTS dds_op_subcategory_category_update
+        BEFORE UPDATE OF subcategory_id, category_id ON dds_operation
+        WHEN NOT EXISTS (SELECT 1 FROM dds_subcategory WHERE id = NEW.subcategory_id AND category_id = NEW.category_id)
+        BEGIN SELECT RAISE(ABORT, '{SUBCATEGORY_CATEGORY_FK}'); END
+    """,
+    'dds_category_type_in_use': f"""
+        CREATE TRIGGER IF NOT EXISTS dds_category_type_in_use BEFORE UPDATE OF type_id ON dds_category
+        WHEN NEW.type_id != OLD.type_id AND EXISTS (SELECT 1 FROM dds_operation WHERE category_id = OLD.id)
+        BEGIN SELECT RAISE(ABORT, '{CATEGORY_TYPE_FK}'); END
+    """,
+    'dds_subcategory_category_in_use': f"""
+        CREATE TRIGGER IF NOT EXISTS dds_subcategory_category_in_use BEFORE UPDATE OF category_id ON dds_subcategory
+        WHEN NEW.category_id != OLD.category_id AND EXISTS (SELECT 1 FROM dds_operation WHERE subcategory_id = OLD.id)
+        BEGIN SELECT RAISE(ABORT, '{SUBCATEGORY_CATEGORY_FK}'); END
+    """,
+}
+
+# Нарушение при записи ДДС -> ошибки по полям с теми же сообщениями, что у Operation.clean()
+OPERATION_ERRORS = {
+    AMOUNT_CHECK: {'amount': Operation.AMOUNT_ERROR},
+    CATEGORY_TYPE_FK: {'category': Operation.CATEGORY_ERROR},
+    SUBCATEGORY_CATEGORY_FK: {'subcategory': Operation.SUBCATEGORY_ERROR},
+}
+
+# Смена родителя у значения справочника, на которое ссылаются записи
+CATEGORY_ERRORS = {
+    CATEGORY_TYPE_FK: {'type_id': 'Тип категории нельзя изменить: по ней есть записи ДДС.'},
+}
+SUBCATEGORY_ERRORS = {
+    SUBCATEGORY_CATEGORY_FK: {'category_id': 'Категорию подкатегории нельзя изменить: по ней есть записи ДДС.'},
+}
+
+
+def ensure_sqlite_triggers(sender, using, plan=None, **kwargs):
+    """post_migrate: вернуть триггеры, если миграция пересоздала таблицу (только SQLite и только после 0004)."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    if not MigrationRecorder(connection).migration_qs.filter(app='dds', name='0004_operation_integrity').exists():
+        return
+    with connection.schema_editor() as schema_editor:
+        for sql in SQLITE_TRIGGERS.values():
+            schema_editor.execute(sql)
+
+
+def violated_constraint(exc):
+    """
+    Имя нарушенного ограничения: из диагностики psycopg (Postgres) или из текста ошибки
+    (SQLite: «CHECK constraint failed: <имя>», текст RAISE триггера).
+    """
+    name = getattr(getattr(exc.__cause__, 'diag', None), 'constraint_name', None)
+    if name:
+        return name
+    message = str(exc)
+    for known in (AMOUNT_CHECK, CATEGORY_TYPE_FK, SUBCATEGORY_CATEGORY_FK):
+        if known in message:
+            return known
+    return None
+
+
+@contextmanager
+def constraint_errors(errors, using=None):
+    """
+    Блок записи в точке сохранения: нарушение ограничения из errors ({имя: {поле: сообщение}})
+    становится ValidationError по полям, транзакция остается рабочей. Прочие IntegrityError — как есть.
+    """
+    try:
+        with transaction.atomic(using=using):
+            yield
+    except IntegrityError as exc:
+        found = errors.get(violated_constraint(exc))
+        if found is None:
+            raise
+        raise ValidationError(found) from exc
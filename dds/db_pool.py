@@ -0,0 +1,113 @@
+"""
+Пул соединений psycopg и подготовленные выражения для горячих запросов (настройки DDS_DB_POOL*,
+DDS_DB_PREPARE_THRESHOLD).
+
+  - Пул создает сам Django (OPTIONS['pool'] у алиаса, psycopg_pool.ConnectionPool): соединение берется
+    из пула на запрос и возвращается после него; CONN_HEALTH_CHECKS — проверка перед выдачей.
+    Счетчики пулов процесса — на /metrics (pool_collector, подключается в DdsConfig.ready).
+  - Пул не переживает fork: перед запуском дочерних процессов (run_jobs) — close_pools().
+  - prepared() — блок, в котором запросы идут с серверной подстановкой параметров (ServerBindingCursor)
+    и psycopg готовит их на сервере (PREPARE) после DDS_DB_PREPARE_THRESHOLD выполнений; выражение
+    живет в соединении, повторный запрос пропускает разбор и планирование. Вне блока — как обычно
+    (клиентская подстановка), поэтому остальные запросы приложения поведения не меняют.
+"""
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections, router
+
+from .metrics import _labels
+from .models import Operation
+
+# Метрики пула: (имя, тип, описание, ключ psycopg_pool get_stats(), множитель)
+POOL_METRICS = [
+    ('dds_db_pool_size', 'gauge', 'Открытые соединения пула.', 'pool_size', 1),
+    ('dds_db_pool_available', 'gauge', 'Свободные соединения пула.', 'pool_available', 1),
+    ('dds_db_pool_max', 'gauge', 'Максимальный размер пула.', 'pool_max', 1),
+    ('dds_db_pool_waiting', 'gauge', 'Запросы, ждущие соединение сейчас.', 'requests_waiting', 1),
+    ('dds_db_pool_checkouts_total', 'counter', 'Выдачи соединений из пула.', 'requests_num', 1),
+    ('dds_db_pool_waits_total', 'counter', 'Выдачи, которым пришлось ждать свободное соединение.',
+     'requests_queued', 1),
+    ('dds_db_pool_wait_seconds_total', 'counter', 'Суммарное ожидание соединения.', 'requests_wait_ms', 0.001),
+    ('dds_db_pool_timeouts_total', 'counter', 'Запросы, не дождавшиеся соединения (таймаут/ошибка).',
+     'requests_errors', 1),
+    ('dds_db_pool_connects_total', 'counter', 'Новые соединения с БД.', 'connections_num', 1),
+    ('dds_db_pool_connect_seconds_total', 'counter', 'Суммарное время установки соединений.',
+     'connections_ms', 0.001),
+    ('dds_db_pool_connect_errors_total', 'counter', 'Неудачные попытки соединиться.', 'connections_errors', 1),
+    ('dds_db_pool_lost_total', 'counter', 'Соединения, не прошедшие проверку перед выдачей.', 'connections_lost', 1),
+    ('dds_db_pool_bad_returns_total', 'counter', 'Соединения, возвращенные в пул в плохом состоянии.',
+     'returns_bad', 1),
+]
+
+
+def database_pools():
+    """{алиас: пул} для алиасов с OPTIONS['pool']."""
+    pools = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is not None:
+            pools[alias] = pool
+    return pools
+
+
+def pool_metrics(stats):
+    """Строки Prometheus по {алиас: get_stats() пула}."""
+    lines = []
+    if not stats:
+        return lines
+    for name, kind, description, key, scale in POOL_METRICS:
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+        for alias, values in sorted(stats.items()):
+            value = values.get(key, 0) * scale
+            lines.append(f'{name}{_labels(alias=alias)} {value:g}')
+    return lines
+
+
+def pool_collector():
+    """Сборщик для dds.metrics.REGISTRY.register_collector()."""
+    return pool_metrics({alias: pool.get_stats() for alias, pool in database_pools().items()})
+
+
+def close_pools():
+    """Закрыть пулы процесса (перед fork: потоки и соединения пула дочернему процессу не достаются)."""
+    for alias in connections:
+        close_pool = getattr(connections[alias], 'close_pool', None)
+        if close_pool is not None:
+            close_pool()
+
+
+@contextmanager
+def prepared(model=Operation):
+    """
+    Подготовленные выражения для запросов блока к БД, с которой читается model (default или реплика
+    запроса, см. dds.db_routers). Без DDS_DB_PREPARE_THRESHOLD и не на PostgreSQL — ничего не делает.
+    """
+    threshold = settings.DDS_DB_PREPARE_THRESHOLD
+    wrapper = connections[router.db_for_read(model)]
+    if threshold is None or wrapper.vendor != 'postgresql':
+        yield
+        return
+    from django.db.backends.postgresql.base import ServerBindingCursor
+
+    wrapper.ensure_connection()
+    raw, features = wrapper.connection, wrapper.features
+    saved = raw.cursor_factory, raw.prepare_threshold, features.uses_server_side_binding
+    # uses_server_side_binding — чтобы last_executed_query (connection.queries, лог SQL) видел текст запроса
+    raw.cursor_factory, raw.prepare_threshold = ServerBindingCursor, threshold
+    features.uses_server_side_binding = True
+    try:
+        yield
+    finally:
+        raw.cursor_factory, raw.prepare_threshold, features.uses_server_side_binding = saved
+
+
+class PreparedStatementsMixin:
+    """Действия prepared_actions viewset-а выполняются внутри prepared() (горячие запросы списка и карточки)."""
+    prepared_actions = ('list', 'retrieve')
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.action_map.get(request.method.lower()) not in self.prepared_actions:
+            return super().dispatch(request, *args, **kwargs)
+        with prepared(self.queryset.model):
+            return super().dispatch(request, *args, **kwargs)
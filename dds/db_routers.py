@@ -0,0 +1,129 @@
+"""
+Чтение с реплик: GET/HEAD-запросы к API (записи, справочники, отчеты) читают таблицы dds с реплики,
+все остальное — с основной БД (default).
+
+  - Реплики и их веса — settings.DDS_READ_REPLICAS {алиас: вес}; пустой словарь — все на default.
+    Реплика выбирается взвешенным round-robin один раз на запрос — все запросы ответа видят один срез.
+  - Записи (db_for_write), небезопасные методы, код вне HTTP-запросов (команды, воркеры), auth/сессии,
+    фоновые задачи (PRIMARY_MODELS) и снимок справочников (dds.taxonomy) всегда идут в default.
+  - Read-your-writes: после успешного небезопасного запроса клиент получает cookie DDS_PRIMARY_COOKIE
+    на settings.DDS_PRIMARY_PIN_SECONDS — пока она жива, его чтения тоже идут в default
+    (окно должно перекрывать отставание реплик).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import cycle
+from threading import Lock
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+# Cookie «читать с основной БД» после записи
+DDS_PRIMARY_COOKIE = 'dds_primary'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Приложения, чтение которых можно отдавать репликам
+REPLICA_APPS = {'dds'}
+# Модели этих приложений, которые всегда читаются с default: состояние задач клиент опрашивает сразу после постановки
+PRIMARY_MODELS = {'dds.job'}
+
+# Алиас реплики текущего запроса (None — читать с default)
+_replica = ContextVar('dds_replica', default=None)
+
+_schedule = None
+_schedule_lock = Lock()
+
+
+def next_replica():
+    """
+    Следующая реплика по взвешенному round-robin (вес 2 — вдвое больше запросов) или None без реплик.
+    Расписание перестраивается при смене настройки.
+    """
+    global _schedule
+    replicas = tuple(sorted(settings.DDS_READ_REPLICAS.items()))
+    if not replicas:
+        return None
+    with _schedule_lock:
+        if _schedule is None or _schedule[0] != replicas:
+            order = [alias for alias, weight in replicas for _ in range(weight)]
+            _schedule = (replicas, cycle(order))
+        return next(_schedule[1])
+
+
+@contextmanager
+def reading_from(alias):
+    """Читать таблицы REPLICA_APPS с алиаса alias внутри блока (None — с default)."""
+    token = _replica.set(alias)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def primary():
+    """Читать с default внутри блока — для данных, которые кешируются (устаревший срез реплики закешировался бы)."""
+    return reading_from(None)
+
+
+def current_replica():
+    return _replica.get()
+
+
+class ReplicaRouter:
+    """Роутер БД: чтение dds — с реплики запроса (см. ReplicaMiddleware), остальное — default."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in REPLICA_APPS or model._meta.label_lower in PRIMARY_MODELS:
+            return None
+        return _replica.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика — копия default: объекты с нее можно связывать с объектами основной БД
+        databases = {'default', *settings.DDS_READ_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaMiddleware:
+    """
+    Выбор БД для чтения на время запроса (см. docstring модуля): безопасный метод без cookie
+    DDS_PRIMARY_COOKIE — реплика, иначе default; после успешного изменения ставит cookie.
+    Работает и под WSGI, и под ASGI (ContextVar переносится в sync_to_async).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with reading_from(self.replica_for(request)):
+            response = self.get_response(request)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        with reading_from(self.replica_for(request)):
+            response = await self.get_response(request)
+        return self.finish(request, response)
+
+    def replica_for(self, request):
+        if request.method not in SAFE_METHODS or DDS_PRIMARY_COOKIE in request.COOKIES:
+            return None
+        return next_replica()
+
+    def finish(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                DDS_PRIMARY_COOKIE, '1', max_age=settings.DDS_PRIMARY_PIN_SECONDS, httponly=True, samesite='Lax'
+            )
+        return response
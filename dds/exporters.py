@@ -0,0 +1,75 @@
+import csv
+
+from .fast_render import dumps
+
+# Колонки выгрузки: (имя в файле, путь для values_list).
+# Имена словарей подтягиваются JOIN-ами в том же запросе — без инстансов моделей.
+EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('date', 'date'),
+    ('status_id', 'status_id'),
+    ('status', 'status__name'),
+    ('type_id', 'type_id'),
+    ('type', 'type__name'),
+    ('category_id', 'category_id'),
+    ('category', 'category__name'),
+    ('subcategory_id', 'subcategory_id'),
+    ('subcategory', 'subcategory__name'),
+    ('amount', 'amount'),
+    ('comment', 'comment'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+]
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+# Сколько строк забирать из серверного курсора за один раз
+CHUNK_SIZE = 2000
+
+
+def export_rows(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Кортежи значений в порядке EXPORT_COLUMNS.
+    .iterator() на Postgres открывает серверный курсор и читает его порциями по chunk_size,
+    поэтому память не растет с числом строк.
+    """
+    paths = [path for _, path in EXPORT_COLUMNS]
+    return queryset.values_list(*paths).iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    """Псевдо-файл для csv.writer: writerow() возвращает готовую строку вместо записи в буфер."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+    # Заголовок отдается до выполнения запроса — клиент получает первый байт сразу
+    yield writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    for row in export_rows(queryset, chunk_size):
+        yield writer.writerow(row)
+
+
+def stream_ndjson(queryset, chunk_size=CHUNK_SIZE):
+    # Строки кодирует dds.fast_render.dumps (orjson, если установлен) — компактный JSON в UTF-8
+    names = [name for name, _ in EXPORT_COLUMNS]
+    for row in export_rows(queryset, chunk_size):
+        yield dumps(dict(zip(names, row)), default=_json_default) + b'\n'
+
+
+def _json_default(value):
+    # date/datetime -> ISO 8601, Decimal -> строка (как в API, без потери точности)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+STREAMERS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+}
@@ -0,0 +1,122 @@
+"""
+Быстрый путь чтения записей ДДС: строки ответа собираются из кортежей values_list() и готовых
+представлений справочников из снимка dds.taxonomy — без инстансов моделей и полей ModelSerializer —
+и кодируются orjson (если установлен, иначе стандартным json с теми же настройками).
+
+Результат побайтно совпадает с OperationSerializer + JSONRenderer DRF (тест test_fast_render);
+быстрый путь включается только при настройках DRF по умолчанию, для которых это проверено
+(supported()), и выключается настройкой DDS_FAST_READ.
+"""
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.settings import ISO_8601, api_settings
+
+from .models import OperationStatus, OperationType, Category, Subcategory
+from .serializers import (
+    OperationStatusSerializer, OperationTypeSerializer, CategorySerializer, SubcategorySerializer,
+)
+
+try:
+    import orjson
+except ImportError:  # необязательная зависимость: без нее — json из стандартной библиотеки
+    orjson = None
+
+# Колонки values_list() в порядке полей OperationSerializer.Meta.fields
+ROW_FIELDS = (
+    'id', 'date', 'status_id', 'type_id', 'category_id', 'subcategory_id',
+    'amount', 'comment', 'created_at', 'updated_at',
+)
+
+# Вложенные словари: (раздел снимка, сериализатор, queryset для промахов снимка)
+RELATIONS = (
+    ('statuses', OperationStatusSerializer, OperationStatus.objects.all()),
+    ('types', OperationTypeSerializer, OperationType.objects.all()),
+    ('categories', CategorySerializer, Category.objects.select_related('type')),
+    ('subcategories', SubcategorySerializer, Subcategory.objects.select_related('category__type')),
+)
+
+# Точность суммы — как у Operation.amount (DecimalField decimal_places=2)
+CENT = Decimal('0.01')
+
+
+def supported():
+    """Быстрый путь включен и настройки DRF — те, для которых проверена побайтная совместимость."""
+    return (
+        settings.DDS_FAST_READ
+        and api_settings.DATE_FORMAT == ISO_8601
+        and api_settings.DATETIME_FORMAT == ISO_8601
+        and api_settings.COERCE_DECIMAL_TO_STRING
+        and api_settings.UNICODE_JSON
+        and api_settings.COMPACT_JSON
+        and api_settings.STRICT_JSON
+    )
+
+
+def _datetime(value, tz):
+    # DateTimeField.to_representation DRF: в текущий часовой пояс, ISO 8601, UTC — суффиксом Z
+    if not value:
+        return None
+    value = value.astimezone(tz).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _nested(taxonomy, rows):
+    """
+    {(раздел, id): представление} для всех справочников страницы — из снимка (считаются один раз
+    на снимок); значения, которых в снимке еще нет, добираются одним запросом на словарь.
+    """
+    nested = {}
+    for position, (kind, serializer_class, queryset) in enumerate(RELATIONS, start=2):
+        ids = {row[position] for row in rows}
+        missing = set()
+        for pk in ids:
+            data = taxonomy.represent(kind, pk, serializer_class)
+            if data is None:
+                missing.add(pk)
+            nested[(kind, pk)] = data
+        for pk, obj in queryset.in_bulk(missing).items():
+            nested[(kind, pk)] = serializer_class(obj).data
+    return nested
+
+
+def operation_rows(rows, taxonomy):
+    """Кортежи ROW_FIELDS -> словари в формате OperationSerializer."""
+    rows = list(rows)
+    nested = _nested(taxonomy, rows)
+    tz = timezone.get_current_timezone()
+    return [
+        {
+            'id': pk,
+            'date': day.isoformat(),
+            'status': nested[('statuses', status_id)],
+            'type': nested[('types', type_id)],
+            'category': nested[('categories', category_id)],
+            'subcategory': nested[('subcategories', subcategory_id)],
+            'amount': f'{amount.quantize(CENT):f}',
+            'comment': comment,
+            'created_at': _datetime(created_at, tz),
+            'updated_at': _datetime(updated_at, tz),
+        }
+        for pk, day, status_id, type_id, category_id, subcategory_id, amount, comment, created_at, updated_at
+        in rows
+    ]
+
+
+def dumps(data, default=None):
+    """
+    JSON как у JSONRenderer DRF (компактно, UTF-8, \\u2028/\\u2029 экранированы) — в байтах.
+    default(value) — для типов вне JSON (как у json.dumps); date/datetime orjson пишет в ISO 8601 сам.
+    """
+    if orjson is not None:
+        content = orjson.dumps(data, default=default)
+    else:
+        content = json.dumps(
+            data, ensure_ascii=False, allow_nan=False, separators=(',', ':'), default=default
+        ).encode()
+    # Разделители строк JavaScript — экранируем, как DRF (в UTF-8 это E2 80 A8 / E2 80 A9)
+    return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -0,0 +1,62 @@
+from rest_framework import serializers
+
+from .taxonomy import get_taxonomy
+
+
+def root_taxonomy(field):
+    """
+    Снимок справочников, общий для всего дерева сериализаторов (в т.ч. для всех строк списка):
+    версии из общего кеша читаются один раз на ответ, а не на каждое поле каждой строки.
+    """
+    root = field.root
+    taxonomy = getattr(root, '_taxonomy', None)
+    if taxonomy is None:
+        taxonomy = root._taxonomy = get_taxonomy()
+    return taxonomy
+
+
+class TaxonomyPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField, который ищет id в снимке справочников (dds.taxonomy) без запроса в БД.
+    queryset по-прежнему нужен: для промахов снимка, browsable API и схемы.
+    """
+
+    def __init__(self, kind=None, **kwargs):
+        self.kind = kind
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        obj = root_taxonomy(self).get(self.kind, pk)
+        if obj is None:
+            # Промах снимка — проверяем по БД (ошибка does_not_exist, если значения и там нет)
+            return super().to_internal_value(data)
+        return obj
+
+
+class TaxonomyNestedField(serializers.Field):
+    """
+    Вложенное read-only представление значения справочника (как у serializer_class),
+    взятое из снимка: одно и то же значение сериализуется один раз на снимок, а не на каждую строку.
+    """
+
+    def __init__(self, serializer_class, kind, **kwargs):
+        self.serializer_class = serializer_class
+        self.kind = kind
+        kwargs['read_only'] = True
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        pk = getattr(instance, f'{self.field_name}_id')
+        if pk is None:
+            return None
+        data = root_taxonomy(self).represent(self.kind, pk, self.serializer_class)
+        if data is None:
+            data = self.serializer_class(getattr(instance, self.field_name)).data
+        return data
@@ -1,6 +1,6 @@
 import django_filters
 
-from .models import Operation, Category, Subcategory, OperationStatus, OperationType
+from .models import Operation, OperationDailyRollup, Category, Subcategory, OperationStatus, OperationType
 
 
 class OperationFilter(django_filters.FilterSet):
@@ -14,3 +14,12 @@ class OperationFilter(django_filters.FilterSet):
     class Meta:
         model = Operation
         fields = ['date_from', 'date_to', 'status', 'type', 'category', 'subcategory']
+
+
+class RollupFilter(OperationFilter):
+    """
+    Те же фильтры, что у записей, но поверх дневного агрегата (поля корзины совпадают с Operation).
+    Используется отчетами.
+    """
+    class Meta(OperationFilter.Meta):
+        model = OperationDailyRollup
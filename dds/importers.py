@@ -0,0 +1,132 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Operation
+from .periods import check_open
+from .rollups import RollupDelta
+from .serializers import OperationImportRowSerializer
+from .taxonomy import bump_operations_version, pinned
+
+# Поля-ссылки: (ключ в строке импорта, поле модели, раздел снимка dds.taxonomy)
+REFERENCE_FIELDS = [
+    ('status_id', 'status', 'statuses'),
+    ('type_id', 'type', 'types'),
+    ('category_id', 'category', 'categories'),
+    ('subcategory_id', 'subcategory', 'subcategories'),
+]
+
+# Существование ссылок проверяем сами по заранее загруженным словарям,
+# поэтому из full_clean() FK исключаем — иначе Django сделает SELECT на каждое поле
+# (и проверку ограничений Meta.constraints — CHECK суммы дублирует Operation.clean()).
+FK_FIELDS = [field for _, field, _ in REFERENCE_FIELDS]
+
+
+class ImportReport:
+    """Итог пакетного импорта: сколько строк пришло, сколько вставлено и ошибки по строкам."""
+
+    def __init__(self, total, partial):
+        self.total = total
+        self.partial = partial
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, row, errors):
+        self.errors.append({'row': row, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'mode': 'partial' if self.partial else 'atomic',
+            'total': self.total,
+            'created': self.created,
+            'failed': len(self.errors),
+            'errors': self.errors,
+        }
+
+
+class OperationImporter:
+    """
+    Пакетный импорт записей ДДС.
+      1) каждая строка проходит OperationImportRowSerializer (типы, формат дат/сумм) — без БД;
+      2) все упомянутые id справочников резолвятся по снимку dds.taxonomy
+         (промахи — одним запросом на словарь), там же граница закрытых периодов;
+      3) правила Operation.clean() и закрытые периоды проверяются на объектах снимка — без БД;
+      4) валидные записи вставляются через bulk_create пачками по batch_size,
+         дневной агрегат обновляется в той же транзакции (bulk_create не шлет сигналы).
+    Режимы:
+      - atomic (по умолчанию): при любой ошибке не вставляется ничего;
+      - partial: вставляются валидные строки, ошибочные попадают в отчет.
+    """
+    batch_size = 1000
+
+    def __init__(self, partial=False, batch_size=None):
+        self.partial = partial
+        if batch_size:
+            self.batch_size = batch_size
+
+    def run(self, rows):
+        # Один снимок справочников на весь пакет: clean() не перечитывает версии на каждой строке
+        with pinned() as taxonomy:
+            return self._run(rows, taxonomy)
+
+    def _run(self, rows, taxonomy):
+        report = ImportReport(total=len(rows), partial=self.partial)
+
+        parsed = []
+        for index, row in enumerate(rows, start=1):
+            if not isinstance(row, dict):
+                report.add_error(index, {'non_field_errors': ['Ожидается объект.']})
+                continue
+            # Пустые ячейки CSV трактуем как отсутствующие значения
+            data = {k: v for k, v in row.items() if v not in ('', None) or k == 'comment'}
+            serializer = OperationImportRowSerializer(data=data)
+            if serializer.is_valid():
+                parsed.append((index, serializer.validated_data))
+            else:
+                report.add_error(index, serializer.errors)
+
+        lookups = self.load_references((attrs for _, attrs in parsed), taxonomy)
+        closed = taxonomy.closed_through
+
+        operations = []
+        for index, attrs in parsed:
+            errors = {}
+            values = {'amount': attrs['amount'], 'comment': attrs['comment']}
+            if 'date' in attrs:
+                values['date'] = attrs['date']
+            for key, field, _ in REFERENCE_FIELDS:
+                obj = lookups[key].get(attrs[key])
+                if obj is None:
+                    errors[key] = [f'Недопустимый первичный ключ "{attrs[key]}" - объект не существует.']
+                values[field] = obj
+            if errors:
+                report.add_error(index, errors)
+                continue
+
+            op = Operation(**values)
+            try:
+                op.full_clean(exclude=FK_FIELDS, validate_unique=False, validate_constraints=False)
+                check_open(op.date, closed=closed)
+            except ValidationError as exc:
+                report.add_error(index, exc.message_dict)
+                continue
+            operations.append(op)
+
+        report.errors.sort(key=lambda e: e['row'])
+        if report.errors and not self.partial:
+            return report
+
+        with transaction.atomic():
+            Operation.objects.bulk_create(operations, batch_size=self.batch_size)
+            RollupDelta().add_operations(operations).apply()
+            bump_operations_version()
+        report.created = len(operations)
+        return report
+
+    @staticmethod
+    def load_references(rows, taxonomy):
+        """Собирает id справочников из всех строк и резолвит их по снимку (промахи — запросом на словарь)."""
+        ids = {key: set() for key, _, _ in REFERENCE_FIELDS}
+        for attrs in rows:
+            for key in ids:
+                ids[key].add(attrs[key])
+        return {key: taxonomy.resolve(kind, ids[key]) for key, _, kind in REFERENCE_FIELDS}
@@ -0,0 +1,266 @@
+"""
+Очередь фоновых задач в БД (модель Job): тяжелые выгрузки, импорт и отчеты выполняются воркером
+`manage.py run_jobs`, а не внутри веб-запроса с его транзакцией (ATOMIC_REQUESTS).
+
+  - API ставит задачу (submit) и сразу отвечает 202; параметры проверяются заранее (validate_*),
+    чтобы ошибка запроса вернулась клиенту, а не легла в задачу.
+  - Воркер забирает старейшую задачу SELECT ... FOR UPDATE SKIP LOCKED (claim): несколько процессов
+    не ждут друг друга и не берут одну задачу дважды.
+  - Пока задача выполняется, отдельный поток обновляет heartbeat_at; задача без пульса дольше
+    DDS_JOB_STALE_SECONDS (воркер упал) возвращается в очередь, после DDS_JOB_MAX_ATTEMPTS попыток — ошибка.
+  - Результат — файл в default_storage (MEDIA_ROOT/jobs/result/), отдается через API.
+"""
+import json
+import logging
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from .exporters import EXPORT_FORMATS, STREAMERS
+from .filters import OperationFilter, RollupFilter
+from .importers import OperationImporter
+from .models import Job, Operation, OperationDailyRollup
+from .parsers import CSVParser, NDJSONParser
+from .renderers import JSONRenderer
+from .reports import cashflow_report, parse_cashflow_params, report_totals
+from .search import search_operations
+from .taxonomy import refresh as refresh_taxonomy
+
+logger = logging.getLogger('dds.jobs')
+
+# Форматы тела фонового импорта — те же, что у POST /api/operations/bulk/
+IMPORT_PARSERS = {parser.media_type: parser for parser in (JSONParser, CSVParser, NDJSONParser)}
+
+# Как часто обновлять прогресс в БД (сек) — не на каждой строке
+PROGRESS_INTERVAL = 1.0
+
+HANDLERS = {}
+
+
+def handler(kind):
+    """Регистрирует функцию handler(job, progress) -> summary для задач вида kind."""
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def operation_queryset(params):
+    """Записи по фильтрам списка (OperationFilter и search) из параметров задачи."""
+    filterset = OperationFilter(params, queryset=Operation.objects.all())
+    if not filterset.is_valid():
+        raise ValidationError({name: list(errors) for name, errors in filterset.errors.items()})
+    return search_operations(filterset.qs, str(params.get('search') or ''))
+
+
+def rollup_queryset(params):
+    filterset = RollupFilter(params, queryset=OperationDailyRollup.objects.all())
+    if not filterset.is_valid():
+        raise ValidationError({name: list(errors) for name, errors in filterset.errors.items()})
+    return filterset.qs
+
+
+def validate_export(params):
+    if params.get('fmt', 'csv') not in STREAMERS:
+        raise ValidationError({'fmt': 'Допустимые значения: ' + ', '.join(STREAMERS) + '.'})
+    operation_queryset(params)
+
+
+def validate_cashflow(params):
+    parse_cashflow_params(params)
+    rollup_queryset(params)
+
+
+def validate_import(params):
+    if params.get('mode', 'atomic') not in ('atomic', 'partial'):
+        raise ValidationError({'mode': 'Допустимые значения: atomic, partial.'})
+    if params.get('content_type') not in IMPORT_PARSERS:
+        raise ValidationError({'content_type': 'Допустимые форматы: ' + ', '.join(IMPORT_PARSERS) + '.'})
+
+
+def submit(kind, params, source=None):
+    """Поставить задачу в очередь; source — содержимое (bytes) для импорта."""
+    job = Job(kind=kind, params=params)
+    if source is not None:
+        job.source.save(f'{kind}.bin', ContentFile(source), save=False)
+    job.save()
+    return job
+
+
+class Progress:
+    """Счетчик обработанных строк задачи; в БД пишется не чаще раза в PROGRESS_INTERVAL."""
+
+    def __init__(self, job):
+        self.job = job
+        self.saved_at = 0.0
+
+    def __call__(self, done, total=None, force=False):
+        self.job.progress = done
+        if total is not None:
+            self.job.total = total
+        now = time.monotonic()
+        if force or now - self.saved_at >= PROGRESS_INTERVAL:
+            self.saved_at = now
+            Job.objects.filter(pk=self.job.pk).update(progress=self.job.progress, total=self.job.total)
+
+
+class Heartbeat(threading.Thread):
+    """Поток, обновляющий heartbeat_at задачи, пока она выполняется (даже если обработчик не сообщает прогресс)."""
+
+    def __init__(self, job_id, interval):
+        super().__init__(daemon=True)
+        self.job_id = job_id
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                Job.objects.filter(pk=self.job_id, status=Job.RUNNING).update(heartbeat_at=timezone.now())
+        finally:
+            connection.close()  # у потока свое соединение
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.join()
+
+
+@handler(Job.EXPORT)
+def run_export(job, progress):
+    fmt = job.params.get('fmt', 'csv')
+    queryset = operation_queryset(job.params)
+    total = queryset.count()
+    progress(0, total, force=True)
+    rows = 0
+    with tempfile.TemporaryFile() as tmp:
+        # Первый кусок CSV — заголовок, дальше — по строке на кусок
+        for index, chunk in enumerate(STREAMERS[fmt](queryset)):
+            tmp.write(chunk.encode() if isinstance(chunk, str) else chunk)
+            rows = index if fmt == 'csv' else index + 1
+            progress(rows)
+        tmp.seek(0)
+        job.result.save(f'operations-{job.pk}.{fmt}', File(tmp), save=False)
+    return {'rows': rows, 'content_type': EXPORT_FORMATS[fmt]}
+
+
+@handler(Job.IMPORT)
+def run_import(job, progress):
+    parser = IMPORT_PARSERS[job.params['content_type']]()
+    with job.source.open('rb') as stream:
+        try:
+            rows = parser.parse(stream, parser.media_type, {'encoding': settings.DEFAULT_CHARSET})
+        except ParseError as exc:
+            raise ValidationError({'non_field_errors': str(exc.detail)})
+    if not isinstance(rows, list):
+        raise ValidationError({'non_field_errors': 'Ожидается массив записей.'})
+    progress(0, len(rows), force=True)
+    report = OperationImporter(partial=job.params.get('mode') == 'partial').run(rows).as_dict()
+    progress(len(rows))
+    # Полный отчет (ошибки по строкам) — файлом, в summary — только счетчики
+    job.result.save(f'import-{job.pk}.json', ContentFile(JSONRenderer().render(report)), save=False)
+    return {key: value for key, value in report.items() if key != 'errors'}
+
+
+@handler(Job.CASHFLOW)
+def run_cashflow(job, progress):
+    period, group_by = parse_cashflow_params(job.params)
+    results = cashflow_report(rollup_queryset(job.params), period, group_by)
+    progress(len(results), len(results))
+    data = {'period': period, 'group_by': group_by, 'totals': report_totals(results), 'results': results}
+    job.result.save(f'cashflow-{job.pk}.json', ContentFile(JSONRenderer().render(data)), save=False)
+    return {'rows': len(results)}
+
+
+def requeue_stale():
+    """Задачи упавших воркеров (без пульса дольше DDS_JOB_STALE_SECONDS) — обратно в очередь или в ошибку."""
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.DDS_JOB_STALE_SECONDS)
+    stale = Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=cutoff)
+    requeued = stale.filter(attempts__lt=settings.DDS_JOB_MAX_ATTEMPTS).update(status=Job.QUEUED)
+    stale.update(status=Job.FAILED, error='Воркер перестал отвечать.', finished_at=now)
+    return requeued
+
+
+def claim():
+    """Забрать старейшую задачу из очереди (или None). Заблокированные другими воркерами строки пропускаются."""
+    with transaction.atomic():
+        job = Job.objects.select_for_update(skip_locked=True).filter(status=Job.QUEUED).order_by('id').first()
+        if job is None:
+            return None
+        now = timezone.now()
+        # Условный UPDATE — защита и там, где FOR UPDATE не поддерживается (SQLite)
+        claimed = Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, started_at=now, heartbeat_at=now, attempts=F('attempts') + 1, error='',
+        )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def run(job):
+    """Выполнить захваченную задачу и записать итог."""
+    progress = Progress(job)
+    # Справочники и граница закрытых периодов — из БД на каждую задачу: импорт не должен проверять
+    # строки по снимку, устаревшему из-за неверно настроенного общего кеша (5 запросов на задачу)
+    refresh_taxonomy()
+    try:
+        with Heartbeat(job.pk, max(settings.DDS_JOB_STALE_SECONDS / 3, 1)):
+            summary = HANDLERS[job.kind](job, progress)
+    except Exception as exc:
+        if isinstance(exc, ValidationError):
+            error = json.dumps(exc.message_dict if hasattr(exc, 'error_dict') else exc.messages, ensure_ascii=False)
+        else:
+            logger.exception('Задача %s завершилась ошибкой', job)
+            error = f'{type(exc).__name__}: {exc}'
+        Job.objects.filter(pk=job.pk).update(status=Job.FAILED, error=error, finished_at=timezone.now())
+        return False
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.DONE, result=job.result.name or '', summary=summary,
+        progress=job.progress, total=job.total, finished_at=timezone.now(),
+    )
+    return True
+
+
+def work(poll=1.0, once=False, stop=None):
+    """
+    Цикл воркера: задачи по одной, пока есть; пустая очередь — пауза poll сек
+    (once — выйти, когда очередь пуста). stop — threading/multiprocessing Event для остановки.
+    Возвращает число выполненных задач.
+    """
+    done = 0
+    while stop is None or not stop.is_set():
+        try:
+            requeue_stale()
+            job = claim()
+        except OperationalError:
+            # Разрыв соединения или блокировка БД (в SQLite — конкурирующий воркер): повторим после паузы
+            logger.warning('Не удалось взять задачу из очереди', exc_info=True)
+            connection.close()
+        else:
+            if job is not None:
+                run(job)
+                done += 1
+                continue
+            if once:
+                break
+        if stop is not None:
+            stop.wait(poll)
+        else:
+            time.sleep(poll)
+    return done
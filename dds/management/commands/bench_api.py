@@ -0,0 +1,51 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dds.benchmarks import bench_api, compare_results
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк API записей и справочников: перцентили латентности, число SQL-запросов и пик памяти '
+        'по сценариям (список, фильтры, поиск, создание, изменение, справочники). Результат — JSON; '
+        'с --baseline сравнивается с сохраненным отчетом. Данные — текущей БД (см. generate_operations).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--only', action='append', help='Только сценарии, в названии которых есть эта строка.')
+        parser.add_argument('--output', help='Куда записать JSON-отчет (иначе — в stdout).')
+        parser.add_argument('--baseline', help='JSON-отчет прошлого прогона для сравнения.')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Допустимый рост p95 и памяти (доля).')
+        parser.add_argument('--fail-on-regression', action='store_true')
+        parser.add_argument('--keep', action='store_true', help='Не откатывать записи, созданные сценариями.')
+
+    def handle(self, *args, iterations, warmup, only, output, baseline, tolerance, fail_on_regression, keep,
+               **options):
+        try:
+            report = bench_api(iterations=iterations, warmup=warmup, only=only, keep=keep)
+        except ValueError as exc:
+            raise CommandError(f'{exc} Запустите generate_operations.')
+
+        if output:
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        for name, row in report['scenarios'].items():
+            self.stderr.write(
+                f"{name:<34} {row['status']}  p50 {row['p50_ms']:8.2f}  p95 {row['p95_ms']:8.2f}  "
+                f"p99 {row['p99_ms']:8.2f} мс  запросов {row['queries']:3}  память {row['peak_kb']:9.1f} КБ"
+            )
+        if not output:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+
+        if baseline:
+            with open(baseline, encoding='utf-8') as f:
+                problems = compare_results(report, json.load(f), tolerance=tolerance)
+            for problem in problems:
+                self.stderr.write(self.style.WARNING(problem))
+            if problems and fail_on_regression:
+                raise CommandError(f'Регрессии относительно {baseline}: {len(problems)}.')
+            if not problems:
+                self.stderr.write(self.style.SUCCESS('Регрессий относительно базового отчета нет.'))
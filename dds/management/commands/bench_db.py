@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from dds.benchmarks import bench_connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк соединений PostgreSQL под параллельной нагрузкой: горячие запросы списка и карточки '
+        'с новым соединением на запрос, через пул psycopg и через пул с подготовленными выражениями; '
+        'время планирования обычных и подготовленных запросов. Данные — текущей БД (см. generate_operations).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=10, help='Одновременных клиентов (и размер пула).')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--prepare-threshold', type=int, default=0,
+                            help='prepare_threshold для режима с подготовленными выражениями.')
+        parser.add_argument('--output', help='Куда записать JSON-отчет.')
+
+    def handle(self, *args, concurrency, requests, prepare_threshold, output, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Бенчмарк соединений — только для PostgreSQL.')
+        try:
+            report = bench_connections(concurrency=concurrency, requests=requests,
+                                       prepare_threshold=prepare_threshold)
+        except ValueError as exc:
+            raise CommandError(f'{exc} Запустите generate_operations.')
+
+        for name, row in report['modes'].items():
+            self.stdout.write(
+                f"{name:<16} {row['rps']:8.1f} rps  запрос p50 {row['total_p50_ms']:7.2f} p95 {row['total_p95_ms']:7.2f}"
+                f"  соединение p50 {row['connect_p50_ms']:7.2f} p95 {row['connect_p95_ms']:7.2f}"
+                f"  SQL p50 {row['sql_p50_ms']:7.2f} p95 {row['sql_p95_ms']:7.2f} мс"
+            )
+        for row in report['planning']:
+            self.stdout.write(
+                f"планирование {row['scenario']:<10} {row['plan_ms']:7.3f} мс -> "
+                f"подготовленный {row['prepared_plan_ms']:7.3f} мс  {row['sql'][:60]}"
+            )
+        if output:
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from dds.benchmarks import bench_filters
+from dds.models import Operation
+from dds.synthetic import generate_operations
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк списка записей ДДС: план запроса и латентность первой страницы и COUNT '
+        'для каждого сочетания фильтров OperationFilter. --seed наполняет БД синтетическими записями.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Сначала вставить столько синтетических записей.')
+        parser.add_argument('--days', type=int, default=730, help='Глубина синтетических данных в днях.')
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--plans', action='store_true', help='Печатать планы запросов целиком.')
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Ненулевой код возврата, если какой-то запрос читает таблицу записей полным просмотром.',
+        )
+
+    def handle(self, *args, seed=0, days=730, page_size=50, repeat=5, plans=False, check=False, **options):
+        if seed:
+            generate_operations(seed, days=days)
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(f'ANALYZE {Operation._meta.db_table}')
+            self.stdout.write(f'Вставлено синтетических записей: {seed}')
+
+        total = Operation.objects.count()
+        if not total:
+            raise CommandError('Нет записей: запустите с --seed N.')
+        self.stdout.write(f'Записей в таблице: {total}, СУБД: {connection.vendor}')
+
+        results = bench_filters(page_size=page_size, repeat=repeat)
+        for row in results:
+            flags = []
+            if row['full_scan']:
+                flags.append(self.style.ERROR('полный просмотр'))
+            if row['sort']:
+                flags.append('сортировка')
+            self.stdout.write(
+                f"{row['case']:<28} страница {row['page_ms']:8.2f} мс (макс {row['page_max_ms']:8.2f})"
+                f"  count {row['count_ms']:8.2f} мс  {', '.join(flags)}"
+            )
+            if plans:
+                self.stdout.write(row['plan'])
+
+        scans = [row['case'] for row in results if row['full_scan']]
+        if check and scans:
+            raise CommandError(f'Полный просмотр таблицы записей: {", ".join(scans)}.')
@@ -0,0 +1,56 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from dds.models import Operation
+from dds.synthetic import INSERT_METHODS, generate_operations
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет БД синтетическими записями ДДС: справочник, похожий на реальный, '
+        'и COUNT записей с перекосом по категориям. Для нагрузочных стендов и бенчмарков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('count', type=int, help='Сколько записей вставить (например, 2000000).')
+        parser.add_argument('--days', type=int, default=730, help='Глубина данных в днях до --date-to.')
+        parser.add_argument('--date-from', type=self.parse_date, help='Начало периода (YYYY-MM-DD); иначе — по --days.')
+        parser.add_argument('--date-to', type=self.parse_date, help='Конец периода (YYYY-MM-DD); по умолчанию — сегодня.')
+        parser.add_argument(
+            '--skew', type=float, default=1.0,
+            help='Показатель закона Ципфа для распределения по подкатегориям и статусам (0 — равномерно).',
+        )
+        parser.add_argument('--categories', type=int, default=0, help='Дополнительные категории в каждом типе.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--method', choices=['auto', *INSERT_METHODS], default='auto',
+                            help='auto — COPY в Postgres, bulk_create в остальных СУБД.')
+
+    @staticmethod
+    def parse_date(value):
+        return date.fromisoformat(value)
+
+    def handle(self, *args, count, days, date_from, date_to, skew, categories, seed, batch_size, method, **options):
+        if count <= 0 or batch_size <= 0:
+            raise CommandError('count и --batch-size должны быть положительными.')
+        if date_from and date_to and date_from > date_to:
+            raise CommandError('--date-from позже --date-to.')
+        started = time.perf_counter()
+
+        def progress(created):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{created}/{count} записей, {created / elapsed:,.0f} строк/с')
+
+        generate_operations(
+            count, days=days, seed=seed, batch_size=batch_size, end=date_to, date_from=date_from,
+            skew=skew, method=method, progress=progress, extra_categories=categories,
+        )
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {Operation._meta.db_table}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {count} записей за {time.perf_counter() - started:.1f} с.'
+        ))
@@ -0,0 +1,53 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dds.benchmarks import LOAD_PATHS, load_test
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест запущенных серверов API: пропускная способность и перцентили латентности '
+        'при заданном числе одновременных клиентов. Сравнение WSGI и ASGI:\n'
+        '  load_test --target wsgi=http://127.0.0.1:8000/api/ --target asgi=http://127.0.0.1:8001/api/async/'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True,
+                            help='ИМЯ=БАЗОВЫЙ_URL API (можно несколько — результаты сравниваются).')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help=f'Путь относительно базового URL (по умолчанию: {", ".join(LOAD_PATHS)}).')
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--requests', type=int, default=200, help='Запросов на каждый путь.')
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--output', help='Куда записать JSON-отчет.')
+
+    def handle(self, *args, target, paths, concurrency, requests, timeout, output, **options):
+        targets = {}
+        for value in target:
+            name, sep, url = value.partition('=')
+            if not sep or not url:
+                raise CommandError(f'--target ожидает ИМЯ=URL, получено: {value}')
+            targets[name] = url if url.endswith('/') else url + '/'
+
+        report = {'concurrency': concurrency, 'requests': requests, 'targets': {}}
+        for name, url in targets.items():
+            results = load_test(url, paths, concurrency=concurrency, requests=requests, timeout=timeout)
+            report['targets'][name] = {'url': url, 'results': results}
+            for path, row in results.items():
+                self.stdout.write(
+                    f"{name:<10} {path:<50} {row['rps']:8.1f} rps  p50 {row['p50_ms'] or 0:8.2f}  "
+                    f"p95 {row['p95_ms'] or 0:8.2f}  p99 {row['p99_ms'] or 0:8.2f} мс  ошибок {row['errors']}"
+                )
+
+        if len(targets) > 1:
+            first, *others = targets
+            for other in others:
+                for path, row in report['targets'][other]['results'].items():
+                    base = report['targets'][first]['results'][path]['rps']
+                    ratio = row['rps'] / base if base else float('inf')
+                    self.stdout.write(f'{other} / {first} {path:<50} x{ratio:.2f} rps')
+
+        if output:
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
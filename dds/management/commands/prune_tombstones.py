@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from dds.changes import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Удаляет из журнала удалений (ленты изменений) записи старше срока хранения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help=f'Срок хранения в днях (по умолчанию DDS_TOMBSTONE_RETENTION_DAYS = {settings.DDS_TOMBSTONE_RETENTION_DAYS}).',
+        )
+
+    def handle(self, *args, days=None, **options):
+        deleted = prune_tombstones(days)
+        self.stdout.write(self.style.SUCCESS(f'Удалено записей журнала: {deleted}.'))
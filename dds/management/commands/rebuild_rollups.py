@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dds.rollups import diff_rollups, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает дневной агрегат ДДС (OperationDailyRollup) по записям или сверяет его с ними (--verify).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Только сверить агрегат с записями; при расхождениях — ненулевой код возврата.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, verify=False, batch_size=1000, **options):
+        if verify:
+            diff = diff_rollups()
+            for key, (expected, stored) in sorted(diff.items(), key=lambda item: str(item[0]))[:20]:
+                self.stdout.write(f'{key}: ожидается {expected}, в агрегате {stored}')
+            if diff:
+                raise CommandError(f'Агрегат расходится с записями: {len(diff)} корзин(ы).')
+            self.stdout.write(self.style.SUCCESS('Агрегат совпадает с записями.'))
+            return
+
+        buckets = rebuild_rollups(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Агрегат пересобран: {buckets} корзин(ы).'))
@@ -0,0 +1,61 @@
+import multiprocessing
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from dds.db_pool import close_pools
+from dds.jobs import work
+
+
+def _worker(poll, once, stop):
+    # Дочерний процесс: свои соединения с БД, Ctrl+C обрабатывает родитель
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    connections.close_all()
+    work(poll=poll, once=once, stop=stop)
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+class Command(BaseCommand):
+    help = ('Воркер фоновых задач (выгрузки, импорт, отчеты): забирает задачи из очереди в БД '
+            '(SELECT ... FOR UPDATE SKIP LOCKED) и выполняет их в пуле процессов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=None,
+                            help=f'Число процессов (по умолчанию DDS_JOB_WORKERS = {settings.DDS_JOB_WORKERS}).')
+        parser.add_argument('--poll', type=float, default=1.0, help='Пауза при пустой очереди, сек.')
+        parser.add_argument('--once', action='store_true', help='Выйти, когда очередь опустеет.')
+
+    def handle(self, *args, processes=None, poll=1.0, once=False, **options):
+        processes = processes or settings.DDS_JOB_WORKERS
+        if processes == 1:
+            done = work(poll=poll, once=once)
+            self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {done}.'))
+            return
+
+        # Соединения и пулы (DDS_DB_POOL) родителя не должны достаться дочерним процессам после fork
+        connections.close_all()
+        close_pools()
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        workers = [context.Process(target=_worker, args=(poll, once, stop), daemon=True) for _ in range(processes)]
+        for process in workers:
+            process.start()
+        # SIGTERM (docker stop) — так же, как Ctrl+C: мягкая остановка пула
+        signal.signal(signal.SIGTERM, _interrupt)
+        self.stdout.write(f'Запущено воркеров: {processes}.')
+        try:
+            for process in workers:
+                process.join()
+        except KeyboardInterrupt:
+            # Текущие задачи дорабатываются; незавершенные после terminate вернет в очередь requeue_stale
+            stop.set()
+            for process in workers:
+                process.join(timeout=settings.DDS_JOB_STALE_SECONDS)
+                if process.is_alive():
+                    process.terminate()
+        self.stdout.write(self.style.SUCCESS('Воркеры остановлены.'))
@@ -0,0 +1,230 @@
+import hmac
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+# Статистика текущего запроса (см. dds.middleware.PerformanceMiddleware); None — вне запроса
+_current = ContextVar('dds_request_stats', default=None)
+
+# Границы гистограммы длительности запросов, секунды
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RequestStats:
+    """
+    Счетчики одного запроса: SQL-запросы и время в БД (см. record_queries),
+    время по фазам (serialize, render — см. timed()) и самый медленный SQL.
+    """
+    __slots__ = ('queries', 'db', 'phases', 'active', 'worst_sql', 'worst_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.phases = defaultdict(float)
+        self.active = set()
+        self.worst_sql = None
+        self.worst_time = 0.0
+
+    def add_query(self, sql, elapsed):
+        self.queries += 1
+        self.db += elapsed
+        # SAVEPOINT/RELEASE — служебные команды транзакций, в «самый медленный SQL» не попадают
+        if elapsed > self.worst_time and not sql.startswith(('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO')):
+            self.worst_time, self.worst_sql = elapsed, sql
+
+    def server_timing(self, total):
+        """Значение заголовка Server-Timing (длительности в мс)."""
+        parts = [f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"']
+        parts += [f'{phase};dur={seconds * 1000:.1f}' for phase, seconds in self.phases.items()]
+        parts.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(parts)
+
+
+def current():
+    return _current.get()
+
+
+def record_queries(execute, sql, params, many, context):
+    """
+    execute_wrapper соединения: SQL засчитывается статистике текущего запроса (contextvar).
+    Ставится на каждое соединение один раз при его открытии (install_query_recorder) —
+    а не на время запроса: под ASGI ORM выполняет запросы в других потоках (sync_to_async)
+    со своими соединениями, а contextvar туда копируется вместе с контекстом.
+    """
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add_query(sql, time.perf_counter() - started)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """Обработчик сигнала connection_created (подключается в DdsConfig.ready)."""
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+@contextmanager
+def collecting(stats):
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed(phase):
+    """
+    Добавить время блока к фазе текущего запроса. Вложенные блоки той же фазы
+    (например, сериализатор словаря внутри сериализатора записи) не считаются повторно.
+    """
+    stats = _current.get()
+    if stats is None or phase in stats.active:
+        yield
+        return
+    stats.active.add(phase)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.phases[phase] += time.perf_counter() - started
+        stats.active.discard(phase)
+
+
+class TimedSerializerMixin:
+    """Время to_representation сериализатора идет в фазу serialize (Server-Timing и метрики)."""
+
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
+
+
+class Registry:
+    """
+    Агрегаты по эндпоинтам в памяти процесса: количество запросов, гистограмма длительности,
+    суммарные время в БД, число SQL-запросов и время фаз. Дополнительные метрики
+    (например, пулы соединений) подключаются через register_collector().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collectors = []
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = defaultdict(int)          # (endpoint, method, status) -> n
+            self.buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+            self.duration = defaultdict(float)        # (endpoint, method) -> сек
+            self.count = defaultdict(int)             # (endpoint, method) -> n
+            self.db = defaultdict(float)
+            self.queries = defaultdict(int)
+            self.phases = defaultdict(float)          # (endpoint, method, phase) -> сек
+
+    def observe(self, endpoint, method, status, total, stats):
+        key = (endpoint, method)
+        with self._lock:
+            self.requests[(endpoint, method, str(status))] += 1
+            self.count[key] += 1
+            self.duration[key] += total
+            buckets = self.buckets[key]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if total <= bound:
+                    buckets[i] += 1
+            self.db[key] += stats.db
+            self.queries[key] += stats.queries
+            for phase, seconds in stats.phases.items():
+                self.phases[(endpoint, method, phase)] += seconds
+
+    def register_collector(self, collector):
+        """collector() -> итерируемое строк в текстовом формате Prometheus."""
+        self._collectors.append(collector)
+
+    def render(self):
+        with self._lock:
+            requests = dict(self.requests)
+            count, duration = dict(self.count), dict(self.duration)
+            buckets = {key: list(values) for key, values in self.buckets.items()}
+            db, queries, phases = dict(self.db), dict(self.queries), dict(self.phases)
+
+        lines = [
+            '# HELP dds_http_requests_total Запросы по эндпоинту, методу и статусу.',
+            '# TYPE dds_http_requests_total counter',
+        ]
+        for (endpoint, method, status), n in sorted(requests.items()):
+            lines.append(f'dds_http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {n}')
+
+        lines += [
+            '# HELP dds_http_request_duration_seconds Длительность обработки запроса.',
+            '# TYPE dds_http_request_duration_seconds histogram',
+        ]
+        for key in sorted(count):
+            endpoint, method = key
+            for bound, n in zip(DURATION_BUCKETS, buckets[key]):
+                labels = _labels(endpoint=endpoint, method=method, le=repr(float(bound)))
+                lines.append(f'dds_http_request_duration_seconds_bucket{labels} {n}')
+            labels = _labels(endpoint=endpoint, method=method, le='+Inf')
+            lines.append(f'dds_http_request_duration_seconds_bucket{labels} {count[key]}')
+            labels = _labels(endpoint=endpoint, method=method)
+            lines.append(f'dds_http_request_duration_seconds_sum{labels} {duration[key]:.6f}')
+            lines.append(f'dds_http_request_duration_seconds_count{labels} {count[key]}')
+
+        lines += [
+            '# HELP dds_http_request_db_seconds_total Время в БД.',
+            '# TYPE dds_http_request_db_seconds_total counter',
+        ]
+        lines += [f'dds_http_request_db_seconds_total{_labels(endpoint=e, method=m)} {v:.6f}'
+                  for (e, m), v in sorted(db.items())]
+        lines += [
+            '# HELP dds_http_request_queries_total Число SQL-запросов.',
+            '# TYPE dds_http_request_queries_total counter',
+        ]
+        lines += [f'dds_http_request_queries_total{_labels(endpoint=e, method=m)} {v}'
+                  for (e, m), v in sorted(queries.items())]
+        lines += [
+            '# HELP dds_http_request_phase_seconds_total Время фаз обработки (serialize, render).',
+            '# TYPE dds_http_request_phase_seconds_total counter',
+        ]
+        lines += [f'dds_http_request_phase_seconds_total{_labels(endpoint=e, method=m, phase=p)} {v:.6f}'
+                  for (e, m, p), v in sorted(phases.items())]
+
+        for collector in self._collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+REGISTRY = Registry()
+
+
+def metrics_view(request):
+    """
+    GET /metrics — метрики процесса в текстовом формате Prometheus.
+    Нужен заголовок Authorization: Bearer <settings.DDS_METRICS_TOKEN>; без настроенного токена
+    эндпоинт открыт только при DEBUG, иначе — 403 (пути эндпоинтов и объемы трафика наружу не отдаются).
+    """
+    token = settings.DDS_METRICS_TOKEN
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseForbidden()
+    return HttpResponse(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,68 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .metrics import REGISTRY, RequestStats, collecting
+
+logger = logging.getLogger('dds.performance')
+
+
+def endpoint_name(request):
+    """Метка эндпоинта для метрик: имя маршрута (operation-list, …), а не путь с id."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route
+
+
+class PerformanceMiddleware:
+    """
+    Инструментирование каждого запроса:
+      - число SQL-запросов и время в БД (dds.metrics.record_queries на всех соединениях),
+        время фаз serialize/render (dds.metrics.timed) и общее время;
+      - заголовок Server-Timing (видно во вкладке Network браузера);
+      - медленные запросы (>= settings.DDS_SLOW_REQUEST_MS) — в лог dds.performance с самым медленным SQL;
+      - агрегаты по эндпоинтам — в dds.metrics.REGISTRY (GET /metrics).
+    Накладные расходы — perf_counter() на SQL-запрос и несколько операций со словарями на запрос.
+    У потоковых ответов (выгрузка) учитывается только время до первого байта.
+    Ставится первым в MIDDLEWARE, чтобы total включал остальные middleware.
+    Работает и под WSGI, и под ASGI (без переключения в поток на каждый запрос).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        started = time.perf_counter()
+        with collecting(stats):
+            response = self.get_response(request)
+        return self.finish(request, response, stats, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        started = time.perf_counter()
+        with collecting(stats):
+            response = await self.get_response(request)
+        return self.finish(request, response, stats, time.perf_counter() - started)
+
+    def finish(self, request, response, stats, total):
+        response['Server-Timing'] = stats.server_timing(total)
+        endpoint = endpoint_name(request)
+        REGISTRY.observe(endpoint, request.method, response.status_code, total, stats)
+        if total * 1000 >= settings.DDS_SLOW_REQUEST_MS:
+            logger.warning(
+                'Медленный запрос %s %s (%s): %.0f мс, БД %.0f мс, SQL-запросов %d; самый медленный SQL (%.0f мс): %s',
+                request.method, request.get_full_path(), endpoint, total * 1000, stats.db * 1000,
+                stats.queries, stats.worst_time * 1000, (stats.worst_sql or '')[:1000],
+            )
+        return response
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:56
+# 0001_initial — схема исходной версии (ее же создавал makemigrations при старте контейнера в уже развернутых
+# копиях, см. README «Обновление»); все изменения схемы после нее начинаются с этой миграции.
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Типы, которые в уже заполненных базах означают приход («Пополнение» — как в фикстуре initial.json).
+# Остальные существующие типы получают direction='expense': приходные типы с другими названиями нужно
+# один раз отметить в админке (Типы операций → Направление), иначе отчеты посчитают их расходом.
+INCOME_TYPE_NAMES = {'пополнение', 'приход', 'поступление', 'доход'}
+
+
+def mark_income_types(apps, schema_editor):
+    OperationType = apps.get_model('dds', 'OperationType')
+    db = schema_editor.connection.alias
+    # Названия сравниваются в Python: регистронезависимое сравнение кириллицы в SQLite не работает
+    income = [pk for pk, name in OperationType.objects.using(db).values_list('pk', 'name')
+              if name.strip().lower() in INCOME_TYPE_NAMES]
+    OperationType.objects.using(db).filter(pk__in=income).update(direction='income')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dds', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='operationtype',
+            name='direction',
+            field=models.CharField(choices=[('income', 'Приход'), ('expense', 'Расход')], default='expense', max_length=16, verbose_name='Направление'),
+        ),
+        migrations.RunPython(mark_income_types, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='ClosedPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Закрытый период',
+                'verbose_name_plural': 'Закрытые периоды',
+                'ordering': ['month'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=18)),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='dds.closedperiod')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dds.operationstatus')),
+            ],
+            options={
+                'verbose_name': 'Остаток на конец периода',
+                'verbose_name_plural': 'Остатки на конец периода',
+                'unique_together': {('period', 'status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='OperationDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dds.category')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dds.operationstatus')),
+                ('type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dds.operationtype')),
+                ('subcategory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dds.subcategory')),
+            ],
+            options={
+                'verbose_name': 'Дневной агрегат ДДС',
+                'verbose_name_plural': 'Дневные агрегаты ДДС',
+                'ordering': ['date'],
+                'unique_together': {('date', 'status', 'type', 'category', 'subcategory')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='operation',
+            index=models.Index(fields=['-date', '-id'], name='dds_op_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='operation',
+            index=models.Index(fields=['status', '-date', '-id'], name='dds_op_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='operation',
+            index=models.Index(fields=['type', '-date', '-id'], name='dds_op_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='operation',
+            index=models.Index(fields=['category', '-date', '-id'], name='dds_op_category_date_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models.functions import Upper
+
+# Индексы поиска по комментарию (см. dds.search) есть только в Postgres, поэтому они не описаны
+# в Meta.indexes модели, а создаются здесь по условию на СУБД. Выражения должны совпадать
+# с теми, что строит dds.search, иначе планировщик их не применит.
+SEARCH_INDEXES = [
+    # Полнотекстовый поиск: to_tsvector('russian', COALESCE(comment, ''))
+    GinIndex(SearchVector('comment', config='russian'), name='dds_op_comment_fts_idx'),
+    # Подстрока: UPPER(comment) LIKE UPPER('%…%') (так Django компилирует icontains)
+    GinIndex(OpClass(Upper('comment'), name='gin_trgm_ops'), name='dds_op_comment_trgm_idx'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Operation = apps.get_model('dds', 'Operation')
+    for index in SEARCH_INDEXES:
+        schema_editor.add_index(Operation, index)
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Operation = apps.get_model('dds', 'Operation')
+    for index in SEARCH_INDEXES:
+        schema_editor.remove_index(Operation, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dds', '0002_operation_indexes'),
+    ]
+
+    operations = [
+        # CREATE EXTENSION pg_trgm (на других СУБД операция ничего не делает)
+        TrigramExtension(),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:17
+
+from django.db import migrations, models
+from django.db.models import F, Q
+
+from ._integrity_0004 import add_relation_constraints, drop_relation_constraints
+
+
+def check_existing(apps, schema_editor):
+    """Ограничения не добавятся поверх уже нарушающих их строк — сообщаем, сколько их, до ALTER TABLE."""
+    Operation = apps.get_model('dds', 'Operation')
+    rows = Operation.objects.using(schema_editor.connection.alias)
+    broken = rows.filter(
+        Q(amount__lte=0) | ~Q(type_id=F('category__type_id')) | ~Q(category_id=F('subcategory__category_id'))
+    ).count()
+    if broken:
+        raise RuntimeError(
+            f'Записей ДДС, нарушающих правила Operation.clean(): {broken}. Исправьте их перед миграцией '
+            '(сумма > 0, категория — выбранного типа, подкатегория — выбранной категории).'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dds', '0003_operation_comment_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_existing, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='category',
+            constraint=models.UniqueConstraint(fields=('id', 'type'), name='dds_category_id_type_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='operation',
+            constraint=models.CheckConstraint(condition=models.Q(('amount__gt', 0)), name='dds_op_amount_positive'),
+        ),
+        migrations.AddConstraint(
+            model_name='subcategory',
+            constraint=models.UniqueConstraint(fields=('id', 'category'), name='dds_subcat_id_category_uniq'),
+        ),
+        migrations.RunPython(add_relation_constraints, drop_relation_constraints),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dds', '0004_operation_integrity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OperationTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('operation_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Удаленная запись ДДС',
+                'verbose_name_plural': 'Удаленные записи ДДС',
+                'ordering': ['deleted_at', 'operation_id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='operation',
+            index=models.Index(fields=['updated_at', 'id'], name='dds_op_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='operationtombstone',
+            index=models.Index(fields=['deleted_at', 'operation_id'], name='dds_tombstone_deleted_idx'),
+        ),
+    ]
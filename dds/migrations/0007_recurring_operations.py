@@ -0,0 +1,59 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+from ._integrity_0004 import add_sqlite_triggers, drop_sqlite_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dds', '0006_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringOperation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=128)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('comment', models.TextField(blank=True)),
+                ('schedule', models.CharField(choices=[('monthly', 'Ежемесячно'), ('weekly', 'Еженедельно'), ('cron', 'По выражению cron')], default='monthly', max_length=16)),
+                ('interval', models.PositiveSmallIntegerField(default=1)),
+                ('cron', models.CharField(blank=True, max_length=64)),
+                ('start_date', models.DateField(default=django.utils.timezone.now)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='recurring_operations', to='dds.category')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='recurring_operations', to='dds.operationstatus')),
+                ('subcategory', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='recurring_operations', to='dds.subcategory')),
+                ('type', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='recurring_operations', to='dds.operationtype')),
+            ],
+            options={
+                'verbose_name': 'Регулярная запись ДДС',
+                'verbose_name_plural': 'Регулярные записи ДДС',
+                'ordering': ['name', 'id'],
+            },
+        ),
+        # SQLite пересоздает dds_operation ради уникального ограничения — триггеры правил снимаем на это время
+        migrations.RunPython(drop_sqlite_triggers, add_sqlite_triggers),
+        migrations.AddField(
+            model_name='operation',
+            name='recurring_template',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='operations', to='dds.recurringoperation'),
+        ),
+        migrations.AddConstraint(
+            model_name='operation',
+            constraint=models.UniqueConstraint(fields=('recurring_template', 'date'), name='dds_op_recurring_date_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='recurringoperation',
+            constraint=models.CheckConstraint(condition=models.Q(('amount__gt', 0)), name='dds_recurring_amount_positive'),
+        ),
+        migrations.RunPython(add_sqlite_triggers, drop_sqlite_triggers),
+    ]
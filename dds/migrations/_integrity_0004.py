@@ -0,0 +1,86 @@
+"""
+SQL ограничений записи ДДС в том виде, в каком его добавила миграция 0004 (и пересоздает 0007 в SQLite).
+
+Копия, а не импорт из dds.constraints: миграции не зависят от кода приложения, который может меняться,
+и всегда воспроизводят ту же схему. Загрузчик миграций модули с «_» в начале имени пропускает.
+"""
+
+CATEGORY_TYPE_FK = 'dds_op_category_type_fk'
+SUBCATEGORY_CATEGORY_FK = 'dds_op_subcategory_category_fk'
+
+# Postgres: составные внешние ключи на уникальные (id, type_id) категории и (id, category_id) подкатегории
+POSTGRES_FOREIGN_KEYS = [
+    (CATEGORY_TYPE_FK, '(category_id, type_id)', 'dds_category (id, type_id)'),
+    (SUBCATEGORY_CATEGORY_FK, '(subcategory_id, category_id)', 'dds_subcategory (id, category_id)'),
+]
+
+# SQLite: те же правила триггерами; текст RAISE — имя ограничения
+SQLITE_TRIGGERS = {
+    'dds_op_category_type_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS dds_op_category_type_insert BEFORE INSERT ON dds_operation
+        WHEN NOT EXISTS (SELECT 1 FROM dds_category WHERE id = NEW.category_id AND type_id = NEW.type_id)
+        BEGIN SELECT RAISE(ABORT, '{CATEGORY_TYPE_FK}'); END
+    """,
+    'dds_op_category_type_update': f"""
+        CREATE TRIGGER IF NOT EXISTS dds_op_category_type_update BEFORE UPDATE OF category_id, type_id ON dds_operation
+        WHEN NOT EXISTS (SELECT 1 FROM dds_category WHERE id = NEW.category_id AND type_id = NEW.type_id)
+        BEGIN SELECT RAISE(ABORT, '{CATEGORY_TYPE_FK}'); END
+    """,
+    'dds_op_subcategory_category_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS dds_op_subcategory_category_insert BEFORE INSERT ON dds_operation
+        WHEN NOT EXISTS (SELECT 1 FROM dds_subcategory WHERE id = NEW.subcategory_id AND category_id = NEW.category_id)
+        BEGIN SELECT RAISE(ABORT, '{SUBCATEGORY_CATEGORY_FK}'); END
+    """,
+    'dds_op_subcategory_category_update': f"""
+        CREATE TRIGGER IF NOT EXISTS dds_op_subcategory_category_update
+        BEFORE UPDATE OF subcategory_id, category_id ON dds_operation
+        WHEN NOT EXISTS (SELECT 1 FROM dds_subcategory WHERE id = NEW.subcategory_id AND category_id = NEW.category_id)
+        BEGIN SELECT RAISE(ABORT, '{SUBCATEGORY_CATEGORY_FK}'); END
+    """,
+    'dds_category_type_in_use': f"""
+        CREATE TRIGGER IF NOT EXISTS dds_category_type_in_use BEFORE UPDATE OF type_id ON dds_category
+        WHEN NEW.type_id != OLD.type_id AND EXISTS (SELECT 1 FROM dds_operation WHERE category_id = OLD.id)
+        BEGIN SELECT RAISE(ABORT, '{CATEGORY_TYPE_FK}'); END
+    """,
+    'dds_subcategory_category_in_use': f"""
+        CREATE TRIGGER IF NOT EXISTS dds_subcategory_category_in_use BEFORE UPDATE OF category_id ON dds_subcategory
+        WHEN NEW.category_id != OLD.category_id AND EXISTS (SELECT 1 FROM dds_operation WHERE subcategory_id = OLD.id)
+        BEGIN SELECT RAISE(ABORT, '{SUBCATEGORY_CATEGORY_FK}'); END
+    """,
+}
+
+
+def add_relation_constraints(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for name, columns, target in POSTGRES_FOREIGN_KEYS:
+            schema_editor.execute(
+                f'ALTER TABLE dds_operation ADD CONSTRAINT {name} FOREIGN KEY {columns} REFERENCES {target}'
+            )
+    elif vendor == 'sqlite':
+        add_sqlite_triggers(apps, schema_editor)
+
+
+def drop_relation_constraints(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for name, _, _ in POSTGRES_FOREIGN_KEYS:
+            schema_editor.execute(f'ALTER TABLE dds_operation DROP CONSTRAINT {name}')
+    elif vendor == 'sqlite':
+        drop_sqlite_triggers(apps, schema_editor)
+
+
+def drop_sqlite_triggers(apps, schema_editor):
+    """
+    Перед пересозданием dds_operation в миграции (SQLite): триггеры других таблиц ссылаются на нее,
+    и SQLite не даст переименовать новую таблицу на место старой. Вернуть — add_sqlite_triggers().
+    """
+    if schema_editor.connection.vendor == 'sqlite':
+        for name in SQLITE_TRIGGERS:
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+def add_sqlite_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQLITE_TRIGGERS.values():
+            schema_editor.execute(sql)
@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from datetime import timedelta
 from decimal import Decimal
 
 
@@ -26,7 +27,16 @@ class OperationType(models.Model):
     Тип операции: направление движения денег.
     Примеры: «Пополнение» (приход), «Списание» (расход).
     """
+    INCOME = 'income'
+    EXPENSE = 'expense'
+    DIRECTION_CHOICES = [
+        (INCOME, 'Приход'),
+        (EXPENSE, 'Расход'),
+    ]
+
     name = models.CharField(max_length=64, unique=True)
+    # Направление нужно отчетам: чистый поток = приходы − расходы
+    direction = models.CharField('Направление', max_length=16, choices=DIRECTION_CHOICES, default=EXPENSE)
 
     class Meta:
         verbose_name = "Тип операции"
@@ -51,6 +61,8 @@ class Category(models.Model):
     class Meta:
         # Запрещаем дублировать одинаковые названия в рамках одного типа
         unique_together = ('name', 'type')
+        # Цель составного внешнего ключа записей (category_id, type_id), см. Operation.Meta
+        constraints = [models.UniqueConstraint(fields=['id', 'type'], name='dds_category_id_type_uniq')]
         verbose_name = "Категория"
         verbose_name_plural = "Категории"
         # Сортировка сначала по типу, затем по названию — удобнее в выпадающих списках
@@ -72,6 +84,8 @@ class Subcategory(models.Model):
 
     class Meta:
         unique_together = ('name', 'category')
+        # Цель составного внешнего ключа записей (subcategory_id, category_id)
+        constraints = [models.UniqueConstraint(fields=['id', 'category'], name='dds_subcat_id_category_uniq')]
         verbose_name = "Подкатегория"
         verbose_name_plural = "Подкатегории"
         ordering = ['category__type__name', 'category__name', 'name']
@@ -101,15 +115,64 @@ class Operation(models.Model):
     # Необязательное текстовое поле
     comment = models.TextField(blank=True)
 
+    # Шаблон, из которого запись создана (dds.recurring); заполняется только материализацией.
+    # PROTECT — шаблон с записями не удаляют, а выключают (is_active, end_date): по ссылке
+    # материализация узнает уже созданные даты. Отдельный индекс не нужен — его заменяет
+    # уникальное ограничение (recurring_template, date).
+    recurring_template = models.ForeignKey(
+        'RecurringOperation', on_delete=models.PROTECT, null=True, blank=True, editable=False,
+        related_name='operations', db_index=False,
+    )
+
     # Технические поля аудита
     created_at = models.DateTimeField(auto_now_add=True)  # устанавливается при создании
     updated_at = models.DateTimeField(auto_now=True)      # обновляется при каждом сохранении
 
+    # Сообщения правил — общие для clean() и ошибок ограничений БД (см. dds.constraints)
+    AMOUNT_ERROR = 'Сумма должна быть положительной.'
+    CATEGORY_ERROR = 'Категория должна соответствовать выбранному типу.'
+    SUBCATEGORY_ERROR = 'Подкатегория должна соответствовать выбранной категории.'
+
     class Meta:
         verbose_name = "Запись ДДС"
         verbose_name_plural = "Записи ДДС"
         # Сначала свежие по дате, внутри — по убыванию id
         ordering = ['-date', '-id']
+        # Под шаблоны доступа списка (OperationFilter + сортировка по ordering, keyset по (date, id)):
+        # диапазон дат и «первая страница» читаются по индексу без сортировки всей выборки.
+        # Составные индексы с ведущим справочником — для фильтра «статус/тип/категория + период».
+        # Подкатегория селективна сама по себе — ей достаточно индекса внешнего ключа.
+        # Проверка планов и латентности: python manage.py bench_queries
+        indexes = [
+            models.Index(fields=['-date', '-id'], name='dds_op_date_id_idx'),
+            models.Index(fields=['status', '-date', '-id'], name='dds_op_status_date_idx'),
+            models.Index(fields=['type', '-date', '-id'], name='dds_op_type_date_idx'),
+            models.Index(fields=['category', '-date', '-id'], name='dds_op_category_date_idx'),
+            # Лента изменений (GET /api/operations/changes/, dds.changes) идет по ключу (updated_at, id)
+            models.Index(fields=['updated_at', 'id'], name='dds_op_updated_id_idx'),
+        ]
+        # Правила clean() продублированы в БД — их не обойти ни update(), ни bulk_create, ни сырым SQL.
+        # Сумма — CHECK; согласованность тип/категория/подкатегория — составными FK на (id, type_id)
+        # категории и (id, category_id) подкатегории в Postgres или триггерами в SQLite (миграция 0004).
+        constraints = [
+            models.CheckConstraint(condition=models.Q(amount__gt=0), name='dds_op_amount_positive'),
+            # Одна запись шаблона на дату — повторная материализация не создает дублей
+            models.UniqueConstraint(fields=['recurring_template', 'date'], name='dds_op_recurring_date_uniq'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Значения из БД нужны сигналам дневного агрегата: при изменении даты/справочников
+        # сумма переносится из старой корзины в новую без повторного SELECT
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Запись и обновление дневного агрегата (сигнал post_save) — в одной транзакции
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
 
     def clean(self) -> None:
         """
@@ -120,15 +183,269 @@ class Operation(models.Model):
         """
         # 1) Сумма должна быть положительной
         if self.amount is None or self.amount <= Decimal('0'):
-            raise ValidationError({'amount': 'Сумма должна быть положительной.'})
+            raise ValidationError({'amount': self.AMOUNT_ERROR})
+
+        self.clean_relations()
+
+    def clean_relations(self) -> None:
+        """
+        Правила 2 и 3 из clean(): согласованность тип -> категория -> подкатегория.
+        Отдельно — для пакетного изменения записей (dds.bulk_edit), где сумма может не меняться.
+        """
+        # Связи справочников сверяем по id через снимок в памяти (dds.taxonomy),
+        # а не через self.category.type_id — это SELECT на каждую незагруженную связь.
+        # Значения, которого еще нет в снимке, здесь не проверяем: правила продублированы
+        # ограничениями БД (Operation.Meta), нарушение вернется той же ошибкой поля (dds.constraints).
+        # Локальный импорт: модуль taxonomy сам импортирует модели.
+        from .taxonomy import get_taxonomy
+        taxonomy = get_taxonomy()
 
         # 2) Категория должна относиться к выбранному типу
-        if self.category and self.type and self.category.type_id != self.type_id:
-            raise ValidationError({'category': 'Категория должна соответствовать выбранному типу.'})
+        if self.category_id and self.type_id:
+            category_type_id = taxonomy.category_type_id(self.category_id)
+            if category_type_id is not None and category_type_id != self.type_id:
+                raise ValidationError({'category': self.CATEGORY_ERROR})
 
         # 3) Подкатегория должна относиться к выбранной категории
-        if self.subcategory and self.category and self.subcategory.category_id != self.category_id:
-            raise ValidationError({'subcategory': 'Подкатегория должна соответствовать выбранной категории.'})
+        if self.subcategory_id and self.category_id:
+            subcategory_category_id = taxonomy.subcategory_category_id(self.subcategory_id)
+            if subcategory_category_id is not None and subcategory_category_id != self.category_id:
+                raise ValidationError({'subcategory': self.SUBCATEGORY_ERROR})
 
     def __str__(self):
         return f"{self.date} {self.type}/{self.category}/{self.subcategory} {self.amount}"
+
+
+class RecurringOperation(models.Model):
+    """
+    Шаблон регулярной записи ДДС (аренда, зарплата, счета за серверы): те же справочники, сумма
+    и комментарий, что у Operation, плюс расписание. Записи по шаблону создает материализация
+    (dds.recurring, `manage.py materialize_recurring`, POST /api/recurring/materialize/).
+    Расписание отсчитывается от start_date:
+      - monthly — каждые interval месяцев в число start_date (31-е в коротких месяцах — последний день);
+      - weekly — каждые interval недель в день недели start_date;
+      - cron — поля cron «день_месяца месяц день_недели» (или полные 5 полей, минуты и часы не учитываются).
+    """
+    MONTHLY = 'monthly'
+    WEEKLY = 'weekly'
+    CRON = 'cron'
+    SCHEDULE_CHOICES = [
+        (MONTHLY, 'Ежемесячно'),
+        (WEEKLY, 'Еженедельно'),
+        (CRON, 'По выражению cron'),
+    ]
+
+    name = models.CharField(max_length=128)
+
+    status = models.ForeignKey(OperationStatus, on_delete=models.PROTECT, related_name='recurring_operations')
+    type = models.ForeignKey(OperationType, on_delete=models.PROTECT, related_name='recurring_operations')
+    category = models.ForeignKey(Category, on_delete=models.PROTECT, related_name='recurring_operations')
+    subcategory = models.ForeignKey(Subcategory, on_delete=models.PROTECT, related_name='recurring_operations')
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    comment = models.TextField(blank=True)
+
+    schedule = models.CharField(max_length=16, choices=SCHEDULE_CHOICES, default=MONTHLY)
+    interval = models.PositiveSmallIntegerField(default=1)
+    cron = models.CharField(max_length=64, blank=True)
+    start_date = models.DateField(default=timezone.now)
+    # Включительно; пусто — бессрочно
+    end_date = models.DateField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Регулярная запись ДДС"
+        verbose_name_plural = "Регулярные записи ДДС"
+        ordering = ['name', 'id']
+        constraints = [
+            models.CheckConstraint(condition=models.Q(amount__gt=0), name='dds_recurring_amount_positive'),
+        ]
+
+    def operation(self, date=None):
+        """Несохраненная запись ДДС по шаблону на дату date (связи — по id, без загрузки справочников)."""
+        return Operation(
+            date=date, status_id=self.status_id, type_id=self.type_id, category_id=self.category_id,
+            subcategory_id=self.subcategory_id, amount=self.amount, comment=self.comment,
+            recurring_template_id=self.pk,
+        )
+
+    def clean(self) -> None:
+        """Правила записи ДДС (Operation.clean()) плюс корректность расписания."""
+        # Локальный импорт: модуль recurring сам импортирует модели
+        from .recurring import parse_schedule
+
+        self.operation(self.start_date).clean()
+        if self.end_date is not None and self.start_date is not None and self.end_date < self.start_date:
+            raise ValidationError({'end_date': 'Дата окончания раньше даты начала.'})
+        parse_schedule(self)
+
+    def __str__(self):
+        return f"{self.name} ({self.get_schedule_display()}, {self.amount})"
+
+
+class OperationTombstone(models.Model):
+    """
+    Журнал удалений записей ДДС для ленты изменений (dds.changes): id удаленной записи и момент удаления.
+    Пишется сигналом post_delete и пакетным удалением; старше DDS_TOMBSTONE_RETENTION_DAYS — удаляется
+    командой `manage.py prune_tombstones`.
+    """
+    # Не внешний ключ: записи уже нет
+    operation_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Удаленная запись ДДС"
+        verbose_name_plural = "Удаленные записи ДДС"
+        ordering = ['deleted_at', 'operation_id']
+        indexes = [
+            models.Index(fields=['deleted_at', 'operation_id'], name='dds_tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.operation_id} ({self.deleted_at:%Y-%m-%d %H:%M:%S})"
+
+
+class OperationDailyRollup(models.Model):
+    """
+    Дневной агрегат записей ДДС: сумма и количество по корзине
+    (дата, статус, тип, категория, подкатегория).
+    Поддерживается инкрементально (dds.rollups, сигналы и пакетные пути),
+    пересобирается/сверяется командой `manage.py rebuild_rollups`.
+    Отчеты читают отсюда — стоимость зависит от числа корзин, а не записей.
+    """
+    date = models.DateField()
+    # CASCADE: корзина без записей не имеет смысла, а значения справочников
+    # с живыми записями и так защищены PROTECT в Operation
+    status = models.ForeignKey(OperationStatus, on_delete=models.CASCADE, related_name='+')
+    type = models.ForeignKey(OperationType, on_delete=models.CASCADE, related_name='+')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    subcategory = models.ForeignKey(Subcategory, on_delete=models.CASCADE, related_name='+')
+
+    # Сумма по корзине может превышать сумму одной записи — берем запас по разрядам
+    total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Дневной агрегат ДДС"
+        verbose_name_plural = "Дневные агрегаты ДДС"
+        unique_together = ('date', 'status', 'type', 'category', 'subcategory')
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.date} {self.type_id}/{self.category_id}/{self.subcategory_id}: {self.total} ({self.count})"
+
+
+class ClosedPeriodQuerySet(models.QuerySet):
+    def closed_through(self):
+        """Последний день последнего закрытого месяца (или None, если закрытых периодов нет)."""
+        last = self.order_by('-month').values_list('month', flat=True).first()
+        if last is None:
+            return None
+        return ClosedPeriod.month_end(last)
+
+
+class ClosedPeriod(models.Model):
+    """
+    Закрытый месяц. Месяцы закрываются строго по порядку, поэтому закрыто все,
+    что не позже ClosedPeriod.objects.closed_through().
+    При закрытии на конец месяца сохраняются остатки по статусам (BalanceSnapshot);
+    записи закрытых месяцев менять и удалять нельзя.
+    """
+    # Первое число закрытого месяца
+    month = models.DateField(unique=True)
+    closed_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ClosedPeriodQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Закрытый период"
+        verbose_name_plural = "Закрытые периоды"
+        ordering = ['month']
+
+    @staticmethod
+    def month_end(month):
+        next_month = (month.replace(day=1) + timedelta(days=32)).replace(day=1)
+        return next_month - timedelta(days=1)
+
+    def __str__(self):
+        return self.month.strftime('%Y-%m')
+
+
+class BalanceSnapshot(models.Model):
+    """
+    Остаток (накопленный чистый поток с начала учета) на конец закрытого месяца по статусу.
+    Общий остаток — сумма по всем статусам периода.
+    """
+    period = models.ForeignKey(ClosedPeriod, on_delete=models.CASCADE, related_name='snapshots')
+    status = models.ForeignKey(OperationStatus, on_delete=models.CASCADE, related_name='+')
+    balance = models.DecimalField(max_digits=18, decimal_places=2)
+
+    class Meta:
+        verbose_name = "Остаток на конец периода"
+        verbose_name_plural = "Остатки на конец периода"
+        unique_together = ('period', 'status')
+
+    def __str__(self):
+        return f"{self.period} {self.status_id}: {self.balance}"
+
+
+class Job(models.Model):
+    """
+    Фоновая задача (dds.jobs): выгрузка, импорт или отчет, выполняемые воркером `manage.py run_jobs`
+    вне веб-запроса. Воркеры забирают задачи SELECT ... FOR UPDATE SKIP LOCKED; результат — файл
+    в MEDIA_ROOT (jobs/), прогресс — progress из total строк.
+    """
+    EXPORT = 'export'
+    IMPORT = 'import'
+    CASHFLOW = 'cashflow'
+    KIND_CHOICES = [
+        (EXPORT, 'Выгрузка записей'),
+        (IMPORT, 'Импорт записей'),
+        (CASHFLOW, 'Отчет ДДС'),
+    ]
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    ]
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED)
+    # Параметры запроса, из которого создана задача (фильтры, формат, режим импорта)
+    params = models.JSONField(default=dict, blank=True)
+    # Тело импорта как пришло в запросе — разбирается уже воркером
+    source = models.FileField(upload_to='jobs/source/', blank=True)
+    result = models.FileField(upload_to='jobs/result/', blank=True)
+    # Итог в JSON (отчет импорта, число строк выгрузки) или текст ошибки
+    summary = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    progress = models.PositiveBigIntegerField(default=0)
+    total = models.PositiveBigIntegerField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Обновляется вместе с прогрессом: задача без пульса дольше DDS_JOB_STALE_SECONDS — воркер упал
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        ordering = ['-id']
+        indexes = [
+            # Выборка очереди воркером: status = queued ORDER BY id
+            models.Index(fields=['status', 'id'], name='dds_job_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.get_status_display()})"
@@ -0,0 +1,199 @@
+import base64
+import json
+from datetime import date
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def capped_count(queryset, cap):
+    """
+    COUNT(*) по подзапросу с LIMIT cap + 1: стоимость ограничена cap строками,
+    сколько бы записей ни было в выборке. Возвращает (count, exact).
+    """
+    count = queryset.order_by()[:cap + 1].count()
+    return min(count, cap), count <= cap
+
+
+def estimate_count(queryset, cap):
+    """
+    Оценка количества строк без сканирования.
+    На Postgres — оценка планировщика (Plan Rows из EXPLAIN), на остальных БД — capped_count().
+    Возвращает (count, exact).
+    """
+    if connections[queryset.db].vendor == 'postgresql':
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows']), False
+    return capped_count(queryset, cap)
+
+
+def table_estimate(model, using):
+    """Число строк таблицы по статистике Postgres (pg_class.reltuples) или None, если ANALYZE еще не было."""
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator для админки без COUNT(*) по большим выборкам.
+    Postgres: без фильтров — reltuples из статистики таблицы, с фильтрами — оценка планировщика (estimate_count);
+    оценка меньше exact_below (или статистики нет) — обычный точный COUNT, он на таких объемах дешев.
+    Остальные СУБД — capped_count(): точно до exact_below строк, дальше — exact_below.
+    """
+    exact_below = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super().count
+        if connections[queryset.db].vendor != 'postgresql':
+            return capped_count(queryset, self.exact_below)[0]
+        if queryset.query.has_filters():
+            estimate = estimate_count(queryset, self.exact_below)[0]
+        else:
+            estimate = table_estimate(queryset.model, queryset.db)
+        if estimate is None or estimate < self.exact_below:
+            return super().count
+        return estimate
+
+
+class KeysetPagination(BasePagination):
+    """
+    Курсорная (keyset) пагинация записей ДДС по ключу (date, id) — тот же порядок,
+    что Operation.Meta.ordering = ['-date', '-id'].
+    Страница выбирается условием WHERE по ключу последней/первой строки,
+    поэтому стоимость не зависит от глубины и нет COUNT(*) на каждый запрос.
+
+    Параметры запроса:
+      ?cursor=...            — непрозрачный курсор из next/previous;
+      ?page_size=N           — размер страницы (до max_page_size);
+      ?count=capped|estimated — добавить в ответ примерное количество записей.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    max_page_size = 1000
+    # Верхняя граница для count=capped (и для оценки на БД без EXPLAIN-статистики)
+    count_cap = 10000
+
+    def __init__(self):
+        self.page_size = api_settings.PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        queryset = queryset.order_by('-date', '-id')
+        page_queryset = queryset
+        if position is not None:
+            key_date, key_id = position
+            if reverse:
+                # (date, id) > ключа, в обратном порядке; диапазон по date — чтобы работал индекс
+                page_queryset = (
+                    queryset.filter(date__gte=key_date).exclude(date=key_date, id__lte=key_id)
+                    .order_by('date', 'id')
+                )
+            else:
+                page_queryset = queryset.filter(date__lte=key_date).exclude(date=key_date, id__gte=key_id)
+
+        rows = list(page_queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.first_key = (rows[0].date, rows[0].id) if rows else position
+        self.last_key = (rows[-1].date, rows[-1].id) if rows else position
+        self.count, self.count_exact = self.get_count(queryset, request)
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'capped':
+            return capped_count(queryset, self.count_cap)
+        if mode == 'estimated':
+            return estimate_count(queryset, self.count_cap)
+        return None, None
+
+    def decode_cursor(self, request):
+        """Курсор: base64('n|YYYY-MM-DD|id') — направление (n — вперед, p — назад) и ключ строки."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            direction, key_date, key_id = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii').split('|')
+            if direction not in ('n', 'p'):
+                raise ValueError(direction)
+            return (date.fromisoformat(key_date), int(key_id)), direction == 'p'
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound('Неверный курсор.')
+
+    def encode_cursor(self, key, reverse):
+        raw = '|'.join(['p' if reverse else 'n', key[0].isoformat(), str(key[1])])
+        cursor = base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if not self.has_next or self.last_key is None:
+            return None
+        return self.encode_cursor(self.last_key, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_key is None:
+            return None
+        return self.encode_cursor(self.first_key, reverse=True)
+
+    def get_paginated_response(self, data):
+        payload = {'next': self.get_next_link(), 'previous': self.get_previous_link()}
+        if self.count is not None:
+            payload['count'] = self.count
+            payload['count_exact'] = self.count_exact
+        payload['results'] = data
+        return Response(payload)
+
+
+class OperationPagination(PageNumberPagination):
+    """
+    Пагинация списка записей ДДС.
+    По умолчанию — стандартная постраничная (?page=N), как и у остальных эндпоинтов.
+    Keyset-режим (KeysetPagination) включается параметром ?pagination=cursor
+    или наличием ?cursor=... — ссылки next/previous в этом режиме уже содержат курсор.
+    """
+    mode_query_param = 'pagination'
+
+    def __init__(self):
+        self.keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (request.query_params.get(self.mode_query_param) == 'cursor'
+                or KeysetPagination.cursor_query_param in request.query_params):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
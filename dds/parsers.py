@@ -0,0 +1,50 @@
+import codecs
+import csv
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class CSVParser(BaseParser):
+    """
+    Разбирает CSV с заголовком в список словарей (по строке на словарь).
+    Имена колонок совпадают с полями записи: date, status_id, type_id, ...
+    """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        # utf-8-sig — чтобы BOM из выгрузок Excel не попадал в имя первой колонки
+        if codecs.lookup(encoding).name == 'utf-8':
+            encoding = 'utf-8-sig'
+        try:
+            reader = csv.DictReader(codecs.getreader(encoding)(stream))
+            return [dict(row) for row in reader]
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ParseError(f'CSV parse error - {exc}')
+
+
+class NDJSONParser(BaseParser):
+    """
+    Разбирает NDJSON (JSON Lines): один JSON-объект на строку, пустые строки пропускаются.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        rows = []
+        lineno = 0
+        try:
+            for line in codecs.getreader(encoding)(stream):
+                lineno += 1
+                line = line.strip()
+                if not line:
+                    continue
+                rows.append(json.loads(line))
+        except ValueError as exc:
+            raise ParseError(f'NDJSON parse error on line {lineno} - {exc}')
+        return rows
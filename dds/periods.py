@@ -0,0 +1,180 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, Sum, When
+from django.db.models.functions import TruncDay, TruncMonth
+from django.utils import timezone
+
+from .models import BalanceSnapshot, ClosedPeriod, Operation, OperationDailyRollup, OperationType
+from .reports import MONEY, money
+
+# Гранулярность ряда остатков
+BALANCE_PERIODS = {
+    'day': TruncDay,
+    'month': TruncMonth,
+}
+
+_UNSET = object()
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(month):
+    return ClosedPeriod.month_end(month) + timedelta(days=1)
+
+
+def as_date(value):
+    """Значение поля Operation.date (date, datetime из default=timezone.now, строка) -> date."""
+    return Operation._meta.get_field('date').to_python(value)
+
+
+def check_open(*dates, closed=_UNSET):
+    """
+    Проверяет, что ни одна из дат не попадает в закрытый период (None пропускаются).
+    closed — заранее полученная граница (для пакетных путей), иначе берется из БД.
+    """
+    dates = [as_date(d) for d in dates if d is not None]
+    if not dates:
+        return
+    if closed is _UNSET:
+        closed = ClosedPeriod.objects.closed_through()
+    if closed is not None and min(dates) <= closed:
+        raise ValidationError({
+            'date': f'Период закрыт: записи по {closed.isoformat()} включительно изменять нельзя.'
+        })
+
+
+def signed_total():
+    """Чистый поток корзины агрегата: приход со знаком «+», расход — со знаком «−»."""
+    return Case(
+        When(type__direction=OperationType.INCOME, then=F('total')),
+        default=-F('total'),
+        output_field=MONEY,
+    )
+
+
+def _rollups(date_from=None, date_to=None, status=None):
+    queryset = OperationDailyRollup.objects.order_by()
+    if date_from is not None:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to is not None:
+        queryset = queryset.filter(date__lte=date_to)
+    if status is not None:
+        queryset = queryset.filter(status=status)
+    return queryset
+
+
+def net_by_status(date_from=None, date_to=None, status=None):
+    """Чистый поток за интервал дат по статусам: {status_id: Decimal}."""
+    rows = (
+        _rollups(date_from, date_to, status)
+        .values('status_id')
+        .annotate(net=Sum(signed_total()))
+        .values_list('status_id', 'net')
+    )
+    return {status_id: net or Decimal('0') for status_id, net in rows}
+
+
+def close_period(month):
+    """
+    Закрыть месяц: сохранить остатки по статусам на его конец.
+    Месяцы закрываются по порядку, поэтому остаток = остаток предыдущего закрытого месяца
+    + чистый поток за этот месяц (для первого закрытия — поток с начала учета).
+    """
+    month = month_start(month)
+    if month >= month_start(timezone.localdate()):
+        raise ValidationError({'month': 'Закрыть можно только завершившийся месяц.'})
+
+    with transaction.atomic():
+        last = ClosedPeriod.objects.select_for_update().order_by('-month').first()
+        if last is not None and month != next_month(last.month):
+            expected = next_month(last.month).strftime('%Y-%m')
+            raise ValidationError({'month': f'Месяцы закрываются по порядку: следующий — {expected}.'})
+
+        balances = defaultdict(Decimal)
+        if last is not None:
+            for snapshot in last.snapshots.all():
+                balances[snapshot.status_id] += snapshot.balance
+        flows = net_by_status(date_from=month if last is not None else None, date_to=ClosedPeriod.month_end(month))
+        for status_id, net in flows.items():
+            balances[status_id] += net
+
+        period = ClosedPeriod.objects.create(month=month)
+        BalanceSnapshot.objects.bulk_create([
+            BalanceSnapshot(period=period, status_id=status_id, balance=balance)
+            for status_id, balance in balances.items()
+        ])
+    return period
+
+
+def reopen_period(period):
+    """Открыть месяц обратно — только последний закрытый, чтобы остатки оставались непрерывными."""
+    if ClosedPeriod.objects.filter(month__gt=period.month).exists():
+        raise ValidationError({'month': 'Открыть можно только последний закрытый месяц.'})
+    period.delete()
+
+
+def balance_at(day, status=None):
+    """
+    Остатки по статусам на конец дня day: {status_id: Decimal}.
+    Стоимость — поиск последнего снимка до day + суммирование агрегата за открытый хвост.
+    """
+    # Последний месяц, целиком завершившийся к концу day
+    cutoff = month_start(day) if day == ClosedPeriod.month_end(day) else month_start(month_start(day) - timedelta(days=1))
+    period = ClosedPeriod.objects.filter(month__lte=cutoff).order_by('-month').first()
+
+    balances = defaultdict(Decimal)
+    date_from = None
+    if period is not None:
+        snapshots = period.snapshots.all()
+        if status is not None:
+            snapshots = snapshots.filter(status=status)
+        for snapshot in snapshots:
+            balances[snapshot.status_id] += snapshot.balance
+        date_from = ClosedPeriod.month_end(period.month) + timedelta(days=1)
+    for status_id, net in net_by_status(date_from, day, status).items():
+        balances[status_id] += net
+    return dict(balances)
+
+
+def running_balance(period='day', date_from=None, date_to=None, status=None, by_status=False):
+    """
+    Ряд остатков по дням/месяцам: чистый поток периода и остаток на его конец.
+    Начальный остаток берется из balance_at(date_from − 1 день), дальше — накопительная сумма
+    по сгруппированному агрегату (одна строка на период/статус).
+    """
+    opening = balance_at(date_from - timedelta(days=1), status) if date_from is not None else {}
+
+    fields = ['status_id', 'status__name'] if by_status else []
+    rows = (
+        _rollups(date_from, date_to, status)
+        .annotate(period=BALANCE_PERIODS[period]('date'))
+        .values('period', *fields)
+        .annotate(net=Sum(signed_total()))
+        .order_by('period', *fields)
+    )
+
+    if by_status:
+        running = defaultdict(Decimal, opening)
+    else:
+        running = {None: sum(opening.values(), Decimal('0'))}
+    results = []
+    for row in rows:
+        key = row['status_id'] if by_status else None
+        running[key] += row['net'] or Decimal('0')
+        item = {'period': row['period'].isoformat()}
+        if by_status:
+            item.update({'status_id': row['status_id'], 'status': row['status__name']})
+        item.update({'net': money(row['net']), 'balance': money(running[key])})
+        results.append(item)
+
+    if by_status:
+        opening_balance = {status_id: money(value) for status_id, value in opening.items()}
+    else:
+        opening_balance = money(sum(opening.values(), Decimal('0')))
+    return opening_balance, results
@@ -0,0 +1,257 @@
+"""
+Регулярные записи ДДС: шаблоны (RecurringOperation) и их материализация в записи Operation.
+
+materialize() за один проход разворачивает все действующие шаблоны на интервал дат:
+  1) шаблоны — одним запросом (с блокировкой строк: параллельный запуск по тем же шаблонам ждет);
+  2) уже созданные по ним записи интервала — одним запросом пар (шаблон, дата);
+  3) правила Operation.clean() проверяются на объектах в памяти по снимку справочников (dds.taxonomy) —
+     один раз на шаблон, от даты они не зависят; даты закрытых периодов пропускаются;
+  4) новые записи вставляются bulk_create пачками, дневной агрегат — по корзинам в той же транзакции.
+Повторный запуск на тот же интервал ничего не создает: даты, по которым запись шаблона уже есть,
+пропускаются, а уникальное ограничение (recurring_template, date) не пропустит дубль и при гонке.
+"""
+import calendar
+from datetime import date, timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Operation, RecurringOperation
+from .rollups import RollupDelta
+from .taxonomy import bump_operations_version, pinned
+
+# Имена месяцев и дней недели в выражениях cron
+MONTH_NAMES = {name: number for number, name in enumerate(
+    ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC'], start=1)}
+WEEKDAY_NAMES = {name: number for number, name in enumerate(['SUN', 'MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT'])}
+
+CRON_ERROR = 'Ожидается «день_месяца месяц день_недели» (или 5 полей cron): *, числа, диапазоны a-b, шаг /n, списки через запятую.'
+
+
+def _month_index(day):
+    return day.year * 12 + day.month - 1
+
+
+def _month_day(index, day):
+    """Дата в месяце index (год * 12 + месяц − 1) с числом day; если такого числа нет — последний день месяца."""
+    year, month = divmod(index, 12)
+    month += 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+class MonthlySchedule:
+    """Каждые interval месяцев в число start (31-е в коротких месяцах — последний день месяца)."""
+
+    def __init__(self, start, interval):
+        self.start = start
+        self.interval = interval
+
+    def dates(self, date_from, date_to):
+        offset = max(_month_index(date_from) - _month_index(self.start), 0)
+        offset += -offset % self.interval
+        while True:
+            day = _month_day(_month_index(self.start) + offset, self.start)
+            if day > date_to:
+                return
+            if day >= date_from:
+                yield day
+            offset += self.interval
+
+
+class WeeklySchedule:
+    """Каждые interval недель в день недели start."""
+
+    def __init__(self, start, interval):
+        self.start = start
+        self.step = 7 * interval
+
+    def dates(self, date_from, date_to):
+        offset = max((date_from - self.start).days, 0)
+        day = self.start + timedelta(days=offset + -offset % self.step)
+        while day <= date_to:
+            yield day
+            day += timedelta(days=self.step)
+
+
+class CronSchedule:
+    """
+    Поля cron для дат: день месяца (1–31, L — последний день), месяц (1–12, JAN–DEC),
+    день недели (0–7, 0 и 7 — воскресенье, SUN–SAT). Как в cron: если ограничены и день месяца,
+    и день недели, подходит дата, совпавшая с любым из них.
+    """
+
+    def __init__(self, expression):
+        fields = expression.upper().split()
+        if len(fields) == 5:
+            # Минуты и часы: записи ДДС — по дням, проверяем только синтаксис
+            for text, low, high in zip(fields[:2], (0, 0), (59, 23)):
+                self.parse_field(text, low, high)
+            fields = fields[2:]
+        if len(fields) != 3:
+            raise ValidationError({'cron': CRON_ERROR})
+        days, months, weekdays = fields
+        self.last_day = 'L' in days.split(',')
+        days = ','.join(item for item in days.split(',') if item != 'L')
+        self.days = self.parse_field(days, 1, 31) if days else set()
+        self.months = self.parse_field(months, 1, 12, MONTH_NAMES)
+        self.weekdays = {value % 7 for value in self.parse_field(weekdays, 0, 7, WEEKDAY_NAMES)}
+        self.any_day = days.startswith('*')
+        self.any_weekday = weekdays.startswith('*')
+
+    @staticmethod
+    def parse_field(text, low, high, names=None):
+        values = set()
+        for item in text.split(','):
+            base, _, step = item.partition('/')
+            try:
+                step = int(step) if step else 1
+                if base == '*':
+                    first, last = low, high
+                else:
+                    first, _, last = base.partition('-')
+                    first = names.get(first, first) if names else first
+                    last = names.get(last, last) if names else last
+                    first = int(first)
+                    # a/n — от a до конца диапазона, как в cron
+                    last = int(last) if last else (high if '/' in item else first)
+            except ValueError:
+                raise ValidationError({'cron': CRON_ERROR})
+            if step < 1 or not low <= first <= last <= high:
+                raise ValidationError({'cron': f'Значение «{item}» вне диапазона {low}–{high}.'})
+            values.update(range(first, last + 1, step))
+        return values
+
+    def matches(self, day):
+        if day.month not in self.months:
+            return False
+        weekday = (day.weekday() + 1) % 7 in self.weekdays
+        if self.any_day:
+            return weekday
+        month_day = day.day in self.days or (self.last_day and (day + timedelta(days=1)).day == 1)
+        if self.any_weekday:
+            return month_day
+        return month_day or weekday
+
+    def dates(self, date_from, date_to):
+        day = date_from
+        while day <= date_to:
+            if self.matches(day):
+                yield day
+            day += timedelta(days=1)
+
+
+def parse_schedule(template):
+    """Расписание шаблона (объект с dates(date_from, date_to)); ошибка расписания — ValidationError по полю."""
+    if template.schedule == RecurringOperation.CRON:
+        if not template.cron.strip():
+            raise ValidationError({'cron': 'Укажите выражение cron.'})
+        return CronSchedule(template.cron)
+    if not template.interval or template.interval < 1:
+        raise ValidationError({'interval': 'Интервал должен быть не меньше 1.'})
+    if template.schedule == RecurringOperation.WEEKLY:
+        return WeeklySchedule(template.start_date, template.interval)
+    return MonthlySchedule(template.start_date, template.interval)
+
+
+def occurrences(template, date_from=None, date_to=None, schedule=None):
+    """Даты шаблона в интервале [date_from, date_to] с учетом start_date/end_date (date_from=None — с начала)."""
+    schedule = schedule or parse_schedule(template)
+    date_from = max(date_from or template.start_date, template.start_date)
+    if template.end_date is not None:
+        date_to = min(date_to, template.end_date)
+    if date_from > date_to:
+        return []
+    return schedule.dates(date_from, date_to)
+
+
+def due_templates(queryset, date_from, date_to):
+    """Действующие шаблоны, у которых в интервале могут быть даты."""
+    queryset = queryset.filter(is_active=True, start_date__lte=date_to)
+    if date_from is not None:
+        queryset = queryset.filter(Q(end_date__isnull=True) | Q(end_date__gte=date_from))
+    return queryset
+
+
+class MaterializeReport:
+    """Итог материализации: сколько записей создано, сколько дат уже было или в закрытом периоде, ошибки шаблонов."""
+
+    def __init__(self, date_from, date_to, dry_run):
+        self.date_from = date_from
+        self.date_to = date_to
+        self.dry_run = dry_run
+        self.templates = 0
+        self.created = 0
+        self.existing = 0
+        self.closed = 0
+        self.errors = []
+
+    def add_error(self, template, exc):
+        errors = exc.message_dict if hasattr(exc, 'error_dict') else {'non_field_errors': exc.messages}
+        self.errors.append({'template': template.pk, 'name': template.name, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'date_from': self.date_from.isoformat() if self.date_from else None,
+            'date_to': self.date_to.isoformat(),
+            'dry_run': self.dry_run,
+            'templates': self.templates,
+            'created': self.created,
+            'existing': self.existing,
+            'closed': self.closed,
+            'failed': len(self.errors),
+            'errors': self.errors,
+        }
+
+
+def materialize(date_from=None, date_to=None, queryset=None, dry_run=False, batch_size=1000):
+    """
+    Создать записи всех действующих шаблонов (или шаблонов queryset) за [date_from, date_to]:
+    date_from=None — с начала каждого шаблона, date_to=None — по сегодня. dry_run — только посчитать.
+    Шаблон с ошибкой правил или расписания пропускается и попадает в отчет, остальные материализуются.
+    """
+    date_to = date_to or timezone.localdate()
+    if date_from is not None and date_from > date_to:
+        raise ValidationError({'date_from': 'Начало периода позже конца.'})
+    templates_qs = due_templates(RecurringOperation.objects.all() if queryset is None else queryset,
+                                 date_from, date_to)
+    report = MaterializeReport(date_from, date_to, dry_run)
+
+    # Один снимок справочников на весь проход: clean() не перечитывает версии на каждом шаблоне
+    with pinned() as taxonomy, transaction.atomic():
+        templates = list(templates_qs.select_for_update().order_by('pk'))
+        report.templates = len(templates)
+        if not templates:
+            return report
+        existing = set(
+            Operation.objects
+            .filter(recurring_template__in=templates_qs.values('pk'),
+                    date__gte=date_from or min(t.start_date for t in templates), date__lte=date_to)
+            .values_list('recurring_template_id', 'date')
+        )
+        closed = taxonomy.closed_through
+
+        operations = []
+        for template in templates:
+            try:
+                schedule = parse_schedule(template)
+                template.operation().clean()
+            except ValidationError as exc:
+                report.add_error(template, exc)
+                continue
+            for day in occurrences(template, date_from, date_to, schedule):
+                if (template.pk, day) in existing:
+                    report.existing += 1
+                elif closed is not None and day <= closed:
+                    # То же правило, что check_open(): в закрытые месяцы записи не проводятся
+                    report.closed += 1
+                else:
+                    operations.append(template.operation(day))
+
+        report.created = len(operations)
+        if operations and not dry_run:
+            Operation.objects.bulk_create(operations, batch_size=batch_size)
+            RollupDelta().add_operations(operations).apply()
+            bump_operations_version()
+    return report
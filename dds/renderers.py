@@ -0,0 +1,25 @@
+from rest_framework import renderers
+
+from .fast_render import dumps
+from .metrics import timed
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer DRF, время рендеринга которого идет в фазу render (Server-Timing и метрики)."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('render'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Тот же JSON, что у JSONRenderer, но через dds.fast_render.dumps (orjson).
+    Только для данных из JSON-типов (строки, числа, словари, списки) — так их готовит dds.fast_render.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        with timed('render'):
+            return dumps(data)
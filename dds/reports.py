@@ -0,0 +1,139 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDay, TruncMonth, TruncQuarter, TruncWeek
+
+from .models import OperationDailyRollup, OperationType
+
+# Гранулярность периода -> функция усечения даты (GROUP BY по результату)
+PERIODS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+    'quarter': TruncQuarter,
+}
+
+# Разрез по справочнику -> (поле id, поле имени) в values()
+GROUPS = {
+    'status': ('status_id', 'status__name'),
+    'type': ('type_id', 'type__name'),
+    'category': ('category_id', 'category__name'),
+    'subcategory': ('subcategory_id', 'subcategory__name'),
+}
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+CENTS = Decimal('0.01')
+
+
+def money(value):
+    """Decimal -> строка с двумя знаками, как DecimalField в API."""
+    return str((value or Decimal('0')).quantize(CENTS))
+
+
+def _measures(queryset):
+    """Поле суммы и выражение количества: у дневного агрегата они уже предпосчитаны."""
+    if queryset.model is OperationDailyRollup:
+        return 'total', Sum('count')
+    return 'amount', Count('id')
+
+
+def parse_cashflow_params(params):
+    """
+    (period, group_by) из query string отчета ДДС.
+    Недопустимые значения — django ValidationError с ошибками по параметрам.
+    """
+    period = params.get('period', 'month')
+    if period not in PERIODS:
+        raise ValidationError({'period': 'Допустимые значения: ' + ', '.join(PERIODS) + '.'})
+    group_by = [g for g in params.get('group_by', '').split(',') if g]
+    if any(g not in GROUPS for g in group_by):
+        raise ValidationError({'group_by': 'Допустимые значения: ' + ', '.join(GROUPS) + '.'})
+    return period, group_by
+
+
+def cashflow_report(queryset, period='month', group_by=()):
+    """
+    Отчет ДДС: суммы и количество записей по периодам и (опционально) разрезам справочников.
+    Считается одним запросом GROUP BY на стороне БД — инстансы моделей не создаются.
+    queryset — записи (Operation) или, что дешевле, дневной агрегат (OperationDailyRollup).
+
+    Возвращает список словарей:
+      period, <разрез>_id, <разрез> (имя), income, expense, net (= income − expense), count.
+    """
+    return format_cashflow(cashflow_rows(queryset, period, group_by), group_by)
+
+
+def cashflow_rows(queryset, period='month', group_by=()):
+    """Ленивый values()-queryset отчета ДДС (для async-пути — через aiterator())."""
+    period_fn = PERIODS[period]
+    fields = [f for name in group_by for f in GROUPS[name]]
+    zero = Value(Decimal('0'), output_field=MONEY)
+    income = Q(type__direction=OperationType.INCOME)
+    amount, count = _measures(queryset)
+
+    return (
+        queryset
+        .order_by()  # сбрасываем Meta.ordering, иначе date/id попадут в GROUP BY
+        .annotate(period=period_fn('date'))
+        .values('period', *fields)
+        .annotate(
+            income=Coalesce(Sum(amount, filter=income), zero, output_field=MONEY),
+            expense=Coalesce(Sum(amount, filter=~income), zero, output_field=MONEY),
+            records=count,  # не count: у агрегата есть одноименное поле
+        )
+        .order_by('period', *fields)
+    )
+
+
+def format_cashflow(rows, group_by=()):
+    """Строки cashflow_rows() -> элементы ответа отчета."""
+    results = []
+    for row in rows:
+        item = {'period': row['period'].isoformat()}
+        for name in group_by:
+            id_field, name_field = GROUPS[name]
+            item[id_field] = row[id_field]
+            item[name] = row[name_field]
+        item.update({
+            'income': money(row['income']),
+            'expense': money(row['expense']),
+            'net': money(row['income'] - row['expense']),
+            'count': row['records'],
+        })
+        results.append(item)
+    return results
+
+
+def report_totals(results):
+    """Итоги по всему отчету (считаются по уже сгруппированным строкам, без запроса)."""
+    income = sum((Decimal(r['income']) for r in results), Decimal('0'))
+    expense = sum((Decimal(r['expense']) for r in results), Decimal('0'))
+    return {
+        'income': money(income),
+        'expense': money(expense),
+        'net': money(income - expense),
+        'count': sum(r['count'] for r in results),
+    }
+
+
+def taxonomy_stats(queryset):
+    """
+    Количество и сумма записей по каждому узлу дерева справочников:
+    {(раздел, id): {'count': n, 'total': Decimal}}, разделы — как в dds.taxonomy.KINDS.
+    Один GROUP BY по всем четырем справочникам; суммы по уровням дерева складываются в Python.
+    """
+    amount, count = _measures(queryset)
+    rows = (
+        queryset.order_by()
+        .values('status_id', 'type_id', 'category_id', 'subcategory_id')
+        .annotate(records=count, amount_sum=Sum(amount))
+    )
+    stats = {}
+    for row in rows:
+        for kind, field in (('statuses', 'status_id'), ('types', 'type_id'),
+                            ('categories', 'category_id'), ('subcategories', 'subcategory_id')):
+            node = stats.setdefault((kind, row[field]), {'count': 0, 'total': Decimal('0')})
+            node['count'] += row['records']
+            node['total'] += row['amount_sum']
+    return stats
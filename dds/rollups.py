@@ -0,0 +1,110 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .models import Operation, OperationDailyRollup
+from .taxonomy import bump_version_on_commit
+
+# Ключ корзины дневного агрегата (attname-ы, одинаковые у Operation и OperationDailyRollup)
+KEY_FIELDS = ('date', 'status_id', 'type_id', 'category_id', 'subcategory_id')
+
+
+def bucket_key(values):
+    """Ключ корзины из словаря значений (например, Operation._loaded_values или .values())."""
+    return tuple(values[f] for f in KEY_FIELDS)
+
+
+def operation_key(op):
+    return tuple(getattr(op, f) for f in KEY_FIELDS)
+
+
+class RollupDelta:
+    """
+    Накопитель изменений по корзинам: {ключ: [сумма, количество]}.
+    Пакетные пути сначала собирают дельты по всем строкам, затем применяют их
+    одним UPDATE на корзину — а не на каждую запись.
+    """
+
+    def __init__(self):
+        self.buckets = defaultdict(lambda: [Decimal('0'), 0])
+
+    def add(self, key, amount, count=1):
+        bucket = self.buckets[key]
+        bucket[0] += amount
+        bucket[1] += count
+
+    def subtract(self, key, amount, count=1):
+        self.add(key, -amount, -count)
+
+    def add_operations(self, operations):
+        for op in operations:
+            self.add(operation_key(op), op.amount)
+        return self
+
+    def apply(self, using=None):
+        """Применить накопленные дельты к OperationDailyRollup (в текущей транзакции)."""
+        manager = OperationDailyRollup.objects.db_manager(using)
+        changed = False
+        with transaction.atomic(using=using, savepoint=False):
+            for key, (amount, count) in self.buckets.items():
+                if not amount and not count:
+                    continue
+                changed = True
+                lookup = dict(zip(KEY_FIELDS, key))
+                if not _increment(manager, lookup, amount, count):
+                    try:
+                        # savepoint — чтобы конкурентная вставка той же корзины не ломала транзакцию
+                        with transaction.atomic(using=using):
+                            manager.create(total=amount, count=count, **lookup)
+                    except IntegrityError:
+                        _increment(manager, lookup, amount, count)
+                if count < 0:
+                    manager.filter(count=0, **lookup).delete()
+            if changed:
+                # Версия агрегата — валидатор условных GET отчетов (dds.conditional)
+                bump_version_on_commit(OperationDailyRollup, using=using)
+        self.buckets.clear()
+
+
+def _increment(manager, lookup, amount, count):
+    return manager.filter(**lookup).update(total=F('total') + amount, count=F('count') + count)
+
+
+def compute_rollups(queryset=None):
+    """Агрегаты, посчитанные заново по Operation: {ключ: (сумма, количество)}."""
+    queryset = Operation.objects.all() if queryset is None else queryset
+    rows = queryset.order_by().values(*KEY_FIELDS).annotate(total=Sum('amount'), count=Count('id'))
+    return {bucket_key(row): (row['total'], row['count']) for row in rows.iterator()}
+
+
+def stored_rollups():
+    rows = OperationDailyRollup.objects.order_by().values(*KEY_FIELDS, 'total', 'count')
+    return {bucket_key(row): (row['total'], row['count']) for row in rows.iterator()}
+
+
+def diff_rollups():
+    """Расхождения агрегата с данными: {ключ: (ожидаемое, хранимое)}; пусто — агрегат корректен."""
+    expected, stored = compute_rollups(), stored_rollups()
+    return {
+        key: (expected.get(key), stored.get(key))
+        for key in expected.keys() | stored.keys()
+        if expected.get(key) != stored.get(key)
+    }
+
+
+def rebuild_rollups(batch_size=1000):
+    """Пересобрать агрегат с нуля одной транзакцией. Возвращает число корзин."""
+    with transaction.atomic():
+        buckets = compute_rollups()
+        OperationDailyRollup.objects.all().delete()
+        OperationDailyRollup.objects.bulk_create(
+            [
+                OperationDailyRollup(total=total, count=count, **dict(zip(KEY_FIELDS, key)))
+                for key, (total, count) in buckets.items()
+            ],
+            batch_size=batch_size,
+        )
+        bump_version_on_commit(OperationDailyRollup)
+    return len(buckets)
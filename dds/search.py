@@ -0,0 +1,77 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework import filters
+
+# Конфигурация полнотекстового поиска. Индексы (миграция 0003) построены по тем же выражениям —
+# при смене конфигурации их нужно пересоздать.
+SEARCH_CONFIG = 'russian'
+
+# Значение ?ordering= для сортировки результатов поиска по релевантности
+RELEVANCE = 'relevance'
+
+
+def comment_vector():
+    return SearchVector('comment', config=SEARCH_CONFIG)
+
+
+def prefix_query(text):
+    """
+    Текст запроса -> to_tsquery с префиксным совпадением каждого слова: «инфр серв» -> «инфр:* & серв:*».
+    В запрос попадают только словесные символы — синтаксис tsquery из ввода пользователя не проходит.
+    """
+    terms = re.findall(r'\w+', text)
+    if not terms:
+        return None
+    return SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config=SEARCH_CONFIG)
+
+
+def search_operations(queryset, text, rank=False):
+    """
+    Поиск записей по комментарию.
+    Postgres: полнотекстовый поиск по словам с префиксами (GIN по to_tsvector) ИЛИ подстрока
+    (UPPER(comment) LIKE — ускоряется триграммным GIN-индексом pg_trgm). rank=True добавляет
+    аннотацию rank: ранг полнотекстового совпадения + сходство слов по триграммам.
+    Прочие СУБД (SQLite в тестах): все слова запроса как подстроки (icontains), без ранга.
+    """
+    text = text.strip()
+    if not text:
+        return queryset
+    if connections[queryset.db].vendor != 'postgresql':
+        for term in text.split():
+            queryset = queryset.filter(comment__icontains=term)
+        return queryset
+
+    query = prefix_query(text)
+    condition = Q(comment__icontains=text)
+    if query is not None:
+        queryset = queryset.alias(search=comment_vector())
+        condition |= Q(search=query)
+    queryset = queryset.filter(condition)
+    if rank:
+        relevance = TrigramWordSimilarity(text, 'comment')
+        if query is not None:
+            relevance = SearchRank(F('search'), query) + relevance
+        queryset = queryset.annotate(rank=relevance)
+    return queryset
+
+
+class OperationSearchFilter(filters.SearchFilter):
+    """
+    ?search= по комментариям записей через search_operations (индексируемый поиск вместо ILIKE '%…%').
+    ?ordering=relevance — сначала наиболее релевантные (Postgres; при keyset-пагинации
+    порядок всегда (date, id), на прочих СУБД параметр игнорируется).
+    """
+    ordering_param = 'ordering'
+
+    def filter_queryset(self, request, queryset, view):
+        text = ' '.join(self.get_search_terms(request))
+        if not text:
+            return queryset
+        by_relevance = request.query_params.get(self.ordering_param) == RELEVANCE
+        queryset = search_operations(queryset, text, rank=by_relevance)
+        if by_relevance and 'rank' in queryset.query.annotations:
+            queryset = queryset.order_by('-rank', '-date', '-id')
+        return queryset
@@ -1,82 +1,138 @@
+from contextlib import contextmanager
+
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
-from .models import OperationStatus, OperationType, Category, Subcategory, Operation
+from rest_framework.reverse import reverse
+from .models import (
+    OperationStatus, OperationType, Category, Subcategory, Operation, ClosedPeriod, BalanceSnapshot, Job,
+    RecurringOperation,
+)
+from .analytics import FORECAST_MEASURES, FORECAST_METHODS, MEASURES, SEASON
+from .constraints import CATEGORY_ERRORS, OPERATION_ERRORS, SUBCATEGORY_ERRORS, constraint_errors
+from .fields import TaxonomyNestedField, TaxonomyPrimaryKeyField, root_taxonomy
+from .metrics import TimedSerializerMixin
+from .periods import BALANCE_PERIODS, check_open, close_period
+from .reports import GROUPS
+
+# Связи записи ДДС на справочники: поле модели -> раздел снимка dds.taxonomy
+OPERATION_RELATIONS = {
+    'status': 'statuses',
+    'type': 'types',
+    'category': 'categories',
+    'subcategory': 'subcategories',
+}
+
+
+class ConstraintErrorsMixin:
+    """
+    create/update в точке сохранения: нарушение ограничений БД из constraint_messages
+    ({имя: {поле: сообщение}}, см. dds.constraints) — ответ 400 с ошибкой поля, а не 500.
+    """
+    constraint_messages = {}
 
+    def create(self, validated_data):
+        with self.checked_constraints():
+            return super().create(validated_data)
 
-class OperationStatusSerializer(serializers.ModelSerializer):
+    def update(self, instance, validated_data):
+        with self.checked_constraints():
+            return super().update(instance, validated_data)
+
+    @contextmanager
+    def checked_constraints(self):
+        try:
+            with constraint_errors(self.constraint_messages):
+                yield
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.message_dict)
+
+
+class OperationStatusSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор статуса/контекста операции (id, name)."""
     class Meta:
         model = OperationStatus
         fields = ['id', 'name']
 
 
-class OperationTypeSerializer(serializers.ModelSerializer):
-    """Сериализатор типа операции (id, name)."""
+class OperationTypeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Сериализатор типа операции (id, name, direction — приход/расход)."""
     class Meta:
         model = OperationType
-        fields = ['id', 'name']
+        fields = ['id', 'name', 'direction']
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(ConstraintErrorsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     """
     Категория: на чтение — вложенный type,
     на запись — отдельное поле type_id (write_only) для связи по первичному ключу.
     """
     # В ответе отдаем вложенный объект
     type = OperationTypeSerializer(read_only=True)
-    # В запросе ожидаем id типа
-    type_id = serializers.PrimaryKeyRelatedField(
+    # В запросе ожидаем id типа (ищется в снимке справочников, см. dds.fields)
+    type_id = TaxonomyPrimaryKeyField(
+        kind='types',
         source='type',
         queryset=OperationType.objects.all(),
         write_only=True
     )
 
+    constraint_messages = CATEGORY_ERRORS
+
     class Meta:
         model = Category
         fields = ['id', 'name', 'type', 'type_id']
 
 
-class SubcategorySerializer(serializers.ModelSerializer):
+class SubcategorySerializer(ConstraintErrorsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     """
     Подкатегория: аналогичный прием с category/category_id.
     """
     category = CategorySerializer(read_only=True)
-    category_id = serializers.PrimaryKeyRelatedField(
+    category_id = TaxonomyPrimaryKeyField(
+        kind='categories',
         source='category',
         queryset=Category.objects.all(),
         write_only=True
     )
 
+    constraint_messages = SUBCATEGORY_ERRORS
+
     class Meta:
         model = Subcategory
         fields = ['id', 'name', 'category', 'category_id']
 
 
-class OperationSerializer(serializers.ModelSerializer):
+class OperationSerializer(ConstraintErrorsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     """
     Запись ДДС.
-    Read: вложенные словари (status/type/category/subcategory).
-    Write: *_id поля с ссылками по PK.
+    Read: вложенные словари (status/type/category/subcategory) — из снимка справочников (dds.taxonomy).
+    Write: *_id поля с ссылками по PK, тоже резолвятся по снимку.
+    Итого валидное создание — один INSERT без SELECT-ов по справочникам.
+    Те же правила держат ограничения БД — их нарушение (например, при устаревшем снимке)
+    возвращается ошибкой поля (ConstraintErrorsMixin).
     """
-    status = OperationStatusSerializer(read_only=True)
-    status_id = serializers.PrimaryKeyRelatedField(
-        source='status', queryset=OperationStatus.objects.all(), write_only=True
+    status = TaxonomyNestedField(OperationStatusSerializer, kind='statuses')
+    status_id = TaxonomyPrimaryKeyField(
+        kind='statuses', source='status', queryset=OperationStatus.objects.all(), write_only=True
     )
 
-    type = OperationTypeSerializer(read_only=True)
-    type_id = serializers.PrimaryKeyRelatedField(
-        source='type', queryset=OperationType.objects.all(), write_only=True
+    type = TaxonomyNestedField(OperationTypeSerializer, kind='types')
+    type_id = TaxonomyPrimaryKeyField(
+        kind='types', source='type', queryset=OperationType.objects.all(), write_only=True
     )
 
-    category = CategorySerializer(read_only=True)
-    category_id = serializers.PrimaryKeyRelatedField(
-        source='category', queryset=Category.objects.all(), write_only=True
+    category = TaxonomyNestedField(CategorySerializer, kind='categories')
+    category_id = TaxonomyPrimaryKeyField(
+        kind='categories', source='category', queryset=Category.objects.all(), write_only=True
     )
 
-    subcategory = SubcategorySerializer(read_only=True)
-    subcategory_id = serializers.PrimaryKeyRelatedField(
-        source='subcategory', queryset=Subcategory.objects.all(), write_only=True
+    subcategory = TaxonomyNestedField(SubcategorySerializer, kind='subcategories')
+    subcategory_id = TaxonomyPrimaryKeyField(
+        kind='subcategories', source='subcategory', queryset=Subcategory.objects.all(), write_only=True
     )
 
+    constraint_messages = OPERATION_ERRORS
+
     class Meta:
         model = Operation
         fields = [
@@ -97,19 +153,253 @@ class OperationSerializer(serializers.ModelSerializer):
          - частичное обновление (PATCH) — берем недостающие поля из self.instance.
         Это гарантирует единое место проверки правил (Operation.clean()).
         """
-        status = attrs.get('status', getattr(self.instance, 'status', None))
-        op_type = attrs.get('type', getattr(self.instance, 'type', None))
-        category = attrs.get('category', getattr(self.instance, 'category', None))
-        subcategory = attrs.get('subcategory', getattr(self.instance, 'subcategory', None))
+        relations = {}
+        for field in OPERATION_RELATIONS:
+            if field in attrs:
+                relations[field] = attrs[field]
+            elif self.instance is not None:
+                # Для PATCH хватает id: правила clean() сверяются по снимку, без загрузки связи
+                relations[f'{field}_id'] = getattr(self.instance, f'{field}_id')
         amount = attrs.get('amount', getattr(self.instance, 'amount', None))
         date = attrs.get('date', getattr(self.instance, 'date', None))
         comment = attrs.get('comment', getattr(self.instance, 'comment', ''))
 
-        tmp = Operation(
-            status=status, type=op_type, category=category, subcategory=subcategory,
-            amount=amount, date=date, comment=comment
-        )
-        # Вызовет Operation.clean() и соберет ValidationError по полям
-        tmp.full_clean()
+        tmp = Operation(amount=amount, date=date, comment=comment, **relations)
+        # Вызовет Operation.clean() и соберет ValidationError по полям.
+        # Существование ссылок уже проверили *_id поля — FK исключаем, иначе full_clean()
+        # сделает по SELECT на каждую связь. CHECK суммы повторяет правило clean() — без SELECT-проверки.
+        tmp.full_clean(exclude=list(OPERATION_RELATIONS), validate_constraints=False)
+        # Закрытые периоды: нельзя ни проводить запись в закрытый месяц, ни переносить ее оттуда
+        check_open(tmp.date, getattr(self.instance, 'date', None), closed=root_taxonomy(self).closed_through)
+
+        return attrs
+
+
+class OperationCompactSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    Компактное представление записи ДДС (только чтение): плоские *_id вместо вложенных словарей.
+    Вложенными остаются лишь связи, перечисленные в context['expand'] (?expand=status,category).
+    Клиент, у которого справочники уже есть, не получает их заново в каждой строке.
+    """
+    status = TaxonomyNestedField(OperationStatusSerializer, kind='statuses')
+    type = TaxonomyNestedField(OperationTypeSerializer, kind='types')
+    category = TaxonomyNestedField(CategorySerializer, kind='categories')
+    subcategory = TaxonomyNestedField(SubcategorySerializer, kind='subcategories')
+
+    status_id = serializers.IntegerField(read_only=True)
+    type_id = serializers.IntegerField(read_only=True)
+    category_id = serializers.IntegerField(read_only=True)
+    subcategory_id = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Operation
+        fields = OperationSerializer.Meta.fields
+        read_only_fields = fields
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expand = self.context.get('expand') or set()
+        for relation in OPERATION_RELATIONS:
+            if relation not in expand:
+                fields.pop(relation)
+        return fields
+
+
+# Поля шаблона помимо справочников — для проверки правил на временном объекте
+RECURRING_FIELDS = ['name', 'amount', 'comment', 'schedule', 'interval', 'cron', 'start_date', 'end_date', 'is_active']
+
+
+class RecurringOperationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    Шаблон регулярной записи (dds.recurring). Справочники — *_id по PK (резолвятся по снимку);
+    правила те же, что у записи ДДС (Operation.clean()), плюс проверка расписания.
+    """
+    status_id = TaxonomyPrimaryKeyField(kind='statuses', source='status', queryset=OperationStatus.objects.all())
+    type_id = TaxonomyPrimaryKeyField(kind='types', source='type', queryset=OperationType.objects.all())
+    category_id = TaxonomyPrimaryKeyField(kind='categories', source='category', queryset=Category.objects.all())
+    subcategory_id = TaxonomyPrimaryKeyField(
+        kind='subcategories', source='subcategory', queryset=Subcategory.objects.all()
+    )
+
+    class Meta:
+        model = RecurringOperation
+        fields = [
+            'id', 'name', 'status_id', 'type_id', 'category_id', 'subcategory_id', 'amount', 'comment',
+            'schedule', 'interval', 'cron', 'start_date', 'end_date', 'is_active', 'created_at', 'updated_at',
+        ]
+
+    def validate(self, attrs):
+        """Правила шаблона (RecurringOperation.clean()) на временном объекте; для PATCH — с полями instance."""
+        values = {}
+        for field in OPERATION_RELATIONS:
+            if field in attrs:
+                values[field] = attrs[field]
+            elif self.instance is not None:
+                values[f'{field}_id'] = getattr(self.instance, f'{field}_id')
+        for field in RECURRING_FIELDS:
+            if field in attrs:
+                values[field] = attrs[field]
+            elif self.instance is not None:
+                values[field] = getattr(self.instance, field)
+        tmp = RecurringOperation(**values)
+        # Существование ссылок проверили *_id поля, CHECK суммы повторяет правило clean()
+        tmp.full_clean(exclude=list(OPERATION_RELATIONS), validate_constraints=False)
+        return attrs
+
+
+class OperationImportRowSerializer(serializers.Serializer):
+    """
+    Одна строка пакетного импорта.
+    Ссылки на справочники — голые id: они резолвятся пачкой по снимку справочников
+    в dds.importers, поэтому здесь нет PrimaryKeyRelatedField и обращений к БД.
+    """
+    date = serializers.DateField(required=False)
+    status_id = serializers.IntegerField()
+    type_id = serializers.IntegerField()
+    category_id = serializers.IntegerField()
+    subcategory_id = serializers.IntegerField()
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    comment = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class OperationBulkSelectionSerializer(serializers.Serializer):
+    """
+    Выборка записей для пакетного изменения/удаления (тело PATCH/DELETE /api/operations/bulk/):
+    ids — список id или filter — параметры списка записей (date_from, date_to, status, …, search).
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, required=False)
+    filter = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError('Укажите ids или filter.')
+        return attrs
+
+
+class OperationBulkChangesSerializer(serializers.Serializer):
+    """Новые значения полей для пакетного изменения; ссылки — голые id (проверяются в dds.bulk_edit)."""
+    date = serializers.DateField(required=False)
+    status_id = serializers.IntegerField(required=False)
+    type_id = serializers.IntegerField(required=False)
+    category_id = serializers.IntegerField(required=False)
+    subcategory_id = serializers.IntegerField(required=False)
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    comment = serializers.CharField(required=False, allow_blank=True)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError('Нет изменяемых полей.')
+        return attrs
+
+
+class OperationBulkUpdateSerializer(OperationBulkSelectionSerializer):
+    changes = OperationBulkChangesSerializer()
+
+
+class BalanceSnapshotSerializer(serializers.ModelSerializer):
+    """Остаток по статусу на конец закрытого месяца."""
+    class Meta:
+        model = BalanceSnapshot
+        fields = ['status_id', 'balance']
+
+
+class ClosedPeriodSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    Закрытый месяц. На запись — только month (любой день месяца),
+    закрытие и снимки остатков выполняет dds.periods.close_period().
+    """
+    snapshots = BalanceSnapshotSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ClosedPeriod
+        fields = ['id', 'month', 'closed_at', 'snapshots']
+        # Уникальность проверяет close_period() (по порядку закрытия), а не валидатор DRF
+        extra_kwargs = {'month': {'validators': []}}
+
+    def create(self, validated_data):
+        try:
+            return close_period(validated_data['month'])
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.message_dict)
+
+
+class BalanceQuerySerializer(serializers.Serializer):
+    """Параметры ряда остатков (query string /api/reports/balance/)."""
+    period = serializers.ChoiceField(choices=list(BALANCE_PERIODS), default='day')
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    status = serializers.PrimaryKeyRelatedField(queryset=OperationStatus.objects.all(), required=False)
+    by_status = serializers.BooleanField(default=False)
+
+
+class PivotQuerySerializer(serializers.Serializer):
+    """Параметры сводной таблицы (query string /api/reports/pivot/); фильтры — RollupFilter."""
+    group_by = serializers.ChoiceField(choices=list(GROUPS), default='category')
+    measure = serializers.ChoiceField(choices=list(MEASURES), default='net')
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    fmt = serializers.ChoiceField(choices=['json', 'csv'], default='json')
+
+
+class ForecastQuerySerializer(PivotQuerySerializer):
+    """Параметры прогноза (query string /api/reports/forecast/)."""
+    measure = serializers.ChoiceField(choices=list(FORECAST_MEASURES), default='net')
+    method = serializers.ChoiceField(choices=list(FORECAST_METHODS), default='moving_average')
+    months = serializers.IntegerField(min_value=1, max_value=120, default=6)
+    horizon = serializers.IntegerField(min_value=1, max_value=24, default=3)
+
+    def validate(self, attrs):
+        if attrs['method'] == 'seasonal' and attrs['months'] < SEASON:
+            raise serializers.ValidationError({'months': f'Для сезонного прогноза нужно не меньше {SEASON}.'})
+        return attrs
+
+
+class MaterializeSerializer(serializers.Serializer):
+    """Параметры материализации шаблонов (POST /api/recurring/materialize/)."""
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    # Пусто — все действующие шаблоны
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, max_length=10000)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if 'date_from' in attrs and 'date_to' in attrs and attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError({'date_from': 'Начало периода позже конца.'})
+        return attrs
+
+
+class OperationChangesQuerySerializer(serializers.Serializer):
+    """Параметры ленты изменений (query string /api/operations/changes/)."""
+    cursor = serializers.CharField(required=False)
+    since = serializers.DateTimeField(required=False)
+    page_size = serializers.IntegerField(min_value=1, max_value=5000, default=500)
+
+    def validate(self, attrs):
+        if 'cursor' in attrs and 'since' in attrs:
+            raise serializers.ValidationError('Укажите либо cursor, либо since.')
+        return attrs
+
+
+class TaxonomyQuerySerializer(serializers.Serializer):
+    """Параметры дерева справочников (query string /api/taxonomy/)."""
+    stats = serializers.BooleanField(default=False)
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Фоновая задача (dds.jobs): состояние, прогресс и ссылка на результат, когда он готов."""
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'status', 'params', 'progress', 'total', 'summary', 'error', 'attempts',
+            'created_at', 'started_at', 'finished_at', 'download_url',
+        ]
+        read_only_fields = fields
 
-        return attrs
\ No newline at end of file
+    def get_download_url(self, obj):
+        if obj.status != Job.DONE or not obj.result:
+            return None
+        url = reverse('job-download', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
@@ -0,0 +1,76 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Operation, OperationTombstone, RecurringOperation
+from .rollups import KEY_FIELDS, RollupDelta, bucket_key, operation_key
+from .taxonomy import TRACKED_MODELS, bump_operations_version, bump_version_on_commit, invalidate
+
+ROLLUP_FIELDS = KEY_FIELDS + ('amount',)
+
+
+@receiver(pre_save, sender=Operation)
+def remember_rollup_bucket(sender, instance, raw=False, using=None, **kwargs):
+    """
+    Перед обновлением запоминаем старую корзину и сумму.
+    Обычно они уже есть в _loaded_values (см. Operation.from_db); SELECT — только если
+    объект собран вручную или загружен с отложенными полями.
+    """
+    instance._rollup_before = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None or any(f not in loaded for f in ROLLUP_FIELDS):
+        loaded = sender._base_manager.using(using).filter(pk=instance.pk).values(*ROLLUP_FIELDS).first()
+    if loaded is not None:
+        instance._rollup_before = (bucket_key(loaded), loaded['amount'])
+
+
+@receiver(post_save, sender=Operation)
+def update_rollup_on_save(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    delta = RollupDelta()
+    before = getattr(instance, '_rollup_before', None)
+    if before is not None:
+        delta.subtract(*before)
+    delta.add(operation_key(instance), instance.amount)
+    delta.apply(using)
+    # Теперь в БД лежат текущие значения — следующий save() считает дельту от них
+    instance._loaded_values = {f: getattr(instance, f) for f in ROLLUP_FIELDS}
+
+
+@receiver(post_delete, sender=Operation)
+def update_rollup_on_delete(sender, instance, using=None, **kwargs):
+    delta = RollupDelta()
+    delta.subtract(operation_key(instance), instance.amount)
+    delta.apply(using)
+
+
+@receiver(post_save, sender=Operation)
+@receiver(post_delete, sender=Operation)
+def bump_version_on_write(sender, using=None, **kwargs):
+    # Валидатор условных GET записей (dds.conditional) — и при загрузке фикстур
+    bump_operations_version(using)
+
+
+@receiver(post_delete, sender=Operation)
+def record_tombstone(sender, instance, using=None, **kwargs):
+    # Журнал удалений для ленты изменений (dds.changes)
+    OperationTombstone.objects.using(using).create(operation_id=instance.pk)
+
+
+@receiver(post_save, sender=RecurringOperation)
+@receiver(post_delete, sender=RecurringOperation)
+def bump_recurring_version(sender, using=None, **kwargs):
+    # Валидатор условных GET шаблонов; материализация сами шаблоны не меняет
+    bump_version_on_commit(sender, using=using)
+
+
+def invalidate_taxonomy(sender, using=None, **kwargs):
+    """Любое изменение справочника или закрытых периодов — новая версия снимка dds.taxonomy."""
+    invalidate(sender, using)
+
+
+for model in TRACKED_MODELS:
+    post_save.connect(invalidate_taxonomy, sender=model, dispatch_uid=f'dds-taxonomy-save-{model.__name__}')
+    post_delete.connect(invalidate_taxonomy, sender=model, dispatch_uid=f'dds-taxonomy-delete-{model.__name__}')
@@ -0,0 +1,145 @@
+import random
+from bisect import bisect
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import OperationStatus, OperationType, Category, Subcategory, Operation
+from .rollups import rebuild_rollups
+from .taxonomy import bump_operations_version
+
+# Префикс имен синтетических статусов и типов — чтобы не смешивать их с реальными значениями
+# (категории и подкатегории уникальны в пределах типа, поэтому у них обычные имена)
+PREFIX = 'Синтетика'
+
+STATUSES = ['Бизнес', 'Личное', 'Налог']
+
+# Справочник, похожий на реальный: направление -> {категория: [подкатегории]}
+TAXONOMY = {
+    OperationType.INCOME: {
+        'Продажи': ['Розница', 'Опт', 'Подписки', 'Услуги'],
+        'Финансы': ['Проценты', 'Возвраты', 'Займы'],
+        'Инвестиции': ['Дивиденды', 'Продажа активов'],
+    },
+    OperationType.EXPENSE: {
+        'Маркетинг': ['Avito', 'Farpost', 'Контекст', 'SMM', 'Email'],
+        'Инфраструктура': ['VPS', 'Proxy', 'Домены', 'SaaS'],
+        'Персонал': ['Зарплата', 'Премии', 'Обучение'],
+        'Офис': ['Аренда', 'Связь', 'Канцтовары'],
+        'Налоги': ['НДС', 'Страховые взносы', 'Налог на прибыль'],
+        'Логистика': ['Доставка', 'Склад'],
+    },
+}
+
+COMMENT_TEMPLATES = [
+    '', '', '',
+    'Оплата: {sub}',
+    'Оплата {sub} за {month}',
+    '{sub}, счет №{n}',
+    'Поступление {sub} по договору {n}',
+    'Возврат {sub}',
+]
+
+# Поля Operation, которые заполняет генератор (в порядке кортежа строки)
+FIELDS = ('date', 'status_id', 'type_id', 'category_id', 'subcategory_id', 'amount', 'comment')
+
+
+def ensure_dictionaries(extra_categories=0, subcategories_per_category=4):
+    """
+    Синтетические справочники (создаются один раз, повторный вызов их переиспользует):
+    статусы, по типу на каждое направление с категориями и подкатегориями из TAXONOMY;
+    extra_categories добавляет в каждый тип столько «Категория N» с subcategories_per_category
+    подкатегориями — чтобы получить справочник промышленного размера.
+    Возвращает (id статусов, [(тип, категория, подкатегория, имя подкатегории), ...]).
+    """
+    statuses = [OperationStatus.objects.get_or_create(name=f'{PREFIX}: {name}')[0].id for name in STATUSES]
+    chains = []
+    for direction, label in OperationType.DIRECTION_CHOICES:
+        type_obj, _ = OperationType.objects.get_or_create(
+            name=f'{PREFIX}: {label.lower()}', defaults={'direction': direction}
+        )
+        tree = dict(TAXONOMY[direction])
+        for c in range(1, extra_categories + 1):
+            tree[f'Категория {c}'] = [f'Подкатегория {c}.{s}' for s in range(1, subcategories_per_category + 1)]
+        for category_name, subcategory_names in tree.items():
+            category, _ = Category.objects.get_or_create(name=category_name, type=type_obj)
+            for name in subcategory_names:
+                subcategory, _ = Subcategory.objects.get_or_create(name=name, category=category)
+                chains.append((type_obj.id, category.id, subcategory.id, name))
+    return statuses, chains
+
+
+def generate_rows(count, statuses, chains, date_from, date_to, skew=1.0, seed=0):
+    """
+    Ленивый генератор кортежей FIELDS.
+    Сочетания тип/категория/подкатегория выбираются по закону Ципфа с показателем skew
+    (0 — равномерно; 1 — первая подкатегория встречается вдвое чаще второй и т.д.),
+    статусы — тоже с перекосом, суммы — логнормально, даты — равномерно в [date_from, date_to].
+    """
+    rng = random.Random(seed)
+    chains = list(chains)
+    rng.shuffle(chains)  # какие подкатегории «популярные» — тоже определяется seed
+    chain_weights = list(accumulate(1 / (rank ** skew) for rank in range(1, len(chains) + 1)))
+    status_weights = list(accumulate(1 / (rank ** skew) for rank in range(1, len(statuses) + 1)))
+    span = (date_to - date_from).days + 1
+    for n in range(1, count + 1):
+        type_id, category_id, subcategory_id, name = chains[bisect(chain_weights, rng.random() * chain_weights[-1])]
+        day = date_from + timedelta(days=rng.randrange(span))
+        amount = Decimal(min(max(rng.lognormvariate(8, 1.3), 1), 99_999_999)).quantize(Decimal('0.01'))
+        comment = rng.choice(COMMENT_TEMPLATES).format(sub=name, month=day.strftime('%m.%Y'), n=n)
+        status_id = statuses[bisect(status_weights, rng.random() * status_weights[-1])]
+        yield day, status_id, type_id, category_id, subcategory_id, amount, comment
+
+
+def _bulk_create(rows):
+    Operation.objects.bulk_create([Operation(**dict(zip(FIELDS, row))) for row in rows])
+
+
+def _copy(rows):
+    """COPY FROM STDIN (Postgres/psycopg 3) — в разы быстрее INSERT на миллионах строк."""
+    now = timezone.now()
+    columns = [Operation._meta.get_field(f).column for f in FIELDS] + ['created_at', 'updated_at']
+    with connection.cursor() as cursor:
+        with cursor.copy(f'COPY {Operation._meta.db_table} ({", ".join(columns)}) FROM STDIN') as copy:
+            for row in rows:
+                copy.write_row((*row, now, now))
+
+
+INSERT_METHODS = {
+    'bulk': _bulk_create,
+    'copy': _copy,
+}
+
+
+def generate_operations(count, days=730, seed=0, batch_size=5000, end=None, date_from=None, skew=1.0,
+                        method='auto', progress=None, **dictionaries):
+    """
+    Вставить count синтетических записей за [date_from, end] (по умолчанию — последние days дней до сегодня).
+    Генератор детерминирован по seed. Вставка пачками по batch_size (транзакция на пачку):
+    COPY в Postgres (method='auto'/'copy') или bulk_create. Дневной агрегат пересобирается один раз
+    в конце (GROUP BY по всей таблице) — на миллионах строк это быстрее, чем UPDATE корзин на каждую пачку.
+    progress(created) вызывается после каждой пачки.
+    Закрытые периоды не проверяются — это инструмент для бенчмарков и нагрузочных стендов.
+    """
+    if method == 'auto':
+        method = 'copy' if connection.vendor == 'postgresql' else 'bulk'
+    insert = INSERT_METHODS[method]
+    statuses, chains = ensure_dictionaries(**dictionaries)
+    end = end or timezone.localdate()
+    date_from = date_from or end - timedelta(days=days - 1)
+    rows = generate_rows(count, statuses, chains, date_from, end, skew=skew, seed=seed)
+
+    created = 0
+    while created < count:
+        batch = [row for _, row in zip(range(batch_size), rows)]
+        with transaction.atomic():
+            insert(batch)
+        created += len(batch)
+        if progress is not None:
+            progress(created)
+    rebuild_rollups()
+    bump_operations_version()
+    return created
@@ -0,0 +1,273 @@
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from operator import attrgetter
+
+from django.core.cache import caches
+from django.db import transaction
+
+from .db_routers import primary
+from .models import OperationStatus, OperationType, Category, Subcategory, ClosedPeriod, Operation
+
+# Таблицы, от которых зависит снимок: справочники и граница закрытых периодов
+TRACKED_MODELS = [OperationStatus, OperationType, Category, Subcategory, ClosedPeriod]
+
+# Разделы снимка -> модель справочника
+KINDS = {
+    'statuses': OperationStatus,
+    'types': OperationType,
+    'categories': Category,
+    'subcategories': Subcategory,
+}
+
+# Алиас кеша, общего для всех воркеров (см. CACHES['shared'] в settings)
+SHARED_CACHE = 'shared'
+
+
+def version_key(model):
+    return f'dds:version:{model._meta.label_lower}'
+
+
+def new_version():
+    # Момент изменения + случайная часть: по токену можно отдать Last-Modified
+    return f'{time.time():.6f}-{uuid.uuid4().hex}'
+
+
+def version_time(token):
+    """Момент изменения из токена версии (datetime UTC) или None, если токен другого формата."""
+    try:
+        return datetime.fromtimestamp(float(token.split('-', 1)[0]), tz=timezone.utc)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def table_versions(models=TRACKED_MODELS):
+    """
+    Текущие версии таблиц {label: токен} из общего кеша.
+    Версия — токен со случайной частью, а не счетчик: конкурентные bump() не могут «совпасть» со старым значением.
+    """
+    cache = caches[SHARED_CACHE]
+    keys = {version_key(m): m._meta.label_lower for m in models}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        # Ключ вытеснен или еще не создан: заводим новый токен (add — чтобы не затереть чужой)
+        cache.add(key, new_version(), None)
+        versions[key] = cache.get(key)
+    return {keys[key]: token for key, token in versions.items()}
+
+
+def bump_version(model):
+    caches[SHARED_CACHE].set(version_key(model), new_version(), None)
+
+
+def bump_operations_version(using=None):
+    """
+    Версия таблицы записей ДДС — валидатор условных GET списка и карточки (dds.conditional).
+    Меняется на каждом пути записи: сигналы save/delete, пакетные импорт, изменение и удаление,
+    материализация шаблонов, генератор синтетических данных.
+    """
+    bump_version_on_commit(Operation, using=using)
+
+
+def bump_version_on_commit(model, using=None):
+    """
+    Сменить версию таблицы сразу (чтобы этот процесс видел свои записи) и повторно после коммита
+    (чтобы воркеры, успевшие прочитать версию до коммита, не закешировали старые данные под новой).
+    """
+    bump_version(model)
+    transaction.on_commit(lambda: bump_version(model), using=using)
+
+
+class Taxonomy:
+    """
+    Снимок справочников в памяти процесса: {id: объект} для статусов, типов, категорий, подкатегорий
+    (у категорий уже проставлен type, у подкатегорий — category) и граница закрытых периодов.
+    Объекты общие для всех запросов процесса — их нельзя изменять.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        # Снимок живет до смены версии — читаем с основной БД, а не с отстающей реплики
+        with primary():
+            self._load()
+        # Готовые представления для вложенной сериализации: {(раздел, сериализатор, id): dict}
+        self._representations = {}
+        self._tree = None
+
+    def _load(self):
+        self.statuses = OperationStatus.objects.order_by().in_bulk()
+        self.types = OperationType.objects.order_by().in_bulk()
+        self.categories = Category.objects.order_by().in_bulk()
+        self.subcategories = Subcategory.objects.order_by().in_bulk()
+        # Связываем объекты между собой — обращения к category.type и т.п. не пойдут в БД
+        # (если родитель появился между запросами — связь останется ленивой)
+        for category in self.categories.values():
+            if category.type_id in self.types:
+                category.type = self.types[category.type_id]
+        for subcategory in self.subcategories.values():
+            if subcategory.category_id in self.categories:
+                subcategory.category = self.categories[subcategory.category_id]
+        self.closed_through = ClosedPeriod.objects.closed_through()
+
+    def get(self, kind, pk):
+        return getattr(self, kind).get(pk)
+
+    def resolve(self, kind, ids):
+        """
+        {id: объект} для набора id. Промахи (например, значение, созданное до того,
+        как снимок обновился) добираются одним запросом в БД.
+        """
+        objects = getattr(self, kind)
+        found = {pk: objects[pk] for pk in ids if pk in objects}
+        missing = set(ids) - found.keys()
+        if missing:
+            found.update(KINDS[kind].objects.order_by().in_bulk(missing))
+        return found
+
+    def category_type_id(self, category_id):
+        category = self.categories.get(category_id)
+        return category.type_id if category is not None else None
+
+    def subcategory_category_id(self, subcategory_id):
+        subcategory = self.subcategories.get(subcategory_id)
+        return subcategory.category_id if subcategory is not None else None
+
+    def represent(self, kind, pk, serializer_class):
+        """Сериализованное представление значения справочника, считается один раз на снимок."""
+        key = (kind, serializer_class, pk)
+        if key not in self._representations:
+            obj = self.get(kind, pk)
+            if obj is None:
+                return None
+            self._representations[key] = serializer_class(obj).data
+        return self._representations[key]
+
+    def tree(self):
+        """
+        Дерево справочников для каскадных выпадающих списков (строится один раз на снимок):
+        {'statuses': [...], 'types': [{..., 'categories': [{..., 'subcategories': [...]}]}]}.
+        Узлы отсортированы по имени, как Meta.ordering справочников. Результат общий — не изменять.
+        """
+        if self._tree is None:
+            by_name = attrgetter('name')
+            subcategories = defaultdict(list)
+            for sub in sorted(self.subcategories.values(), key=by_name):
+                subcategories[sub.category_id].append({'id': sub.id, 'name': sub.name})
+            categories = defaultdict(list)
+            for category in sorted(self.categories.values(), key=by_name):
+                categories[category.type_id].append({
+                    'id': category.id, 'name': category.name, 'subcategories': subcategories[category.id],
+                })
+            self._tree = {
+                'statuses': [{'id': s.id, 'name': s.name} for s in sorted(self.statuses.values(), key=by_name)],
+                'types': [
+                    {'id': t.id, 'name': t.name, 'direction': t.direction, 'categories': categories[t.id]}
+                    for t in sorted(self.types.values(), key=by_name)
+                ],
+            }
+        return self._tree
+
+
+_snapshot = None
+_lock = threading.Lock()
+_pinned = threading.local()
+# Изменения справочников в еще не закоммиченной транзакции потока: колбэки invalidate(), ждущие коммита,
+# и снимок, собранный внутри этой транзакции (с ее строками — в общий _snapshot он не попадает)
+_uncommitted = threading.local()
+
+
+def _changed_in_transaction():
+    """
+    Есть ли в открытой транзакции потока незакоммиченные изменения справочников. Колбэк invalidate()
+    ждет в очереди on_commit соединения: после коммита он выполняется, а откат транзакции
+    или точки сохранения его выбрасывает — оставшиеся в очереди колбэки и есть такие изменения.
+    """
+    pending = getattr(_uncommitted, 'callbacks', None)
+    if not pending:
+        return False
+    queued = {}
+    for using, callback in pending:
+        if using not in queued:
+            queued[using] = {func for _, func, _ in transaction.get_connection(using).run_on_commit}
+    alive = [(using, callback) for using, callback in pending if callback in queued[using]]
+    if len(alive) != len(pending):
+        # Часть изменений закоммичена или откачена (в том числе до точки сохранения) — снимок транзакции устарел
+        pending[:] = alive
+        _uncommitted.snapshot = None
+    return bool(pending)
+
+
+def get_taxonomy():
+    """
+    Актуальный снимок справочников. На вызов — только чтение версий из общего кеша;
+    снимок пересобирается (5 запросов), лишь когда какая-то из таблиц поменялась.
+    Внутри pinned() версии не перечитываются.
+    """
+    global _snapshot
+    pinned = getattr(_pinned, 'snapshot', None)
+    if pinned is not None:
+        return pinned
+    version = tuple(sorted(table_versions().items()))
+    if _changed_in_transaction():
+        # Снимок видит незакоммиченные строки: после отката их не будет, поэтому он живет только в этой транзакции
+        snapshot = getattr(_uncommitted, 'snapshot', None)
+        if snapshot is None or snapshot.version != version:
+            snapshot = _uncommitted.snapshot = Taxonomy(version)
+        return snapshot
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != version:
+        with _lock:
+            snapshot = _snapshot
+            if snapshot is None or snapshot.version != version:
+                snapshot = _snapshot = Taxonomy(version)
+    return snapshot
+
+
+@contextmanager
+def pinned():
+    """
+    Зафиксировать снимок на время пакетной операции в текущем потоке:
+    get_taxonomy() внутри блока не обращается к общему кешу на каждую строку.
+    """
+    previous = getattr(_pinned, 'snapshot', None)
+    _pinned.snapshot = get_taxonomy()
+    try:
+        yield _pinned.snapshot
+    finally:
+        _pinned.snapshot = previous
+
+
+def refresh():
+    """
+    Выбросить снимок процесса: следующий get_taxonomy() перечитает справочники и закрытые периоды из БД,
+    даже если версии в общем кеше не менялись (кеш не общий с процессом, который их менял).
+    """
+    global _snapshot
+    _snapshot = None
+    _uncommitted.snapshot = None
+
+
+def invalidate(model, using=None):
+    """
+    Сбросить снимок после изменения справочника: сразу (чтобы этот процесс видел свои записи)
+    и повторно после коммита (чтобы воркеры, успевшие пересобрать снимок до коммита, пересобрали его снова).
+    До коммита снимок этого потока собирается только для текущей транзакции (см. get_taxonomy):
+    после отката в общем снимке не останется строк, которых нет в БД.
+    """
+    global _snapshot
+    _snapshot = None
+    _pinned.snapshot = None
+    _uncommitted.snapshot = None
+    bump_version(model)
+
+    def committed():
+        bump_version(model)
+
+    transaction.on_commit(committed, using=using)
+    if transaction.get_connection(using).in_atomic_block:
+        if not hasattr(_uncommitted, 'callbacks'):
+            _uncommitted.callbacks = []
+        _uncommitted.callbacks.append((using, committed))
@@ -0,0 +1,77 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from dds.models import OperationStatus, OperationType, Category, Subcategory, Operation, ClosedPeriod
+from dds.pagination import EstimatedCountPaginator
+
+
+class OperationAdminChangelistTest(TestCase):
+    """Список записей в админке: число запросов не зависит от числа строк и словарей."""
+    url = '/admin/dds/operation/'
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pass'))
+        self.status = OperationStatus.objects.create(name='Бизнес')
+        self.type = OperationType.objects.create(name='Списание')
+        self.subcategories = []
+        self.add_operations(5)
+
+    def add_operations(self, n):
+        for i in range(n):
+            category = Category.objects.create(name=f'Категория {len(self.subcategories)}', type=self.type)
+            sub = Subcategory.objects.create(name=f'Подкатегория {len(self.subcategories)}', category=category)
+            self.subcategories.append(sub)
+            Operation.objects.create(date=date(2025, 1 + i % 12, 1), status=self.status, type=self.type,
+                                     category=category, subcategory=sub, amount=Decimal('10.00'))
+
+    def queries(self, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(self.url, params)
+        self.assertEqual(resp.status_code, 200)
+        return resp, len(ctx.captured_queries)
+
+    def test_constant_query_count(self):
+        filters = {'type__id__exact': self.type.pk, 'date__year': 2025}
+        _, small = self.queries()
+        _, small_filtered = self.queries(filters)
+        self.add_operations(40)
+        resp, large = self.queries()
+        _, large_filtered = self.queries(filters)
+        self.assertEqual(small, large)
+        self.assertEqual(small_filtered, large_filtered)
+        self.assertContains(resp, 'Подкатегория 44')
+
+    def test_category_link_filters(self):
+        sub = self.subcategories[1]
+        resp = self.client.get(self.url, {'subcategory__id__exact': sub.pk})
+        self.assertEqual(resp.context['cl'].result_count, 1)
+
+    def test_estimated_count(self):
+        self.add_operations(10)
+        with mock.patch.object(EstimatedCountPaginator, 'exact_below', 10):
+            resp, _ = self.queries()
+        self.assertEqual(resp.context['cl'].result_count, 10)  # не Postgres: точно до порога, дальше — порог
+        resp, _ = self.queries()
+        self.assertEqual(resp.context['cl'].result_count, 15)
+
+
+class ClosedPeriodAdminTest(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pass'))
+        self.january = ClosedPeriod.objects.create(month=date(2025, 1, 1))
+        ClosedPeriod.objects.create(month=date(2025, 2, 1))
+
+    def test_delete_blocked(self):
+        # Месяц открывается только через API и по порядку (dds.periods.reopen_period)
+        url = f'/admin/dds/closedperiod/{self.january.pk}/delete/'
+        self.assertEqual(self.client.post(url, {'post': 'yes'}).status_code, 403)
+        resp = self.client.post('/admin/dds/closedperiod/', {
+            'action': 'delete_selected', '_selected_action': [self.january.pk], 'post': 'yes',
+        })
+        self.assertIn(resp.status_code, (200, 302))
+        self.assertEqual(ClosedPeriod.objects.count(), 2)
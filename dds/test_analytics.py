@@ -0,0 +1,99 @@
+import csv
+import io
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+from django.test import TestCase
+from rest_framework.test import APITestCase
+from dds.analytics import forecast_matrix, pivot_report
+from dds.models import OperationStatus, OperationType, Category, Subcategory, Operation, OperationDailyRollup
+from dds.reports import cashflow_report
+from dds.synthetic import generate_operations
+
+
+class AnalyticsApiTest(APITestCase):
+    def setUp(self):
+        status = OperationStatus.objects.create(name='Бизнес')
+        t_in = OperationType.objects.create(name='Пополнение', direction=OperationType.INCOME)
+        t_out = OperationType.objects.create(name='Списание', direction=OperationType.EXPENSE)
+        self.sales = Category.objects.create(name='Продажи', type=t_in)
+        self.ads = Category.objects.create(name='Маркетинг', type=t_out)
+        sub_sales = Subcategory.objects.create(name='Опт', category=self.sales)
+        sub_ads = Subcategory.objects.create(name='Avito', category=self.ads)
+        rows = [
+            (date(2025, 1, 5), t_in, self.sales, sub_sales, '1000.00'),
+            (date(2025, 1, 20), t_out, self.ads, sub_ads, '300.10'),
+            (date(2025, 1, 21), t_out, self.ads, sub_ads, '0.29'),
+            (date(2025, 3, 3), t_in, self.sales, sub_sales, '400.00'),
+            (date(2025, 3, 9), t_out, self.ads, sub_ads, '150.50'),
+        ]
+        for d, tp, cat, sub, amount in rows:
+            Operation.objects.create(date=d, status=status, type=tp, category=cat, subcategory=sub,
+                                     amount=Decimal(amount))
+
+    def test_pivot(self):
+        resp = self.client.get('/api/reports/pivot/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['columns'], [{'id': self.sales.pk, 'name': 'Продажи'},
+                                                {'id': self.ads.pk, 'name': 'Маркетинг'}])
+        # Февраль без записей — нулевая строка: ряд месяцев сплошной
+        self.assertEqual(resp.data['results'], [
+            {'period': '2025-01-01', 'values': ['1000.00', '-300.39'], 'total': '699.61'},
+            {'period': '2025-02-01', 'values': ['0.00', '0.00'], 'total': '0.00'},
+            {'period': '2025-03-01', 'values': ['400.00', '-150.50'], 'total': '249.50'},
+        ])
+        self.assertEqual((resp.data['totals'], resp.data['total']), (['1400.00', '-450.89'], '949.11'))
+
+        params = {'measure': 'count', 'group_by': 'type', 'date_to': '2025-01-31'}
+        resp = self.client.get('/api/reports/pivot/', params)
+        self.assertEqual([row['values'] for row in resp.data['results']], [[1, 2]])
+
+    def test_forecast(self):
+        resp = self.client.get('/api/reports/forecast/', {'months': 3, 'horizon': 2, 'date_to': '2025-04-30'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([row['period'] for row in resp.data['history']], ['2025-02-01', '2025-03-01', '2025-04-01'])
+        # Скользящее среднее: май — среднее фев–апр, июнь — среднее мар–мая
+        self.assertEqual(resp.data['forecast'], [
+            {'period': '2025-05-01', 'values': ['133.33', '-50.17'], 'total': '83.16'},
+            {'period': '2025-06-01', 'values': ['177.78', '-66.89'], 'total': '110.89'},
+        ])
+
+    def test_csv(self):
+        resp = self.client.get('/api/reports/pivot/', {'fmt': 'csv', 'measure': 'income'})
+        self.assertEqual(resp['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(io.StringIO(resp.content.decode())))
+        self.assertEqual(rows[0], ['period', 'Продажи', 'Маркетинг', 'total'])
+        self.assertEqual(rows[-1], ['total', '1400.00', '0.00', '1400.00'])
+
+        resp = self.client.get('/api/reports/forecast/', {'fmt': 'csv', 'horizon': 1})
+        rows = list(csv.reader(io.StringIO(resp.content.decode())))
+        self.assertEqual(rows[0][:2], ['period', 'kind'])
+        self.assertEqual([row[1] for row in rows[1:]], ['history'] * 3 + ['forecast'])
+
+    def test_invalid_params(self):
+        for params in ({'measure': 'comment'}, {'group_by': 'date'}, {'fmt': 'xlsx'}):
+            self.assertEqual(self.client.get('/api/reports/pivot/', params).status_code, 400)
+        for params in ({'measure': 'count'}, {'horizon': 0}, {'method': 'seasonal', 'months': 6},
+                       {'method': 'seasonal', 'months': 12}):  # истории всего 3 месяца
+            self.assertEqual(self.client.get('/api/reports/forecast/', params).status_code, 400)
+
+
+class AnalyticsComputationTest(TestCase):
+    def test_seasonal_forecast(self):
+        history = np.arange(24, dtype=np.float64).reshape(24, 1) * 10
+        forecast = forecast_matrix(history, 'seasonal', 13)
+        # месяц t — среднее t−12, t−24, …; 13-й месяц прогноза опирается и на первый спрогнозированный
+        self.assertEqual(forecast[0, 0], (0 + 120) / 2)
+        self.assertEqual(forecast[12, 0], (forecast[0, 0] + 120 + 0) / 3)
+
+    def test_pivot_matches_cashflow_report(self):
+        generate_operations(3000, days=400, seed=3)
+        queryset = OperationDailyRollup.objects.all()
+        pivot = pivot_report(queryset, group_by='category')
+        report = cashflow_report(queryset, 'month', ['category'])
+        expected = {(row['period'], row['category_id']): row['net'] for row in report}
+        ids = [column['id'] for column in pivot['columns']]
+        for row in pivot['results']:
+            for pk, value in zip(ids, row['values']):
+                self.assertEqual(value, expected.get((row['period'], pk), '0.00'))
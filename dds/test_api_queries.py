@@ -0,0 +1,91 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from dds import taxonomy
+from dds.models import OperationStatus, OperationType, Category, Subcategory, Operation
+
+
+class OperationQueryCountTest(APITestCase):
+    """Число запросов списка/карточки записей не должно зависеть от числа строк."""
+    url = '/api/operations/'
+
+    def setUp(self):
+        self.status = OperationStatus.objects.create(name='Бизнес')
+        self.type = OperationType.objects.create(name='Списание')
+        self.subcategories = []
+        for i in range(3):
+            category = Category.objects.create(name=f'Категория {i}', type=self.type)
+            self.subcategories.append(Subcategory.objects.create(name=f'Подкатегория {i}', category=category))
+        self.add_operations(3)
+
+    def add_operations(self, n):
+        for i in range(n):
+            sub = self.subcategories[i % len(self.subcategories)]
+            Operation.objects.create(
+                date=date(2025, 1, 1 + i), status=self.status, type=self.type, category=sub.category,
+                subcategory=sub, amount=Decimal('10.00')
+            )
+
+    def selects(self, url, params=None):
+        taxonomy.get_taxonomy()  # снимок справочников прогрет, как в работающем процессе
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url, params)
+        self.assertEqual(resp.status_code, 200)
+        return resp, [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+
+    def test_list_query_count_is_constant(self):
+        _, small = self.selects(self.url)
+        self.add_operations(9)
+        resp, large = self.selects(self.url)
+        self.assertEqual(len(resp.data['results']), 12)
+        self.assertEqual(len(small), 2)  # COUNT + страница
+        self.assertEqual(len(large), 2)
+        first = resp.data['results'][0]
+        self.assertEqual(first['subcategory']['category']['type']['name'], 'Списание')
+
+    @override_settings(DDS_FAST_READ=False)
+    def test_list_without_snapshot_uses_joins(self):
+        # при промахе снимка вложенные словари берутся из select_related — без запросов на строку
+        self.add_operations(6)
+        with mock.patch.object(taxonomy.Taxonomy, 'represent', return_value=None):
+            resp, queries = self.selects(self.url)
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(resp.data['results'][0]['category']['type']['name'], 'Списание')
+
+    def test_fast_list_without_snapshot(self):
+        # быстрый путь при промахе снимка: по одному in_bulk на словарь, а не запрос на строку
+        with mock.patch.object(taxonomy.Taxonomy, 'represent', return_value=None):
+            _, small = self.selects(self.url)
+            self.add_operations(6)
+            resp, large = self.selects(self.url)
+        self.assertEqual(len(small), 2 + 4)
+        self.assertEqual(len(large), 2 + 4)
+        self.assertEqual(resp.data['results'][0]['category']['type']['name'], 'Списание')
+
+    def test_detail_query_count(self):
+        op = Operation.objects.first()
+        resp, queries = self.selects(f'{self.url}{op.id}/')
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(resp.data['subcategory']['id'], op.subcategory_id)
+
+    def test_compact_representation(self):
+        resp, queries = self.selects(self.url, {'expand': ''})
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('JOIN', queries[-1])
+        row = resp.data['results'][0]
+        self.assertNotIn('category', row)
+        self.assertEqual(set(row) & {'status_id', 'type_id', 'category_id', 'subcategory_id'},
+                         {'status_id', 'type_id', 'category_id', 'subcategory_id'})
+
+        resp, _ = self.selects(self.url, {'expand': 'category'})
+        row = resp.data['results'][0]
+        self.assertEqual(row['category']['id'], row['category_id'])
+        self.assertNotIn('subcategory', row)
+
+        resp = self.client.get(self.url, {'expand': 'comment'})
+        self.assertEqual(resp.status_code, 400)
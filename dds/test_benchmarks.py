@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+from collections import Counter
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from dds.benchmarks import bench_api, compare_results
+from dds.models import Operation
+from dds.rollups import diff_rollups
+from dds.synthetic import generate_operations
+
+
+class SyntheticDataTest(TestCase):
+    def test_generator_is_skewed_and_consistent(self):
+        created = generate_operations(
+            2000, date_from=date(2024, 1, 1), end=date(2024, 12, 31), skew=1.5, batch_size=700, seed=7
+        )
+        self.assertEqual(created, 2000)
+        dates = Operation.objects.values_list('date', flat=True)
+        self.assertGreaterEqual(min(dates), date(2024, 1, 1))
+        self.assertLessEqual(max(dates), date(2024, 12, 31))
+        # самая популярная подкатегория заметно чаще «равномерной» доли
+        counts = Counter(Operation.objects.values_list('subcategory_id', flat=True))
+        self.assertGreater(counts.most_common(1)[0][1], 3 * 2000 / len(counts))
+        self.assertEqual(diff_rollups(), {})
+
+    def test_generator_is_deterministic(self):
+        generate_operations(50, end=date(2024, 12, 31), seed=1)
+        first = list(Operation.objects.order_by('id').values_list('date', 'subcategory_id', 'amount'))
+        Operation.objects.all().delete()
+        generate_operations(50, end=date(2024, 12, 31), seed=1)
+        self.assertEqual(list(Operation.objects.order_by('id').values_list('date', 'subcategory_id', 'amount')), first)
+
+
+class ApiBenchmarkTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_operations(200, days=90)
+
+    def test_report_structure_and_rollback(self):
+        report = bench_api(iterations=2, warmup=0, only=['statuses', 'operations: список', 'создание', 'изменение'])
+        self.assertEqual(set(report['scenarios']), {
+            'statuses', 'operations: список', 'operations: создание', 'operations: изменение',
+        })
+        for name, row in report['scenarios'].items():
+            with self.subTest(name=name):
+                self.assertLess(row['status'], 300)
+                self.assertLessEqual(row['p50_ms'], row['p99_ms'])
+                self.assertGreater(row['peak_kb'], 0)
+        self.assertEqual(report['meta']['operations'], 200)
+        self.assertEqual(Operation.objects.count(), 200)  # созданные сценариями записи откатились
+
+    def test_compare_results(self):
+        row = {'status': 200, 'p95_ms': 10.0, 'queries': 3, 'peak_kb': 100.0}
+        baseline = {'scenarios': {'list': row}}
+        self.assertEqual(compare_results({'scenarios': {'list': dict(row, p95_ms=11.5)}}, baseline), [])
+        problems = compare_results({'scenarios': {'list': dict(row, p95_ms=20.0, queries=4)}}, baseline)
+        self.assertEqual(len(problems), 2)
+
+    def test_command_baseline(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'baseline.json')
+            call_command('bench_api', iterations=1, warmup=0, only=['types'], output=path, stderr=StringIO())
+            with open(path, encoding='utf-8') as f:
+                baseline = json.load(f)
+            baseline['scenarios']['types']['queries'] = 0
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(baseline, f)
+            with self.assertRaises(CommandError):
+                call_command('bench_api', iterations=1, warmup=0, only=['types'], baseline=path,
+                             fail_on_regression=True, stdout=StringIO(), stderr=StringIO())
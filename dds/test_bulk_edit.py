@@ -0,0 +1,91 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from dds.models import OperationStatus, OperationType, Category, Subcategory, Operation, ClosedPeriod
+from dds.rollups import diff_rollups
+from dds.taxonomy import get_taxonomy
+
+
+class BulkEditTest(APITestCase):
+    url = '/api/operations/bulk/'
+
+    def setUp(self):
+        self.s_bus = OperationStatus.objects.create(name='Бизнес')
+        self.s_own = OperationStatus.objects.create(name='Личное')
+        self.t_out = OperationType.objects.create(name='Списание')
+        self.cat_mkt = Category.objects.create(name='Маркетинг', type=self.t_out)
+        self.cat_inf = Category.objects.create(name='Инфраструктура', type=self.t_out)
+        self.sub_avito = Subcategory.objects.create(name='Avito', category=self.cat_mkt)
+        self.sub_vps = Subcategory.objects.create(name='VPS', category=self.cat_inf)
+        self.ops = [
+            Operation.objects.create(date=date(2025, 1, day), status=self.s_bus, type=self.t_out,
+                                     category=self.cat_mkt, subcategory=self.sub_avito, amount=Decimal('10.00'))
+            for day in (5, 5, 6, 20)
+        ]
+
+    def test_patch_by_ids_moves_subcategory(self):
+        ids = [op.id for op in self.ops[:3]]
+        before = Operation.objects.get(pk=ids[0]).updated_at
+        get_taxonomy()  # снимок уже построен — в запросе его чтение не считаем
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.patch(self.url, {'ids': ids, 'changes': {'subcategory_id': self.sub_vps.id}},
+                                     format='json')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual(resp.data, {'updated': 3})
+        self.assertEqual(len([q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "dds_operation"')]), 1)
+        moved = Operation.objects.filter(pk__in=ids)
+        # категория и тип выведены из подкатегории
+        self.assertEqual(set(moved.values_list('category_id', 'subcategory_id')), {(self.cat_inf.id, self.sub_vps.id)})
+        self.assertGreater(moved.get(pk=ids[0]).updated_at, before)
+        self.assertEqual(Operation.objects.get(pk=self.ops[3].id).subcategory_id, self.sub_avito.id)
+        self.assertEqual(diff_rollups(), {})
+
+    def test_patch_by_filter(self):
+        resp = self.client.patch(self.url, {
+            'filter': {'date_from': '2025-01-06', 'status': self.s_bus.id},
+            'changes': {'status_id': self.s_own.id, 'amount': '7.50', 'date': '2025-02-01'},
+        }, format='json')
+        self.assertEqual(resp.data, {'updated': 2})
+        self.assertEqual(Operation.objects.filter(status=self.s_own, amount=Decimal('7.50'),
+                                                  date=date(2025, 2, 1)).count(), 2)
+        self.assertEqual(diff_rollups(), {})
+
+    def test_validation(self):
+        cases = [
+            ({'ids': [self.ops[0].id], 'changes': {'category_id': self.cat_inf.id}}, 'subcategory_id'),
+            ({'ids': [self.ops[0].id], 'changes': {'category_id': self.cat_inf.id,
+                                                   'subcategory_id': self.sub_avito.id}}, 'subcategory'),
+            ({'ids': [self.ops[0].id], 'changes': {'amount': '-1'}}, 'amount'),
+            ({'ids': [self.ops[0].id], 'changes': {'status_id': 999999}}, 'status_id'),
+            ({'filter': {'unknown': 1}, 'changes': {'comment': 'x'}}, 'filter'),
+            ({'ids': [self.ops[0].id], 'changes': {}}, 'changes'),
+            ({'changes': {'comment': 'x'}}, 'non_field_errors'),
+        ]
+        for body, field in cases:
+            with self.subTest(field=field):
+                resp = self.client.patch(self.url, body, format='json')
+                self.assertEqual(resp.status_code, 400)
+                self.assertIn(field, resp.data)
+        self.assertFalse(Operation.objects.exclude(comment='').exists())
+
+    def test_closed_period(self):
+        ClosedPeriod.objects.create(month=date(2025, 1, 1))
+        resp = self.client.patch(self.url, {'ids': [self.ops[0].id], 'changes': {'date': '2025-03-01'}}, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('date', resp.data)
+        resp = self.client.delete(self.url, {'ids': [self.ops[0].id]}, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(Operation.objects.count(), 4)
+
+    def test_delete(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.delete(self.url, {'filter': {'date_to': '2025-01-05'}}, format='json')
+        self.assertEqual(resp.data, {'deleted': 2})
+        self.assertEqual(len([q for q in ctx.captured_queries if q['sql'].startswith('DELETE FROM "dds_operation"')]),
+                         1)
+        self.assertEqual(Operation.objects.count(), 2)
+        self.assertEqual(diff_rollups(), {})
+        self.assertEqual(self.client.delete(self.url, {'ids': [999999]}, format='json').data, {'deleted': 0})
@@ -0,0 +1,77 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from dds.models import OperationStatus, OperationType, Category, Subcategory, Operation
+
+
+class BulkImportTest(APITestCase):
+    url = '/api/operations/bulk/'
+
+    def setUp(self):
+        self.s_bus = OperationStatus.objects.create(name='Бизнес')
+        self.t_in = OperationType.objects.create(name='Пополнение')
+        self.t_out = OperationType.objects.create(name='Списание')
+        self.cat_inf = Category.objects.create(name='Инфраструктура', type=self.t_in)
+        self.cat_mkt = Category.objects.create(name='Маркетинг', type=self.t_out)
+        self.sub_vps = Subcategory.objects.create(name='VPS', category=self.cat_inf)
+        self.sub_avito = Subcategory.objects.create(name='Avito', category=self.cat_mkt)
+
+    def row(self, **overrides):
+        row = {
+            'date': '2025-01-15', 'status_id': self.s_bus.id, 'type_id': self.t_in.id,
+            'category_id': self.cat_inf.id, 'subcategory_id': self.sub_vps.id,
+            'amount': '100.00', 'comment': 'импорт',
+        }
+        row.update(overrides)
+        return row
+
+    def test_json_array_is_inserted(self):
+        rows = [self.row(), self.row(amount='250.50')]
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(self.url, rows, format='json')
+        statements = [q['sql'] for q in ctx.captured_queries]
+        # справочники — из снимка dds.taxonomy (здесь он строится заново после setUp: 5 SELECT),
+        # записи — одной пачкой
+        self.assertEqual(len([q for q in statements if q.startswith('SELECT')]), 5)
+        self.assertEqual(len([q for q in statements if q.startswith('INSERT INTO "dds_operation"')]), 1)
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data['created'], 2)
+        self.assertEqual(Operation.objects.count(), 2)
+        self.assertEqual(Operation.objects.order_by('id').last().amount, Decimal('250.50'))
+
+    def test_atomic_mode_rejects_whole_batch(self):
+        rows = [self.row(), self.row(category_id=self.cat_mkt.id, subcategory_id=self.sub_avito.id)]
+        resp = self.client.post(self.url, rows, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data['created'], 0)
+        self.assertEqual(resp.data['errors'][0]['row'], 2)
+        self.assertIn('category', resp.data['errors'][0]['errors'])
+        self.assertFalse(Operation.objects.exists())
+
+    def test_partial_mode_inserts_valid_rows(self):
+        rows = [self.row(), self.row(amount='-5'), self.row(subcategory_id=999)]
+        resp = self.client.post(self.url + '?mode=partial', rows, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data['created'], 1)
+        self.assertEqual([e['row'] for e in resp.data['errors']], [2, 3])
+        self.assertIn('subcategory_id', resp.data['errors'][1]['errors'])
+        self.assertEqual(Operation.objects.count(), 1)
+
+    def test_csv_and_ndjson(self):
+        csv_body = (
+            'date,status_id,type_id,category_id,subcategory_id,amount,comment\n'
+            f'2025-02-01,{self.s_bus.id},{self.t_out.id},{self.cat_mkt.id},{self.sub_avito.id},10.00,\n'
+        )
+        resp = self.client.post(self.url, csv_body, content_type='text/csv')
+        self.assertEqual(resp.status_code, 201, resp.data)
+
+        ndjson_body = '\n'.join([
+            '{"status_id": %d, "type_id": %d, "category_id": %d, "subcategory_id": %d, "amount": "1.5"}'
+            % (self.s_bus.id, self.t_in.id, self.cat_inf.id, self.sub_vps.id),
+            '',
+        ])
+        resp = self.client.post(self.url, ndjson_body, content_type='application/x-ndjson')
+        self.assertEqual(resp.status_code, 201, resp.data)
+        self.assertEqual(Operation.objects.count(), 2)
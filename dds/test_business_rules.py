@@ -1,7 +1,12 @@
 from django.test import TestCase
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from rest_framework.test import APITestCase
+from dds.constraints import violated_constraint
 from dds.models import OperationStatus, OperationType, Category, Subcategory, Operation
+from dds.taxonomy import get_taxonomy
 from django.utils import timezone
+from datetime import date
 from decimal import Decimal
 
 
@@ -45,3 +50,52 @@ class BusinessRulesTest(TestCase):
         )
         with self.assertRaises(ValidationError):
             op.full_clean()
+
+
+class DatabaseConstraintsTest(APITestCase):
+    """Те же правила в БД: их не обходят save() без full_clean(), update() и bulk_create."""
+
+    def setUp(self):
+        self.s_bus = OperationStatus.objects.create(name='Бизнес')
+        self.t_in = OperationType.objects.create(name='Пополнение')
+        self.t_out = OperationType.objects.create(name='Списание')
+        self.cat_inf = Category.objects.create(name='Инфраструктура', type=self.t_in)
+        self.cat_mkt = Category.objects.create(name='Маркетинг', type=self.t_out)
+        self.sub_vps = Subcategory.objects.create(name='VPS', category=self.cat_inf)
+        self.sub_avito = Subcategory.objects.create(name='Avito', category=self.cat_mkt)
+        self.op = Operation.objects.create(date=date(2025, 1, 10), status=self.s_bus, type=self.t_in,
+                                           category=self.cat_inf, subcategory=self.sub_vps, amount=Decimal('5.00'))
+
+    def assertViolates(self, name, func):
+        with self.assertRaises(IntegrityError) as ctx, transaction.atomic():
+            func()
+        self.assertEqual(violated_constraint(ctx.exception), name)
+
+    def test_writes_bypassing_clean(self):
+        rows = Operation.objects.filter(pk=self.op.pk)
+        self.assertViolates('dds_op_amount_positive', lambda: rows.update(amount=0))
+        self.assertViolates('dds_op_category_type_fk', lambda: rows.update(type=self.t_out))
+        self.assertViolates('dds_op_subcategory_category_fk', lambda: rows.update(subcategory=self.sub_avito))
+        self.assertViolates('dds_op_category_type_fk', lambda: Operation.objects.bulk_create([Operation(
+            date=date(2025, 1, 10), status=self.s_bus, type=self.t_out, category=self.cat_inf,
+            subcategory=self.sub_vps, amount=Decimal('1.00'))]))
+        # тип категории с записями не меняется, без записей — можно
+        self.assertViolates('dds_op_category_type_fk', lambda: Category.objects.filter(pk=self.cat_inf.pk)
+                            .update(type=self.t_out))
+        Category.objects.filter(pk=self.cat_mkt.pk).update(type=self.t_in)
+
+    def test_api_maps_violations_to_field_errors(self):
+        # Снимок справочников устарел (изменение мимо сигналов) — правило ловит БД
+        get_taxonomy()
+        Subcategory.objects.filter(pk=self.sub_avito.pk).update(category=self.cat_inf)
+        resp = self.client.post('/api/operations/', {
+            'date': '2025-01-15', 'status_id': self.s_bus.id, 'type_id': self.t_out.id,
+            'category_id': self.cat_mkt.id, 'subcategory_id': self.sub_avito.id, 'amount': '10.00',
+        }, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data['subcategory'], [Operation.SUBCATEGORY_ERROR])
+
+        resp = self.client.patch(f'/api/categories/{self.cat_inf.id}/', {'type_id': self.t_out.id}, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('type_id', resp.data)
+        self.assertEqual(Category.objects.get(pk=self.cat_inf.pk).type_id, self.t_in.id)
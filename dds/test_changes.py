@@ -0,0 +1,119 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from dds.changes import decode_cursor, encode_cursor
+from dds.models import OperationStatus, OperationType, Category, Subcategory, Operation, OperationTombstone
+
+
+@override_settings(DDS_CHANGES_SETTLE_SECONDS=0)
+class OperationChangesTest(APITestCase):
+    url = '/api/operations/changes/'
+
+    def setUp(self):
+        self.status = OperationStatus.objects.create(name='Бизнес')
+        self.type = OperationType.objects.create(name='Списание')
+        self.category = Category.objects.create(name='Маркетинг', type=self.type)
+        self.subcategory = Subcategory.objects.create(name='Avito', category=self.category)
+        self.ops = [self.create(day) for day in range(1, 6)]
+
+    def create(self, day):
+        return Operation.objects.create(date=date(2025, 1, day), status=self.status, type=self.type,
+                                        category=self.category, subcategory=self.subcategory, amount=Decimal('10.00'))
+
+    def sync(self, cursor=None, page_size=2):
+        """Пройти ленту до конца: {id: запись} измененных, множество удаленных id, курсор."""
+        changed, deleted = {}, set()
+        while True:
+            params = {'page_size': page_size}
+            if cursor:
+                params['cursor'] = cursor
+            resp = self.client.get(self.url, params)
+            self.assertEqual(resp.status_code, 200, resp.content)
+            self.assertLessEqual(len(resp.data['changed']) + len(resp.data['deleted']), page_size)
+            for row in resp.data['changed']:
+                changed[row['id']] = row
+                deleted.discard(row['id'])
+            for row in resp.data['deleted']:
+                changed.pop(row['id'], None)
+                deleted.add(row['id'])
+            cursor = resp.data['cursor']
+            if not resp.data['has_more']:
+                return changed, deleted, cursor
+
+    def test_full_then_incremental_sync(self):
+        self.client.delete(f'/api/operations/{self.ops[0].id}/')
+        changed, deleted, cursor = self.sync()
+        self.assertEqual(set(changed), {op.id for op in self.ops[1:]})
+        self.assertEqual(deleted, {self.ops[0].id})
+        self.assertEqual(changed[self.ops[1].id]['subcategory']['name'], 'Avito')
+
+        # Нет изменений — пустая порция и тот же горизонт дальше
+        self.assertEqual(self.sync(cursor)[:2], ({}, set()))
+
+        resp = self.client.patch(f'/api/operations/{self.ops[1].id}/', {'comment': 'правка'}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        new = self.create(10)
+        self.client.delete('/api/operations/bulk/', {'ids': [self.ops[2].id, self.ops[3].id]}, format='json')
+        changed, deleted, _ = self.sync(cursor)
+        self.assertEqual(set(changed), {self.ops[1].id, new.id})
+        self.assertEqual(changed[self.ops[1].id]['comment'], 'правка')
+        self.assertEqual(deleted, {self.ops[2].id, self.ops[3].id})
+
+    def test_serializer_fallback_matches_fast_path(self):
+        fast = self.client.get(self.url).data
+        with override_settings(DDS_FAST_READ=False):
+            slow = self.client.get(self.url).data
+        self.assertEqual(fast['changed'], slow['changed'])
+        self.assertEqual([row['id'] for row in fast['changed']], [op.id for op in self.ops])
+
+    def test_since(self):
+        moment = timezone.now()
+        self.ops[4].save()
+        resp = self.client.get(self.url, {'since': moment.isoformat()})
+        self.assertEqual([row['id'] for row in resp.data['changed']], [self.ops[4].id])
+
+    @override_settings(DDS_CHANGES_SETTLE_SECONDS=60)
+    def test_settle_window(self):
+        # Свежие изменения ждут, пока их транзакции гарантированно закоммичены
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.data['changed'], [])
+        self.assertFalse(resp.data['has_more'])
+
+    @skipUnless(connection.vendor == 'postgresql', 'Открытые транзакции видны в pg_stat_activity только в Postgres')
+    def test_horizon_waits_for_open_write(self):
+        # Пишущая транзакция другого сеанса, начатая раньше, держит горизонт: ее строки не окажутся позади курсора
+        other = connection.copy()
+        try:
+            with other.cursor() as cursor:
+                cursor.execute('BEGIN')
+                cursor.execute('SELECT now(), txid_current()')
+                started = cursor.fetchone()[0]
+                horizon, _ = decode_cursor(self.client.get(self.url).data['cursor'])
+                self.assertLessEqual(horizon, started)
+                cursor.execute('ROLLBACK')
+            horizon, _ = decode_cursor(self.client.get(self.url).data['cursor'])
+            self.assertGreater(horizon, started)
+        finally:
+            other.close()
+
+    def test_invalid_cursors(self):
+        expired = encode_cursor((timezone.now() - timedelta(days=365), None))
+        self.assertEqual(self.client.get(self.url, {'cursor': expired}).status_code, 410)
+        self.assertEqual(self.client.get(self.url, {'cursor': 'мусор'}).status_code, 404)
+        resp = self.client.get(self.url, {'cursor': expired, 'since': timezone.now().isoformat()})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_prune_tombstones(self):
+        recent = self.ops[1].id
+        self.ops[0].delete()
+        OperationTombstone.objects.update(deleted_at=timezone.now() - timedelta(days=400))
+        self.ops[1].delete()
+        call_command('prune_tombstones', stdout=StringIO())
+        self.assertEqual(list(OperationTombstone.objects.values_list('operation_id', flat=True)), [recent])
@@ -0,0 +1,113 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from dds.models import OperationStatus, OperationType, Category, Subcategory, Operation, RecurringOperation
+
+
+class ConditionalGetTest(APITestCase):
+    def setUp(self):
+        self.status = OperationStatus.objects.create(name='Бизнес')
+        self.type = OperationType.objects.create(name='Списание')
+        self.category = Category.objects.create(name='Маркетинг', type=self.type)
+        self.subcategory = Subcategory.objects.create(name='Avito', category=self.category)
+        self.op = self.create_operation()
+
+    def create_operation(self, **kwargs):
+        data = dict(date=date(2025, 1, 10), status=self.status, type=self.type, category=self.category,
+                    subcategory=self.subcategory, amount=Decimal('10.00'))
+        data.update(kwargs)
+        return Operation.objects.create(**data)
+
+    def etag(self, url, params=None):
+        resp = self.client.get(url, params)
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('max-age=', resp['Cache-Control'])
+        return resp['ETag']
+
+    def test_dictionary_not_modified_without_db(self):
+        resp = self.client.get('/api/statuses/')
+        etag = resp['ETag']
+        self.assertIn('Last-Modified', resp)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get('/api/statuses/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], etag)
+        self.assertEqual([q for q in ctx.captured_queries if q['sql'].startswith('SELECT')], [])
+
+        OperationStatus.objects.create(name='Личное')
+        resp = self.client.get('/api/statuses/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['count'], 2)
+
+    def test_nested_dictionary_change_invalidates(self):
+        etag = self.etag('/api/subcategories/')
+        self.assertNotEqual(self.etag('/api/subcategories/', {'category': self.category.id}), etag)
+        self.type.name = 'Расход'
+        self.type.save()
+        self.assertNotEqual(self.etag('/api/subcategories/'), etag)
+
+    def test_operations_list_and_detail(self):
+        url = f'/api/operations/{self.op.id}/'
+        list_etag, detail_etag = self.etag('/api/operations/'), self.etag(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=detail_etag).status_code, 304)
+
+        self.client.patch(url, {'comment': 'правка'}, format='json')
+        self.assertNotEqual(self.etag(url), detail_etag)
+        list_etag = self.etag('/api/operations/')
+
+        other = self.create_operation(date=date(2025, 1, 11))
+        self.assertNotEqual(self.etag('/api/operations/'), list_etag)
+        list_etag = self.etag('/api/operations/')
+        other.delete()
+        self.assertNotEqual(self.etag('/api/operations/'), list_etag)
+
+    def test_operations_validators_without_queries(self):
+        # Валидаторы — версии таблиц: ни агрегата по выборке, ни COUNT в keyset-режиме
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get('/api/operations/', {'pagination': 'cursor'})
+        self.assertIn('ETag', resp)
+        self.assertEqual([q['sql'] for q in ctx.captured_queries if 'COUNT(' in q['sql'] or 'MAX(' in q['sql']], [])
+
+        etag = resp['ETag']
+        resp = self.client.delete('/api/operations/bulk/', {'ids': [self.op.id]}, format='json')
+        self.assertEqual(resp.data['deleted'], 1)
+        self.assertNotEqual(self.etag('/api/operations/', {'pagination': 'cursor'}), etag)
+
+    def test_if_modified_since(self):
+        resp = self.client.get('/api/operations/')
+        resp = self.client.get('/api/operations/', HTTP_IF_MODIFIED_SINCE=resp['Last-Modified'])
+        self.assertEqual(resp.status_code, 304)
+
+    def test_report_follows_rollup(self):
+        etag = self.etag('/api/reports/cashflow/')
+        self.assertEqual(self.client.get('/api/reports/cashflow/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.create_operation(amount=Decimal('5.00'))
+        self.assertNotEqual(self.etag('/api/reports/cashflow/'), etag)
+
+    def test_recurring_templates(self):
+        rent = RecurringOperation.objects.create(
+            name='Аренда', status=self.status, type=self.type, category=self.category,
+            subcategory=self.subcategory, amount=Decimal('100.00'), start_date=date(2025, 1, 5),
+        )
+        url = f'/api/recurring/{rent.id}/'
+        list_etag, detail_etag = self.etag('/api/recurring/'), self.etag(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=detail_etag).status_code, 304)
+        # Материализация создает записи, но не меняет шаблоны
+        self.client.post('/api/recurring/materialize/', {'date_from': '2025-01-01', 'date_to': '2025-01-31'},
+                         format='json')
+        self.assertEqual(self.client.get('/api/recurring/', HTTP_IF_NONE_MATCH=list_etag).status_code, 304)
+
+        self.client.patch(url, {'interval': 2}, format='json')
+        self.assertNotEqual(self.etag(url), detail_etag)
+        list_etag = self.etag('/api/recurring/')
+        self.subcategory.name = 'Офис'
+        self.subcategory.save()
+        self.assertNotEqual(self.etag('/api/recurring/'), list_etag)
+
+    def test_writes_are_not_conditional(self):
+        resp = self.client.post('/api/statuses/', {'name': 'Налог'}, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertNotIn('ETag', resp)
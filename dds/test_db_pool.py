@@ -0,0 +1,74 @@
+from datetime import date
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from dds.benchmarks import _prepare_sql
+from dds.db_pool import pool_metrics, prepared
+from dds.models import OperationStatus, OperationType, Category, Subcategory, Operation
+
+
+class PoolMetricsTest(APITestCase):
+    def test_pool_metrics(self):
+        stats = {'default': {'pool_size': 4, 'pool_available': 3, 'requests_num': 120, 'requests_queued': 7,
+                             'requests_wait_ms': 1500, 'requests_errors': 2}}
+        lines = pool_metrics(stats)
+        self.assertIn('# TYPE dds_db_pool_checkouts_total counter', lines)
+        self.assertIn('dds_db_pool_checkouts_total{alias="default"} 120', lines)
+        self.assertIn('dds_db_pool_waits_total{alias="default"} 7', lines)
+        self.assertIn('dds_db_pool_wait_seconds_total{alias="default"} 1.5', lines)
+        self.assertIn('dds_db_pool_timeouts_total{alias="default"} 2', lines)
+        self.assertIn('dds_db_pool_lost_total{alias="default"} 0', lines)
+        self.assertEqual(pool_metrics({}), [])
+
+    @override_settings(DDS_METRICS_TOKEN='secret')
+    def test_no_pools_configured(self):
+        resp = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotIn('dds_db_pool_', resp.content.decode())
+
+    def test_prepare_sql(self):
+        self.assertEqual(_prepare_sql('SELECT 1 WHERE a = %s AND b LIKE %s AND c = \'%%\''),
+                         'SELECT 1 WHERE a = $1 AND b LIKE $2 AND c = \'%\'')
+
+
+class PreparedStatementsTest(APITestCase):
+    def setUp(self):
+        status = OperationStatus.objects.create(name='Бизнес')
+        type_obj = OperationType.objects.create(name='Списание')
+        category = Category.objects.create(name='Маркетинг', type=type_obj)
+        subcategory = Subcategory.objects.create(name='Avito', category=category)
+        self.operation = Operation.objects.create(date=date(2025, 1, 1), status=status, type=type_obj,
+                                                  category=category, subcategory=subcategory, amount=Decimal('10.00'))
+
+    @override_settings(DDS_DB_PREPARE_THRESHOLD=0)
+    def test_responses_unchanged(self):
+        for url in ('/api/operations/', f'/api/operations/{self.operation.pk}/'):
+            with self.subTest(url=url):
+                with override_settings(DDS_DB_PREPARE_THRESHOLD=None):
+                    expected = self.client.get(url)
+                self.assertEqual(self.client.get(url).content, expected.content)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Подготовленные выражения — только в Postgres')
+    @override_settings(DDS_DB_PREPARE_THRESHOLD=0)
+    def test_hot_queries_are_prepared(self):
+        connection.ensure_connection()
+        factory = connection.connection.cursor_factory
+        for _ in range(2):
+            self.client.get('/api/operations/')
+            self.client.get(f'/api/operations/{self.operation.pk}/')
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT statement FROM pg_prepared_statements')
+            statements = [row[0] for row in cursor.fetchall()]
+        self.assertTrue(any('FROM "dds_operation"' in sql for sql in statements), statements)
+        # Вне списка и карточки — обычная клиентская подстановка
+        self.assertIs(connection.connection.cursor_factory, factory)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Подготовленные выражения — только в Postgres')
+    @override_settings(DDS_DB_PREPARE_THRESHOLD=None)
+    def test_disabled(self):
+        with prepared():
+            connection.ensure_connection()
+            self.assertIsNone(connection.connection.prepare_threshold)
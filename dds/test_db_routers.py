@@ -0,0 +1,90 @@
+import json
+from collections import Counter
+from datetime import date
+from decimal import Decimal
+from unittest import skipUnless
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+from dds.db_routers import DDS_PRIMARY_COOKIE, ReplicaRouter, next_replica, reading_from
+from dds.models import OperationStatus, OperationType, Category, Subcategory, Operation
+
+REPLICAS = {'replica_1': 2, 'replica_2': 1}
+
+
+def replicas_configured():
+    # Реплики — отдельные тестовые базы, а не TEST MIRROR основной
+    return all(alias in settings.DATABASES and not settings.DATABASES[alias].get('TEST', {}).get('MIRROR')
+               for alias in REPLICAS)
+
+
+class ReplicaRouterUnitTest(SimpleTestCase):
+    @override_settings(DDS_READ_REPLICAS=REPLICAS)
+    def test_weighted_round_robin(self):
+        picks = Counter(next_replica() for _ in range(30))
+        self.assertEqual(picks, {'replica_1': 20, 'replica_2': 10})
+
+    @override_settings(DDS_READ_REPLICAS={})
+    def test_no_replicas(self):
+        self.assertIsNone(next_replica())
+
+    def test_routing(self):
+        router = ReplicaRouter()
+        with reading_from('replica_2'):
+            self.assertEqual(router.db_for_read(Operation), 'replica_2')
+            self.assertEqual(router.db_for_write(Operation), 'default')
+            self.assertIsNone(router.db_for_read(User))  # auth и сессии — всегда default
+        self.assertIsNone(router.db_for_read(Operation))
+
+
+@skipUnless(replicas_configured(), 'replica_1 и replica_2 — зеркала default (POSTGRES_REPLICA_HOSTS)')
+@override_settings(DDS_READ_REPLICAS=REPLICAS)
+class ReplicaReadTest(APITestCase):
+    """
+    Отдельные тестовые базы вместо реплик (алиасы заводит settings при запуске тестов): по содержимому ответа
+    видно, откуда он прочитан. Маршрутизация на реплики включена только в этом классе.
+    """
+    databases = {'default', *REPLICAS}
+
+    def setUp(self):
+        status = OperationStatus.objects.create(name='Основная')
+        type_obj = OperationType.objects.create(name='Списание')
+        category = Category.objects.create(name='Маркетинг', type=type_obj)
+        subcategory = Subcategory.objects.create(name='Avito', category=category)
+        Operation.objects.create(date=date(2025, 1, 1), status=status, type=type_obj, category=category,
+                                 subcategory=subcategory, amount=Decimal('10.00'))
+        for alias in REPLICAS:
+            OperationStatus.objects.using(alias).create(name=alias)
+
+    def status_names(self, path='/api/statuses/'):
+        resp = self.client.get(path)
+        self.assertEqual(resp.status_code, 200)
+        return [row['name'] for row in json.loads(resp.content)['results']]
+
+    def test_reads_are_spread_over_replicas(self):
+        picks = Counter(name for _ in range(3) for name in self.status_names())
+        self.assertEqual(picks, {'replica_1': 2, 'replica_2': 1})
+        self.assertEqual(self.client.get('/api/operations/').data['count'], 0)
+
+    def test_async_reads_use_replica(self):
+        resp = async_to_sync(self.async_client.get)('/api/async/statuses/')
+        self.assertIn(json.loads(resp.content)['results'][0]['name'], REPLICAS)
+
+    def test_read_your_writes(self):
+        resp = self.client.post('/api/statuses/', {'name': 'Новый'}, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.cookies[DDS_PRIMARY_COOKIE]['max-age'], settings.DDS_PRIMARY_PIN_SECONDS)
+        self.assertEqual(sorted(self.status_names()), ['Новый', 'Основная'])
+        self.assertEqual(self.client.get('/api/operations/').data['count'], 1)
+        self.assertFalse(OperationStatus.objects.using('replica_1').filter(name='Новый').exists())
+
+        self.client.cookies.pop(DDS_PRIMARY_COOKIE)
+        self.assertIn(self.status_names()[0], REPLICAS)
+
+    def test_failed_write_does_not_pin(self):
+        resp = self.client.post('/api/statuses/', {}, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertNotIn(DDS_PRIMARY_COOKIE, resp.cookies)
@@ -0,0 +1,41 @@
+import json
+from datetime import date
+from decimal import Decimal
+
+from rest_framework.test import APITestCase
+from dds.models import OperationStatus, OperationType, Category, Subcategory, Operation
+
+
+class ExportTest(APITestCase):
+    url = '/api/operations/export/'
+
+    def setUp(self):
+        s_bus = OperationStatus.objects.create(name='Бизнес')
+        t_in = OperationType.objects.create(name='Пополнение')
+        cat = Category.objects.create(name='Инфраструктура', type=t_in)
+        sub = Subcategory.objects.create(name='VPS', category=cat)
+        for day, comment in [(1, 'январь'), (2, 'сервер'), (3, 'февраль')]:
+            Operation.objects.create(
+                date=date(2025, 1, day), status=s_bus, type=t_in, category=cat,
+                subcategory=sub, amount=Decimal('10.00') * day, comment=comment
+            )
+
+    def test_csv_stream_respects_filters(self):
+        resp = self.client.get(self.url, {'date_from': '2025-01-02'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        lines = b''.join(resp.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].startswith('id,date,status_id,status,'))
+        self.assertEqual(len(lines), 3)
+        self.assertIn('2025-01-03', lines[1])  # порядок как в списке: -date, -id
+
+    def test_ndjson_stream_with_search(self):
+        resp = self.client.get(self.url, {'fmt': 'ndjson', 'search': 'сервер'})
+        rows = [json.loads(line) for line in b''.join(resp.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['amount'], '20.00')
+        self.assertEqual(rows[0]['category'], 'Инфраструктура')
+
+    def test_unknown_format(self):
+        resp = self.client.get(self.url, {'fmt': 'xlsx'})
+        self.assertEqual(resp.status_code, 400)
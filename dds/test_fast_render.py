@@ -0,0 +1,66 @@
+import json
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from dds import fast_render
+from dds.models import OperationStatus, OperationType, Category, Subcategory, Operation
+
+
+class FastRenderParityTest(APITestCase):
+    """Быстрый путь списка записей отдает побайтно тот же JSON, что OperationSerializer + JSONRenderer."""
+    url = '/api/operations/'
+    comments = [
+        '', 'обычный', 'кавычки " и \\ слэш', 'перевод\nстроки\tтаб', 'управляющий \x01 символ',
+        'разделители   и  ', 'эмодзи 💸 и </script>',
+    ]
+
+    def setUp(self):
+        status = OperationStatus.objects.create(name='Бизнес "Б"')
+        type_obj = OperationType.objects.create(name='Списание')
+        category = Category.objects.create(name='Маркетинг ', type=type_obj)
+        subcategory = Subcategory.objects.create(name='Avito', category=category)
+        amounts = ['0.01', '1', '10.50', '999999.99', '123456789.10']
+        for i, comment in enumerate(self.comments):
+            Operation.objects.create(
+                date=date(2024 + i % 2, 1 + i, 28), status=status, type=type_obj, category=category,
+                subcategory=subcategory, amount=Decimal(amounts[i % len(amounts)]), comment=comment
+            )
+
+    def assertParity(self, params=None, url=None):
+        fast = self.client.get(url or self.url, params)
+        with override_settings(DDS_FAST_READ=False):
+            slow = self.client.get(url or self.url, params)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_page_parity(self):
+        resp = self.assertParity()
+        self.assertEqual(len(resp.data['results']), len(self.comments))
+        self.assertIn(b'\\u2028', resp.content)
+        self.assertParity({'date_from': '2024-03-01', 'search': 'строки'})
+
+    def test_page_parity_without_orjson(self):
+        with mock.patch.object(fast_render, 'orjson', None):
+            self.assertParity()
+
+    def test_cursor_parity(self):
+        resp = self.assertParity({'pagination': 'cursor', 'page_size': 3})
+        self.assertParity(url=resp.data['next'])
+
+    def test_fallback_to_serializer(self):
+        # ?expand= и BrowsableAPI идут через ModelSerializer
+        with mock.patch.object(fast_render, 'operation_rows') as operation_rows:
+            self.client.get(self.url, {'expand': 'category'})
+            self.client.get(self.url, HTTP_ACCEPT='text/html')
+            self.client.get(self.url, HTTP_ACCEPT='application/json; indent=2')
+        operation_rows.assert_not_called()
+
+    def test_ndjson_export(self):
+        resp = self.client.get('/api/operations/export/', {'fmt': 'ndjson'})
+        rows = [json.loads(line) for line in b''.join(resp.streaming_content).splitlines()]
+        self.assertEqual(sorted(row['comment'] for row in rows), sorted(self.comments))
+        self.assertIn('123456789.10', {row['amount'] for row in rows})
@@ -0,0 +1,62 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from dds.metrics import REGISTRY
+from dds.models import OperationStatus, OperationType, Category, Subcategory, Operation
+
+
+class PerformanceMiddlewareTest(APITestCase):
+    def setUp(self):
+        REGISTRY.reset()
+        status = OperationStatus.objects.create(name='Бизнес')
+        type_obj = OperationType.objects.create(name='Списание')
+        category = Category.objects.create(name='Маркетинг', type=type_obj)
+        subcategory = Subcategory.objects.create(name='Avito', category=category)
+        Operation.objects.create(date=date(2025, 1, 1), status=status, type=type_obj, category=category,
+                                 subcategory=subcategory, amount=Decimal('10.00'))
+
+    def test_server_timing(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get('/api/operations/')
+        timing = resp['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn(f'desc="{len(ctx.captured_queries)} queries"', timing)
+        for phase in ('serialize;dur=', 'render;dur=', 'total;dur='):
+            self.assertIn(phase, timing)
+
+    def test_metrics_endpoint(self):
+        self.client.get('/api/operations/')
+        self.client.get('/api/operations/')
+        self.client.get('/api/statuses/')
+        with override_settings(DEBUG=True):
+            body = self.client.get('/metrics').content.decode()
+        self.assertIn('dds_http_requests_total{endpoint="operation-list",method="GET",status="200"} 2', body)
+        self.assertIn('dds_http_request_duration_seconds_count{endpoint="operation-list",method="GET"} 2', body)
+        self.assertIn('dds_http_request_duration_seconds_bucket{endpoint="operationstatus-list",method="GET",le="+Inf"} 1',
+                      body)
+        self.assertIn('dds_http_request_phase_seconds_total{endpoint="operation-list",method="GET",phase="serialize"}',
+                      body)
+
+    @override_settings(DDS_METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    def test_metrics_closed_without_token(self):
+        # Токен не настроен: метрики отдаются только при DEBUG
+        with override_settings(DDS_METRICS_TOKEN='', DEBUG=False):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with override_settings(DDS_METRICS_TOKEN='', DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    @override_settings(DDS_SLOW_REQUEST_MS=0)
+    def test_slow_request_log(self):
+        with self.assertLogs('dds.performance', 'WARNING') as logs:
+            self.client.get('/api/operations/')
+        self.assertIn('operation-list', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
@@ -0,0 +1,57 @@
+from datetime import date
+from decimal import Decimal
+
+from rest_framework.test import APITestCase
+from dds.models import OperationStatus, OperationType, Category, Subcategory, Operation
+
+
+class KeysetPaginationTest(APITestCase):
+    url = '/api/operations/'
+
+    def setUp(self):
+        s_bus = OperationStatus.objects.create(name='Бизнес')
+        t_in = OperationType.objects.create(name='Пополнение')
+        cat = Category.objects.create(name='Инфраструктура', type=t_in)
+        sub = Subcategory.objects.create(name='VPS', category=cat)
+        # по две записи на дату — ключ (date, id) должен различать их
+        for i in range(10):
+            Operation.objects.create(
+                date=date(2025, 1, 1 + i // 2), status=s_bus, type=t_in, category=cat,
+                subcategory=sub, amount=Decimal('1.00') + i
+            )
+        self.expected = list(Operation.objects.values_list('id', flat=True))  # -date, -id
+
+    def test_walk_forward_and_back(self):
+        seen, pages = [], []
+        resp = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 3})
+        self.assertIsNone(resp.data['previous'])
+        self.assertNotIn('count', resp.data)
+        while True:
+            pages.append(resp.data)
+            seen += [r['id'] for r in resp.data['results']]
+            if not resp.data['next']:
+                break
+            resp = self.client.get(resp.data['next'])
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(pages), 4)
+
+        back = self.client.get(pages[-1]['previous'])
+        self.assertEqual([r['id'] for r in back.data['results']], self.expected[6:9])
+
+    def test_cursor_with_filter_and_capped_count(self):
+        resp = self.client.get(self.url, {
+            'pagination': 'cursor', 'page_size': 2, 'date_from': '2025-01-03', 'count': 'capped'
+        })
+        self.assertEqual(resp.data['count'], 6)
+        self.assertTrue(resp.data['count_exact'])
+        resp = self.client.get(resp.data['next'])
+        self.assertEqual([r['id'] for r in resp.data['results']], self.expected[2:4])
+
+    def test_page_number_is_still_default(self):
+        resp = self.client.get(self.url, {'page': 1})
+        self.assertEqual(resp.data['count'], 10)
+        self.assertEqual([r['id'] for r in resp.data['results']], self.expected)
+
+    def test_bad_cursor(self):
+        resp = self.client.get(self.url, {'cursor': 'garbage'})
+        self.assertEqual(resp.status_code, 404)
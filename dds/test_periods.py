@@ -0,0 +1,83 @@
+from datetime import date
+from decimal import Decimal
+
+from rest_framework.test import APITestCase
+from dds.models import OperationStatus, OperationType, Category, Subcategory, Operation, BalanceSnapshot
+
+
+class PeriodsAndBalanceTest(APITestCase):
+    def setUp(self):
+        self.s_bus = OperationStatus.objects.create(name='Бизнес')
+        self.s_own = OperationStatus.objects.create(name='Личное')
+        self.t_in = OperationType.objects.create(name='Пополнение', direction=OperationType.INCOME)
+        self.t_out = OperationType.objects.create(name='Списание', direction=OperationType.EXPENSE)
+        self.cat_inf = Category.objects.create(name='Инфраструктура', type=self.t_in)
+        self.cat_mkt = Category.objects.create(name='Маркетинг', type=self.t_out)
+        self.sub_vps = Subcategory.objects.create(name='VPS', category=self.cat_inf)
+        self.sub_avito = Subcategory.objects.create(name='Avito', category=self.cat_mkt)
+        self.op_jan = self.income(date(2025, 1, 10), '1000.00')
+        self.expense(date(2025, 1, 20), '200.00', status=self.s_own)
+        self.expense(date(2025, 2, 5), '100.00')
+        self.income(date(2025, 3, 1), '50.00')
+
+    def income(self, d, amount, status=None):
+        return Operation.objects.create(
+            date=d, status=status or self.s_bus, type=self.t_in, category=self.cat_inf,
+            subcategory=self.sub_vps, amount=Decimal(amount)
+        )
+
+    def expense(self, d, amount, status=None):
+        return Operation.objects.create(
+            date=d, status=status or self.s_bus, type=self.t_out, category=self.cat_mkt,
+            subcategory=self.sub_avito, amount=Decimal(amount)
+        )
+
+    def test_close_in_order_with_snapshots(self):
+        resp = self.client.post('/api/periods/', {'month': '2025-02-01'}, format='json')
+        self.assertEqual(resp.status_code, 201)  # первое закрытие — любой прошедший месяц
+        resp = self.client.post('/api/periods/', {'month': '2025-04-01'}, format='json')
+        self.assertEqual(resp.status_code, 400)  # пропуск марта
+        resp = self.client.post('/api/periods/', {'month': '2025-03-15'}, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data['month'], '2025-03-01')
+
+        balances = dict(BalanceSnapshot.objects.filter(period__month=date(2025, 3, 1))
+                        .values_list('status_id', 'balance'))
+        self.assertEqual(balances, {self.s_bus.id: Decimal('950.00'), self.s_own.id: Decimal('-200.00')})
+
+        # открыть можно только последний закрытый месяц
+        feb = self.client.get('/api/periods/').data['results'][0]
+        self.assertEqual(self.client.delete(f"/api/periods/{feb['id']}/").status_code, 400)
+
+    def test_closed_period_rejects_edits(self):
+        self.client.post('/api/periods/', {'month': '2025-01-01'}, format='json')
+        url = f'/api/operations/{self.op_jan.id}/'
+        self.assertEqual(self.client.patch(url, {'amount': '1.00'}, format='json').status_code, 400)
+        self.assertEqual(self.client.patch(url, {'date': '2025-02-01'}, format='json').status_code, 400)
+        self.assertEqual(self.client.delete(url).status_code, 400)
+        resp = self.client.post('/api/operations/', {
+            'date': '2025-01-31', 'status_id': self.s_bus.id, 'type_id': self.t_in.id,
+            'category_id': self.cat_inf.id, 'subcategory_id': self.sub_vps.id, 'amount': '5.00',
+        }, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('date', resp.data)
+
+    def test_running_balance_uses_snapshot(self):
+        self.client.post('/api/periods/', {'month': '2025-01-01'}, format='json')
+        # снимок должен быть источником истины для закрытого периода
+        BalanceSnapshot.objects.filter(status=self.s_bus).update(balance=Decimal('5000.00'))
+
+        resp = self.client.get('/api/reports/balance/', {'period': 'month', 'date_from': '2025-02-01'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['opening_balance'], '4800.00')
+        self.assertEqual(resp.data['results'], [
+            {'period': '2025-02-01', 'net': '-100.00', 'balance': '4700.00'},
+            {'period': '2025-03-01', 'net': '50.00', 'balance': '4750.00'},
+        ])
+
+    def test_running_balance_by_status(self):
+        resp = self.client.get('/api/reports/balance/', {'period': 'day', 'by_status': 'true', 'date_to': '2025-01-31'})
+        self.assertEqual(resp.data['results'], [
+            {'period': '2025-01-10', 'status_id': self.s_bus.id, 'status': 'Бизнес', 'net': '1000.00', 'balance': '1000.00'},
+            {'period': '2025-01-20', 'status_id': self.s_own.id, 'status': 'Личное', 'net': '-200.00', 'balance': '-200.00'},
+        ])
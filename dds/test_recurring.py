@@ -0,0 +1,168 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from dds.models import (
+    OperationStatus, OperationType, Category, Subcategory, Operation, OperationDailyRollup, ClosedPeriod,
+    RecurringOperation,
+)
+from dds.recurring import CronSchedule, materialize, occurrences
+
+
+def template(schedule=RecurringOperation.MONTHLY, start=date(2025, 1, 31), **kwargs):
+    return RecurringOperation(name='t', schedule=schedule, start_date=start, **kwargs)
+
+
+class ScheduleTest(TestCase):
+    def test_monthly(self):
+        # 31-е в коротких месяцах — последний день; интервал отсчитывается от start_date
+        self.assertEqual(list(occurrences(template(), date(2025, 1, 1), date(2025, 4, 30))),
+                         [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30)])
+        quarterly = template(interval=3, start=date(2024, 11, 15), end_date=date(2025, 9, 1))
+        self.assertEqual(list(occurrences(quarterly, date(2025, 1, 1), date(2025, 12, 31))),
+                         [date(2025, 2, 15), date(2025, 5, 15), date(2025, 8, 15)])
+
+    def test_weekly(self):
+        biweekly = template(RecurringOperation.WEEKLY, start=date(2025, 1, 6), interval=2)
+        self.assertEqual(list(occurrences(biweekly, date(2025, 1, 10), date(2025, 2, 10))),
+                         [date(2025, 1, 20), date(2025, 2, 3)])
+
+    def test_cron(self):
+        def dates(expression, date_from=date(2025, 1, 1), date_to=date(2025, 3, 31)):
+            return list(CronSchedule(expression).dates(date_from, date_to))
+
+        self.assertEqual(dates('L * *'), [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31)])
+        self.assertEqual(dates('1,15 */2 *'), [date(2025, 1, 1), date(2025, 1, 15), date(2025, 3, 1), date(2025, 3, 15)])
+        # Полная запись cron: минуты и часы не учитываются
+        self.assertEqual(dates('0 9 * * MON', date_to=date(2025, 1, 31)),
+                         [date(2025, 1, 6), date(2025, 1, 13), date(2025, 1, 20), date(2025, 1, 27)])
+        # Ограничены и день месяца, и день недели — подходит любой из них
+        self.assertEqual(dates('10 FEB SUN'), [date(2025, 2, 2), date(2025, 2, 9), date(2025, 2, 10),
+                                               date(2025, 2, 16), date(2025, 2, 23)])
+        for expression in ('* *', '32 * *', '1 13 *', 'x * *', '1-5/0 * *'):
+            with self.subTest(expression=expression), self.assertRaises(ValidationError):
+                CronSchedule(expression)
+
+
+class RecurringTestMixin:
+    def setUp(self):
+        self.status = OperationStatus.objects.create(name='Бизнес')
+        self.t_out = OperationType.objects.create(name='Списание', direction=OperationType.EXPENSE)
+        self.t_in = OperationType.objects.create(name='Пополнение', direction=OperationType.INCOME)
+        self.rent = Category.objects.create(name='Аренда', type=self.t_out)
+        self.office = Subcategory.objects.create(name='Офис', category=self.rent)
+
+    def create_template(self, **kwargs):
+        values = dict(name='Аренда офиса', status=self.status, type=self.t_out, category=self.rent,
+                      subcategory=self.office, amount=Decimal('50000.00'), start_date=date(2025, 1, 5))
+        values.update(kwargs)
+        return RecurringOperation.objects.create(**values)
+
+
+class MaterializeTest(RecurringTestMixin, TestCase):
+    def test_idempotent(self):
+        rent = self.create_template()
+        vps = self.create_template(name='VPS', amount=Decimal('990.00'), schedule=RecurringOperation.WEEKLY,
+                                   start_date=date(2025, 1, 6), end_date=date(2025, 1, 31))
+        report = materialize(date_to=date(2025, 3, 31))
+        self.assertEqual((report.templates, report.created, report.existing), (2, 7, 0))
+        self.assertEqual(rent.operations.count(), 3)
+        self.assertEqual(list(vps.operations.order_by('date').values_list('date', flat=True)),
+                         [date(2025, 1, 6), date(2025, 1, 13), date(2025, 1, 20), date(2025, 1, 27)])
+        self.assertEqual(OperationDailyRollup.objects.get(date=date(2025, 2, 5)).total, Decimal('50000.00'))
+
+        # Повтор и расширение периода создают только новые даты
+        report = materialize(date_from=date(2025, 1, 1), date_to=date(2025, 4, 30))
+        self.assertEqual((report.created, report.existing), (1, 7))
+        self.assertEqual(Operation.objects.count(), 8)
+        self.assertEqual(OperationDailyRollup.objects.filter(date=date(2025, 2, 5)).get().count, 1)
+
+    def test_closed_periods_and_errors(self):
+        self.create_template()
+        broken = self.create_template(name='Сломанный', type=self.t_in)  # категория другого типа
+        inactive = self.create_template(name='Выключен', is_active=False)
+        ClosedPeriod.objects.create(month=date(2025, 1, 1))
+
+        report = materialize(date_to=date(2025, 2, 28), dry_run=True)
+        self.assertEqual((report.created, report.closed, report.templates), (1, 1, 2))
+        self.assertEqual(report.errors, [{'template': broken.pk, 'name': 'Сломанный',
+                                          'errors': {'category': [Operation.CATEGORY_ERROR]}}])
+        self.assertFalse(Operation.objects.exists())
+
+        materialize(date_to=date(2025, 2, 28))
+        self.assertEqual(list(Operation.objects.values_list('date', flat=True)), [date(2025, 2, 5)])
+        self.assertFalse(inactive.operations.exists())
+
+    def test_bulk_backfill(self):
+        for index in range(200):
+            self.create_template(name=f'Шаблон {index}', schedule=RecurringOperation.WEEKLY,
+                                 start_date=date(2025, 1, 1 + index % 7))
+        # Год по 200 шаблонам — пакетом: шаблоны и уже созданные даты — по запросу, вставка — пачками
+        # (в SQLite пачку ограничивает число параметров запроса), агрегат — по запросу на корзину
+        with CaptureQueriesContext(connection) as queries:
+            report = materialize(date_from=date(2025, 1, 1), date_to=date(2025, 12, 31))
+        self.assertEqual(report.created, Operation.objects.count())
+        # 2025-01-01 — среда, единственный день недели, выпадающий в 2025 году 53 раза (29 шаблонов)
+        self.assertEqual(report.created, 200 * 52 + 29)
+        sql = [query['sql'] for query in queries]
+        self.assertLess(sum(q.startswith('INSERT INTO "dds_operation"') for q in sql), report.created / 50)
+        self.assertEqual(sum('FROM "dds_operation"' in q for q in sql), 1)
+
+    def test_command(self):
+        rent = self.create_template()
+        out = StringIO()
+        call_command('materialize_recurring', '--date-to', '2025-02-28', '--template', str(rent.pk), stdout=out)
+        self.assertIn('Создано записей: 2', out.getvalue())
+        self.assertEqual(rent.operations.count(), 2)
+
+
+class RecurringApiTest(RecurringTestMixin, APITestCase):
+    def payload(self, **kwargs):
+        data = {'name': 'Аренда офиса', 'status_id': self.status.pk, 'type_id': self.t_out.pk,
+                'category_id': self.rent.pk, 'subcategory_id': self.office.pk, 'amount': '50000.00',
+                'schedule': 'monthly', 'start_date': '2025-01-05'}
+        data.update(kwargs)
+        return data
+
+    def test_validation(self):
+        resp = self.client.post('/api/recurring/', self.payload(), format='json')
+        self.assertEqual(resp.status_code, 201, resp.data)
+        self.assertEqual(resp.data['category_id'], self.rent.pk)
+        for data, field in (({'type_id': self.t_in.pk}, 'category'), ({'amount': '0'}, 'amount'),
+                            ({'schedule': 'cron', 'cron': '1 * * *'}, 'cron'),
+                            ({'end_date': '2024-12-31'}, 'end_date')):
+            with self.subTest(field=field):
+                resp = self.client.post('/api/recurring/', self.payload(**data), format='json')
+                self.assertEqual(resp.status_code, 400)
+                self.assertIn(field, resp.data)
+
+        url = f'/api/recurring/{RecurringOperation.objects.get().pk}/'
+        self.assertEqual(self.client.patch(url, {'interval': 0}, format='json').status_code, 400)
+        self.assertEqual(self.client.patch(url, {'interval': 2}, format='json').status_code, 200)
+
+    def test_materialize(self):
+        rent = self.create_template()
+        other = self.create_template(name='Другой')
+        params = {'date_from': '2025-01-01', 'date_to': '2025-03-31', 'ids': [rent.pk]}
+        resp = self.client.post('/api/recurring/materialize/', params, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual((resp.data['created'], resp.data['templates']), (3, 1))
+        self.assertFalse(other.operations.exists())
+
+        resp = self.client.post('/api/recurring/materialize/', params, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual((resp.data['created'], resp.data['existing']), (0, 3))
+
+        resp = self.client.post('/api/recurring/materialize/', {'date_from': '2025-02-01', 'date_to': '2025-01-01'},
+                                format='json')
+        self.assertEqual(resp.status_code, 400)
+
+        # Шаблон с записями не удаляется, без записей — удаляется
+        self.assertEqual(self.client.delete(f'/api/recurring/{rent.pk}/').status_code, 400)
+        self.assertEqual(self.client.delete(f'/api/recurring/{other.pk}/').status_code, 204)
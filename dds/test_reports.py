@@ -0,0 +1,64 @@
+from datetime import date
+from decimal import Decimal
+from importlib import import_module
+from types import SimpleNamespace
+
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APITestCase
+from dds.models import OperationStatus, OperationType, Category, Subcategory, Operation
+
+
+class CashflowReportTest(APITestCase):
+    url = '/api/reports/cashflow/'
+
+    def setUp(self):
+        self.s_bus = OperationStatus.objects.create(name='Бизнес')
+        self.s_own = OperationStatus.objects.create(name='Личное')
+        self.t_in = OperationType.objects.create(name='Пополнение', direction=OperationType.INCOME)
+        self.t_out = OperationType.objects.create(name='Списание', direction=OperationType.EXPENSE)
+        cat_inf = Category.objects.create(name='Инфраструктура', type=self.t_in)
+        cat_mkt = Category.objects.create(name='Маркетинг', type=self.t_out)
+        sub_vps = Subcategory.objects.create(name='VPS', category=cat_inf)
+        sub_avito = Subcategory.objects.create(name='Avito', category=cat_mkt)
+        rows = [
+            (date(2025, 1, 5), self.s_bus, self.t_in, cat_inf, sub_vps, '1000.00'),
+            (date(2025, 1, 20), self.s_own, self.t_out, cat_mkt, sub_avito, '300.00'),
+            (date(2025, 2, 3), self.s_bus, self.t_out, cat_mkt, sub_avito, '150.50'),
+        ]
+        for d, st, tp, cat, sub, amount in rows:
+            Operation.objects.create(date=d, status=st, type=tp, category=cat, subcategory=sub, amount=Decimal(amount))
+
+    def test_monthly_net_flow_in_one_query(self):
+        # один SELECT + SAVEPOINT/RELEASE от ATOMIC_REQUESTS
+        with self.assertNumQueries(3):
+            resp = self.client.get(self.url, {'period': 'month'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['results'], [
+            {'period': '2025-01-01', 'income': '1000.00', 'expense': '300.00', 'net': '700.00', 'count': 2},
+            {'period': '2025-02-01', 'income': '0.00', 'expense': '150.50', 'net': '-150.50', 'count': 1},
+        ])
+        self.assertEqual(resp.data['totals']['net'], '549.50')
+
+    def test_group_by_status_with_filter(self):
+        resp = self.client.get(self.url, {'period': 'quarter', 'group_by': 'status', 'date_to': '2025-01-31'})
+        results = resp.data['results']
+        self.assertEqual([(r['status'], r['net']) for r in results], [('Бизнес', '1000.00'), ('Личное', '-300.00')])
+        self.assertTrue(all(r['period'] == '2025-01-01' for r in results))
+
+    def test_invalid_params(self):
+        self.assertEqual(self.client.get(self.url, {'period': 'year'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'group_by': 'comment'}).status_code, 400)
+
+
+class DirectionMigrationTest(TestCase):
+    def test_existing_income_types_marked(self):
+        # Базы, заполненные до появления direction: приходные типы не должны стать расходом
+        migration = import_module('dds.migrations.0002_operation_indexes')
+        OperationType.objects.bulk_create([OperationType(name=name) for name in ('Пополнение', ' доход', 'Списание')])
+        # Функции миграции от schema_editor нужно только соединение
+        migration.mark_income_types(apps, SimpleNamespace(connection=connection))
+        self.assertEqual(dict(OperationType.objects.values_list('name', 'direction')), {
+            'Пополнение': OperationType.INCOME, ' доход': OperationType.INCOME, 'Списание': OperationType.EXPENSE,
+        })
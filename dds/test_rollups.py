@@ -0,0 +1,80 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from dds.importers import OperationImporter
+from dds.models import OperationStatus, OperationType, Category, Subcategory, Operation, OperationDailyRollup
+from dds.rollups import diff_rollups
+
+
+class DailyRollupTest(TestCase):
+    def setUp(self):
+        self.s_bus = OperationStatus.objects.create(name='Бизнес')
+        self.t_in = OperationType.objects.create(name='Пополнение')
+        self.cat_inf = Category.objects.create(name='Инфраструктура', type=self.t_in)
+        self.sub_vps = Subcategory.objects.create(name='VPS', category=self.cat_inf)
+        self.sub_proxy = Subcategory.objects.create(name='Proxy', category=self.cat_inf)
+
+    def create(self, day=1, amount='100.00', sub=None):
+        return Operation.objects.create(
+            date=date(2025, 1, day), status=self.s_bus, type=self.t_in, category=self.cat_inf,
+            subcategory=sub or self.sub_vps, amount=Decimal(amount)
+        )
+
+    def buckets(self):
+        return sorted(OperationDailyRollup.objects.values_list('date', 'subcategory_id', 'total', 'count'))
+
+    def test_create_update_delete(self):
+        op = self.create()
+        self.create(amount='50.00')
+        self.assertEqual(self.buckets(), [(date(2025, 1, 1), self.sub_vps.id, Decimal('150.00'), 2)])
+
+        # смена даты и подкатегории переносит сумму в другую корзину
+        op = Operation.objects.get(pk=op.pk)
+        op.date, op.subcategory, op.amount = date(2025, 1, 2), self.sub_proxy, Decimal('70.00')
+        op.save()
+        self.assertEqual(self.buckets(), [
+            (date(2025, 1, 1), self.sub_vps.id, Decimal('50.00'), 1),
+            (date(2025, 1, 2), self.sub_proxy.id, Decimal('70.00'), 1),
+        ])
+
+        op.delete()
+        self.assertEqual(self.buckets(), [(date(2025, 1, 1), self.sub_vps.id, Decimal('50.00'), 1)])
+        Operation.objects.all().delete()
+        self.assertEqual(self.buckets(), [])
+
+    @skipUnless(connection.features.has_select_for_update_of, 'Блокировка строк — SELECT ... FOR UPDATE OF')
+    def test_api_update_locks_row(self):
+        # Старая сумма для агрегата читается под блокировкой: параллельный PATCH ждет, а не вычитает ее второй раз
+        op = self.create()
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.patch(f'/api/operations/{op.pk}/', {'amount': '70.00'}, content_type='application/json')
+        self.assertEqual(resp.status_code, 200)
+        select = next(q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT "dds_operation"'))
+        self.assertIn('FOR UPDATE OF "dds_operation"', select)
+        self.assertEqual(self.buckets(), [(date(2025, 1, 1), self.sub_vps.id, Decimal('70.00'), 1)])
+
+    def test_bulk_import_updates_rollup(self):
+        row = {
+            'date': '2025-01-03', 'status_id': self.s_bus.id, 'type_id': self.t_in.id,
+            'category_id': self.cat_inf.id, 'subcategory_id': self.sub_vps.id, 'amount': '10.00',
+        }
+        OperationImporter().run([row, dict(row, amount='5.00')])
+        self.assertEqual(self.buckets(), [(date(2025, 1, 3), self.sub_vps.id, Decimal('15.00'), 2)])
+        self.assertEqual(diff_rollups(), {})
+
+    def test_rebuild_and_verify_command(self):
+        self.create(day=1)
+        self.create(day=2)
+        OperationDailyRollup.objects.filter(date=date(2025, 1, 1)).update(total=Decimal('1.00'))
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollups', verify=True, stdout=StringIO())
+        call_command('rebuild_rollups', stdout=StringIO())
+        call_command('rebuild_rollups', verify=True, stdout=StringIO())
+        self.assertEqual(len(self.buckets()), 2)
@@ -0,0 +1,76 @@
+from datetime import date
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APITestCase
+from dds.models import OperationStatus, OperationType, Category, Subcategory, Operation
+from dds.search import prefix_query, search_operations
+
+
+class SearchMixin:
+    def make_operations(self, comments):
+        status = OperationStatus.objects.create(name='Бизнес')
+        type_obj = OperationType.objects.create(name='Списание')
+        category = Category.objects.create(name='Маркетинг', type=type_obj)
+        subcategory = Subcategory.objects.create(name='Avito', category=category)
+        return [
+            Operation.objects.create(
+                date=date(2025, 1, 1 + i), status=status, type=type_obj, category=category,
+                subcategory=subcategory, amount=Decimal('10.00'), comment=comment
+            )
+            for i, comment in enumerate(comments)
+        ]
+
+
+class OperationSearchApiTest(SearchMixin, APITestCase):
+    def setUp(self):
+        self.ops = self.make_operations(['Оплата сервера', 'Реклама Avito', 'Оплата рекламы', ''])
+
+    def search(self, **params):
+        resp = self.client.get('/api/operations/', params)
+        self.assertEqual(resp.status_code, 200)
+        return {row['id'] for row in resp.data['results']}
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.search(search='Оплата'), {self.ops[0].id, self.ops[2].id})
+        self.assertEqual(self.search(search='Оплата рекл'), {self.ops[2].id})
+
+    def test_prefix_match(self):
+        self.assertEqual(self.search(search='Avi'), {self.ops[1].id})
+
+    def test_relevance_ordering_is_accepted(self):
+        self.assertEqual(self.search(search='Оплата', ordering='relevance'), {self.ops[0].id, self.ops[2].id})
+        self.assertEqual(len(self.search(ordering='relevance')), 4)
+
+    def test_export_uses_search(self):
+        resp = self.client.get('/api/operations/export/', {'fmt': 'ndjson', 'search': 'Avito'})
+        self.assertEqual(len(b''.join(resp.streaming_content).splitlines()), 1)
+
+
+class OperationSearchAdminTest(SearchMixin, TestCase):
+    def test_admin_changelist_search(self):
+        self.make_operations(['Оплата сервера', 'Реклама Avito'])
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pass'))
+        resp = self.client.get('/admin/dds/operation/', {'q': 'Avito'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['cl'].result_count, 1)
+
+
+class PrefixQueryTest(TestCase):
+    def test_user_input_is_not_tsquery_syntax(self):
+        self.assertIsNone(prefix_query(" & | !:* ' "))
+        self.assertEqual(prefix_query("рекл & (avito"), prefix_query('рекл avito'))
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Индексы поиска есть только в Postgres')
+class SearchIndexPlanTest(SearchMixin, TestCase):
+    def test_search_uses_gin_indexes(self):
+        self.make_operations(['Оплата сервера'])
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = search_operations(Operation.objects.all(), 'оплат').explain()
+        self.assertIn('dds_op_comment_fts_idx', plan)
+        self.assertIn('dds_op_comment_trgm_idx', plan)
@@ -0,0 +1,97 @@
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from dds import taxonomy
+from dds.models import OperationStatus, OperationType, Category, Subcategory, Operation
+
+
+class TaxonomyCacheTest(APITestCase):
+    def setUp(self):
+        self.s_bus = OperationStatus.objects.create(name='Бизнес')
+        self.t_in = OperationType.objects.create(name='Пополнение')
+        self.t_out = OperationType.objects.create(name='Списание')
+        self.cat_inf = Category.objects.create(name='Инфраструктура', type=self.t_in)
+        self.sub_vps = Subcategory.objects.create(name='VPS', category=self.cat_inf)
+        self.payload = {
+            'date': '2025-01-15', 'status_id': self.s_bus.id, 'type_id': self.t_in.id,
+            'category_id': self.cat_inf.id, 'subcategory_id': self.sub_vps.id, 'amount': '100.00',
+        }
+
+    def sql(self, ctx, prefix):
+        return [q['sql'] for q in ctx.captured_queries if q['sql'].startswith(prefix)]
+
+    def test_create_is_single_insert(self):
+        taxonomy.get_taxonomy()  # прогрев снимка
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post('/api/operations/', self.payload, format='json')
+        self.assertEqual(resp.status_code, 201, resp.data)
+        self.assertEqual(resp.data['category']['type']['name'], 'Пополнение')
+        self.assertEqual(self.sql(ctx, 'SELECT'), [])
+        self.assertEqual(len(self.sql(ctx, 'INSERT INTO "dds_operation"')), 1)
+
+    def test_validation_uses_snapshot(self):
+        taxonomy.get_taxonomy()
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post('/api/operations/', dict(self.payload, type_id=self.t_out.id), format='json')
+        self.assertEqual(self.sql(ctx, 'SELECT'), [])
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('category', resp.data)
+
+    def test_dictionary_change_invalidates_snapshot(self):
+        snapshot = taxonomy.get_taxonomy()
+        self.assertIs(taxonomy.get_taxonomy(), snapshot)
+        self.cat_inf.type = self.t_out
+        self.cat_inf.save()
+        fresh = taxonomy.get_taxonomy()
+        self.assertIsNot(fresh, snapshot)
+        self.assertEqual(fresh.category_type_id(self.cat_inf.id), self.t_out.id)
+
+    def test_rolled_back_change_not_cached(self):
+        # Снимок, собранный в транзакции со справочником, который затем откатили, не переживает откат
+        with transaction.atomic():
+            phantom = Category.objects.create(name='Фантом', type=self.t_in)
+            self.assertIn(phantom.id, taxonomy.get_taxonomy().categories)
+            transaction.set_rollback(True)
+        self.assertNotIn(phantom.id, taxonomy.get_taxonomy().categories)
+        resp = self.client.post('/api/operations/', dict(self.payload, category_id=phantom.id), format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('category_id', resp.data)
+
+    def test_version_bump_from_other_process(self):
+        snapshot = taxonomy.get_taxonomy()
+        # другой воркер поменял справочник: у нас — только новый токен версии в общем кеше
+        taxonomy.bump_version(OperationStatus)
+        self.assertIsNot(taxonomy.get_taxonomy(), snapshot)
+
+    def test_unknown_id_falls_back_to_database(self):
+        taxonomy.get_taxonomy()
+        resp = self.client.post('/api/operations/', dict(self.payload, status_id=999), format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('status_id', resp.data)
+        self.assertFalse(Operation.objects.exists())
+
+    def test_tree_endpoint(self):
+        Category.objects.create(name='Аренда', type=self.t_in)
+        taxonomy.get_taxonomy()
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get('/api/taxonomy/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.sql(ctx, 'SELECT'), [])
+        self.assertEqual(resp.data['statuses'], [{'id': self.s_bus.id, 'name': 'Бизнес'}])
+        income = resp.data['types'][0]
+        self.assertEqual([c['name'] for c in income['categories']], ['Аренда', 'Инфраструктура'])
+        self.assertEqual(income['categories'][1]['subcategories'], [{'id': self.sub_vps.id, 'name': 'VPS'}])
+        self.assertEqual(resp.data['types'][1]['categories'], [])
+
+    def test_tree_stats_single_query(self):
+        self.client.post('/api/operations/', self.payload, format='json')
+        self.client.post('/api/operations/', dict(self.payload, date='2025-02-01', amount='50.00'), format='json')
+        taxonomy.get_taxonomy()
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get('/api/taxonomy/', {'stats': '1', 'date_from': '2025-01-01'})
+        self.assertEqual(len(self.sql(ctx, 'SELECT')), 1)
+        income = resp.data['types'][0]
+        self.assertEqual((income['count'], income['total']), (2, '150.00'))
+        self.assertEqual(income['categories'][0]['subcategories'][0]['total'], '150.00')
+        self.assertEqual(resp.data['types'][1]['total'], '0.00')
+        self.assertEqual(resp.data['statuses'][0]['count'], 2)
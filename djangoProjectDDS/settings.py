@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -46,6 +47,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым — чтобы общее время запроса включало остальные middleware (см. dds.middleware)
+    'dds.middleware.PerformanceMiddleware',
+    # Реплика для чтения на время запроса и cookie read-your-writes (dds.db_routers)
+    'dds.db_routers.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -84,12 +89,113 @@ DATABASES = {
         'NAME': os.getenv('POSTGRES_DB'),
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
-        'HOST': 'db',
-        'PORT': 5432,
-        'ATOMIC_REQUESTS': True
+        'HOST': os.getenv('POSTGRES_HOST', 'db'),
+        'PORT': int(os.getenv('POSTGRES_PORT', '5432')),
+        'ATOMIC_REQUESTS': True,
+        # Проверка соединения перед повторным использованием (с пулом — при выдаче из пула)
+        'CONN_HEALTH_CHECKS': os.getenv('DDS_DB_HEALTH_CHECKS', '1') == '1',
+        'OPTIONS': {},
     }
 }
 
+# Пул соединений psycopg (psycopg_pool, метрики — dds.db_pool на /metrics): DDS_DB_POOL=1 — у каждого
+# процесса свой пул на каждый алиас БД (default и реплики), размер от DDS_DB_POOL_MIN до DDS_DB_POOL_MAX;
+# запрос ждет свободное соединение не дольше DDS_DB_POOL_TIMEOUT сек (дальше — ошибка), простаивающие
+# сверх минимума закрываются через DDS_DB_POOL_MAX_IDLE сек, любое — через DDS_DB_POOL_MAX_LIFETIME сек.
+# Без пула — соединения живут DDS_DB_CONN_MAX_AGE сек (0 — новое соединение на каждый запрос).
+DDS_DB_POOL = os.getenv('DDS_DB_POOL', '0') == '1'
+if DDS_DB_POOL:
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv('DDS_DB_POOL_MIN', '2')),
+        'max_size': int(os.getenv('DDS_DB_POOL_MAX', '10')),
+        'timeout': float(os.getenv('DDS_DB_POOL_TIMEOUT', '10')),
+        'max_idle': float(os.getenv('DDS_DB_POOL_MAX_IDLE', '600')),
+        'max_lifetime': float(os.getenv('DDS_DB_POOL_MAX_LIFETIME', '3600')),
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DDS_DB_CONN_MAX_AGE', '0'))
+
+# Подготовленные выражения (PREPARE) для горячих запросов списка и карточки записей (dds.db_pool.prepared):
+# psycopg готовит SQL на сервере после DDS_DB_PREPARE_THRESHOLD выполнений на соединении (0 — сразу),
+# повторные запросы идут без разбора и планирования. Пусто — выключено. Имеет смысл с пулом или
+# DDS_DB_CONN_MAX_AGE: выражения живут, пока живо соединение. Несовместимо с PgBouncer в режиме transaction.
+DDS_DB_PREPARE_THRESHOLD = os.getenv('DDS_DB_PREPARE_THRESHOLD', '')
+DDS_DB_PREPARE_THRESHOLD = int(DDS_DB_PREPARE_THRESHOLD) if DDS_DB_PREPARE_THRESHOLD else None
+
+# Реплики для чтения (dds.db_routers): POSTGRES_REPLICA_HOSTS="replica1 replica2=2" — хосты потоковой
+# репликации default с весами (по умолчанию 1). GET-запросы API читают данные dds с них, запись и чтение
+# сразу после записи (DDS_PRIMARY_PIN_SECONDS, сек) — с default. Миграции применяются только к default.
+DDS_READ_REPLICAS = {}
+for number, entry in enumerate(os.getenv('POSTGRES_REPLICA_HOSTS', '').split(), start=1):
+    host, _, weight = entry.partition('=')
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'ATOMIC_REQUESTS': False,
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DDS_READ_REPLICAS[alias] = int(weight or 1)
+
+
+# Тесты чтения с реплик (dds/test_db_routers.py): без POSTGRES_REPLICA_HOSTS алиасы replica_1, replica_2 —
+# отдельные тестовые базы (по их содержимому видно, откуда прочитан ответ). Маршрутизацию на них включают
+# только сами эти тесты (override_settings(DDS_READ_REPLICAS=...)) — остальной набор читает с default.
+TESTING = sys.argv[1:2] == ['test']
+if TESTING and not DDS_READ_REPLICAS:
+    for alias in ('replica_1', 'replica_2'):
+        DATABASES[alias] = {
+            **DATABASES['default'],
+            'ATOMIC_REQUESTS': False,
+            'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+            'TEST': {'NAME': f"test_{DATABASES['default']['NAME']}_{alias}"},
+        }
+
+DDS_PRIMARY_PIN_SECONDS = int(os.getenv('DDS_PRIMARY_PIN_SECONDS', '10'))
+
+DATABASE_ROUTERS = ['dds.db_routers.ReplicaRouter']
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Общий для всех воркеров кеш: версии справочников для снимка в памяти (dds.taxonomy).
+    # По умолчанию — файловый (общий для процессов одного хоста); для нескольких хостов или контейнеров —
+    # общий каталог (в docker-compose — том shared_cache у web и worker) или Redis/Memcached.
+    'shared': {
+        'BACKEND': os.getenv('SHARED_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('SHARED_CACHE_LOCATION', '/tmp/dds_shared_cache'),
+    },
+}
+
+# Cache-Control: max-age (сек) для GET-ответов API с ETag/Last-Modified (dds.conditional).
+# 0 — браузер и прокси перепроверяют ответ при каждом чтении (304 без сериализации);
+# больше 0 — повторные чтения в пределах окна обслуживаются кешем браузера/прокси без запроса к Django.
+DDS_API_CACHE_MAX_AGE = int(os.getenv('DDS_API_CACHE_MAX_AGE', '0'))
+
+# Быстрый путь списка записей (dds.fast_render): строки из values_list и снимка справочников,
+# JSON через orjson; ответ побайтно совпадает с OperationSerializer. 0 — всегда через ModelSerializer.
+DDS_FAST_READ = os.getenv('DDS_FAST_READ', '1') == '1'
+
+# Лента изменений записей (dds.changes): отставание горизонта (сек). На PostgreSQL горизонт и так не заходит
+# за начало самой старой открытой пишущей транзакции, окно — запас на расхождение часов приложения и БД;
+# на других СУБД это единственная защита, и пишущие транзакции должны быть короче окна.
+# Срок хранения журнала удалений (дней) — курсоры старше него
+# получают 410 и делают полную синхронизацию (очистка журнала — manage.py prune_tombstones).
+DDS_CHANGES_SETTLE_SECONDS = int(os.getenv('DDS_CHANGES_SETTLE_SECONDS', '5'))
+DDS_TOMBSTONE_RETENTION_DAYS = int(os.getenv('DDS_TOMBSTONE_RETENTION_DAYS', '30'))
+
+# Фоновые задачи (dds.jobs, manage.py run_jobs): число процессов воркера по умолчанию;
+# задача без пульса дольше DDS_JOB_STALE_SECONDS считается брошенной упавшим воркером
+# и возвращается в очередь, пока попыток меньше DDS_JOB_MAX_ATTEMPTS.
+DDS_JOB_WORKERS = int(os.getenv('DDS_JOB_WORKERS', '2'))
+DDS_JOB_STALE_SECONDS = int(os.getenv('DDS_JOB_STALE_SECONDS', '300'))
+DDS_JOB_MAX_ATTEMPTS = int(os.getenv('DDS_JOB_MAX_ATTEMPTS', '3'))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -124,6 +230,12 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Файлы фоновых задач (тела импорта и результаты, dds.jobs) — локальное хранилище;
+# наружу отдаются только через API (/api/jobs/{id}/download/). По умолчанию — media/ в каталоге проекта
+# (в .gitignore); docker-compose задает DDS_MEDIA_ROOT на том вне исходников.
+MEDIA_ROOT = os.getenv('DDS_MEDIA_ROOT', str(BASE_DIR / 'media'))
+MEDIA_URL = 'media/'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -133,4 +245,26 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # JSON-рендерер с замером времени рендеринга (Server-Timing, /metrics)
+    'DEFAULT_RENDERER_CLASSES': [
+        'dds.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# Инструментирование запросов (dds.middleware.PerformanceMiddleware, dds.metrics):
+# запросы дольше DDS_SLOW_REQUEST_MS попадают в лог dds.performance вместе с самым медленным SQL;
+# GET /metrics требует DDS_METRICS_TOKEN (Authorization: Bearer <токен>); без токена открыт только при DEBUG.
+DDS_SLOW_REQUEST_MS = int(os.getenv('DDS_SLOW_REQUEST_MS', '500'))
+DDS_METRICS_TOKEN = os.getenv('DDS_METRICS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'dds': {'handlers': ['console'], 'level': 'INFO'},
+    },
 }
@@ -18,9 +18,13 @@ from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import RedirectView
 
+from dds.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/async/', include('dds.async_urls')),
     path('api/', include('dds.api_urls')),
+    path('metrics', metrics_view, name='metrics'),
     path('', include('dds.urls')),
     path('', RedirectView.as_view(pattern_name='dds:record-list', permanent=False)),
 ]
\ No newline at end of file